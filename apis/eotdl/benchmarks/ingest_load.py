@@ -0,0 +1,99 @@
+# Load benchmark for concurrent file ingestion.
+#
+# Starts the api in-process (see server.py), creates a dataset and ingests synthetic
+# files at increasing concurrency, reporting requests per second as json.
+#
+#   docker compose -f docker-compose.test.yml run eotdl-api-test \
+#       python -m api.benchmarks.ingest_load --files 200 --concurrency 1,8,32
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+
+import httpx
+
+from .server import start_server
+
+
+async def ingest(client, dataset_id, version, files, size, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def ingest_file(i):
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                f"/datasets/{dataset_id}",
+                files={"file": (f"{i}.bin", os.urandom(size))},
+                data={"version": str(version), "parent": f"c{concurrency}"},
+            )
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[ingest_file(i) for i in range(files)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "files": files,
+        "file_size": size,
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(files / elapsed, 2),
+        "mb_per_second": round(files * size / elapsed / 1024 / 1024, 2),
+        "p50": round(latencies[len(latencies) // 2], 4),
+        "p99": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 4),
+    }
+
+
+async def run(url, args):
+    async with httpx.AsyncClient(base_url=url, timeout=None) as client:
+        response = await client.post(
+            "/datasets",
+            json={
+                "name": "benchmark-" + uuid.uuid4().hex[:8],
+                "authors": ["benchmark"],
+                "source": "http://localhost",
+                "license": "free",
+            },
+        )
+        response.raise_for_status()
+        dataset_id = response.json()["dataset_id"]
+        response = await client.post(f"/datasets/version/{dataset_id}")
+        response.raise_for_status()
+        version = response.json()["version"]
+        results = []
+        for concurrency in args.concurrency:
+            results.append(
+                await ingest(
+                    client, dataset_id, version, args.files, args.size, concurrency
+                )
+            )
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--size", type=int, default=64 * 1024, help="bytes per file")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda s: [int(c) for c in s.split(",")],
+        default=[1, 8, 32],
+    )
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server, thread = start_server(args.port)
+    try:
+        results = asyncio.run(run(f"http://127.0.0.1:{args.port}", args))
+    finally:
+        server.should_exit = True
+        thread.join()
+    print(json.dumps({"benchmark": "ingest_load", "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
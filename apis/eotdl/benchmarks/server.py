@@ -0,0 +1,70 @@
+# API server for benchmarks, with token auth replaced by a benchmark user (never
+# expose it). Uses the same environment variables as the api: MONGO_URL,
+# MONGO_DB_NAME, S3_ENDPOINT, ACCESS_KEY_ID, SECRET_ACCESS_KEY, S3_BUCKET, S3_SSL.
+#
+#   python -m api.benchmarks.server --host 0.0.0.0 --port 8000
+
+import time
+import argparse
+import threading
+
+import uvicorn
+from bson import ObjectId
+
+from ..main import app
+from ..routers.auth import get_current_user
+from ..src.models import User
+from ..src.repos.mongo.client import get_db
+
+USER = {
+    "id": "65a000000000000000000000",
+    "uid": "benchmark",
+    "name": "benchmark",
+    "email": "benchmark@eotdl.com",
+    "picture": "benchmark",
+    "tier": "dev",
+}
+TIER = {
+    "name": "dev",
+    "limits": {
+        "datasets": {"upload": 1000000, "download": 1000000, "count": 1000000}
+    },
+}
+
+
+def seed_db():
+    db = get_db()
+    if db["tiers"].find_one({"name": TIER["name"]}) is None:
+        db["tiers"].insert_one(dict(TIER))
+    if db["users"].find_one({"uid": USER["uid"]}) is None:
+        db["users"].insert_one({**USER, "_id": ObjectId(USER["id"])})
+
+
+def create_server(host, port):
+    seed_db()
+    app.dependency_overrides[get_current_user] = lambda: User(**USER)
+    return uvicorn.Server(
+        uvicorn.Config(app, host=host, port=port, log_level="warning")
+    )
+
+
+def start_server(port):
+    # run in a background thread, for benchmarks driving the api from the same process
+    server = create_server("127.0.0.1", port)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.1)
+    return server, thread
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    create_server(args.host, args.port).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from anyio import to_thread
 import logging
+import os
 
 from .routers.auth import (
     login,
@@ -18,9 +20,10 @@ from .routers.datasets import (
     ingest_dataset,
     download_dataset,
     update_dataset,
+    upload_large_files,
     # delete_dataset,
 )
-from .routers import admin, migrate
+from .routers import admin, migrate, metrics
 
 app = FastAPI()
 app.add_middleware(
@@ -30,6 +33,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(
+    metrics.MetricsMiddleware,
+    timing_headers=os.environ.get("SERVER_TIMING", "False") == "True",
+)
 # auth
 app.include_router(login.router, prefix="/auth")
 app.include_router(logout.router, prefix="/auth")
@@ -46,11 +53,12 @@ app.include_router(create_dataset.router, prefix="/datasets")
 app.include_router(ingest_dataset.router, prefix="/datasets")
 app.include_router(download_dataset.router, prefix="/datasets")
 app.include_router(update_dataset.router, prefix="/datasets")
-# # app.include_router(upload_large_files.router, prefix="/datasets")
+app.include_router(upload_large_files.router, prefix="/datasets")
 # app.include_router(delete_dataset.router, prefix="/datasets")
 # other
 app.include_router(admin.router)
 app.include_router(migrate.router)
+app.include_router(metrics.router)
 
 logging.basicConfig(
     filename="/tmp/eotdl-api.log",
@@ -61,6 +69,14 @@ logging.basicConfig(
 VERSION = "2023.10.17"
 
 
+@app.on_event("startup")
+async def configure_thread_pool():
+    # sync handlers (all the ones calling mongo or storage) run in this pool
+    threads = os.environ.get("API_THREADS")
+    if threads:
+        to_thread.current_default_thread_limiter().total_tokens = int(threads)
+
+
 @app.get("/", name="home", include_in_schema=False)
 async def root():
     return {
@@ -4,6 +4,8 @@ import logging
 import os
 
 from .auth import key_auth
+from ..src.usecases.auth.parse_token import tokens_cache
+from ..src.usecases.user.persist_user import users_cache
 
 logger=logging.getLogger(__name__)
 
@@ -31,4 +33,13 @@ def logs(isAdmin: bool = Depends(key_auth)):
     except Exception as e:
         logger.exception('logs')
         raise HTTPException(
-            status_code=status.HTTP_409_CONFLICT, detail=str(e))
\ No newline at end of file
+            status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+@router.get("/cache", include_in_schema=False)
+def cache(isAdmin: bool = Depends(key_auth)):
+    try:
+        return {"tokens": tokens_cache.stats(), "users": users_cache.stats()}
+    except Exception as e:
+        logger.exception('cache')
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -0,0 +1,19 @@
+from fastapi import Request, Response, status
+
+from ..src.usecases.catalog import retrieve_cached
+
+
+def cached_response(request: Request, key, retrieve):
+    # serve a cached json response, or a 304 if the client already has it
+    body, etag = retrieve_cached(key, retrieve)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in [tag[2:] if tag.startswith("W/") else tag for tag in tags]
@@ -1,42 +1,113 @@
 from fastapi.exceptions import HTTPException
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Header
 import logging
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, RedirectResponse, Response
 
 from ..auth import get_current_user
 from ...src.models import User
-from ...src.usecases.datasets import download_dataset_file  # , download_stac_catalog
+from ...src.errors import RangeNotSatisfiableError
+from ...src.usecases.datasets import (
+    download_dataset_file,
+    retrieve_dataset_file_url,
+    parse_range,
+    multipart_byteranges,
+    download_dataset_archive,
+)  # , download_stac_catalog
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
 @router.get("/{dataset_id}/download/{filename:path}")
-async def download_dataset(
+def download_dataset(
     dataset_id: str,
     filename: str,  # podría ser un path... a/b/c/file.txt
     version: int = None,
+    redirect: bool = False,
+    range_header: str = Header(None, alias="Range"),
     user: User = Depends(get_current_user),
 ):
     try:
+        if redirect:  # bytes are served by storage, bypassing the api
+            url = retrieve_dataset_file_url(dataset_id, filename, user, version)
+            return RedirectResponse(
+                url, status_code=status.HTTP_307_TEMPORARY_REDIRECT
+            )
         data_stream, object_info, _filename = download_dataset_file(
             dataset_id, filename, user, version
         )
+        size = object_info.size
         response_headers = {
             "Content-Disposition": f'attachment; filename="{filename}"',
-            "Content-Type": object_info.content_type,
-            "Content-Length": str(object_info.size),
+            "Accept-Ranges": "bytes",
         }
+        if object_info.etag:
+            response_headers["ETag"] = f'"{object_info.etag}"'
+        try:
+            ranges = parse_range(range_header, size)
+        except RangeNotSatisfiableError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{size}"},
+            )
+        if ranges is None:
+            response_headers["Content-Length"] = str(size)
+            return StreamingResponse(
+                data_stream(dataset_id, _filename),
+                headers=response_headers,
+                media_type=object_info.content_type,
+            )
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            response_headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                data_stream(dataset_id, _filename, start, end - start + 1),
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                headers=response_headers,
+                media_type=object_info.content_type,
+            )
+        boundary, length, stream = multipart_byteranges(
+            data_stream, dataset_id, _filename, ranges, size, object_info.content_type
+        )
+        response_headers["Content-Length"] = str(length)
         return StreamingResponse(
-            data_stream(dataset_id, _filename),
+            stream,
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
             headers=response_headers,
-            media_type=object_info.content_type,
+            media_type=f"multipart/byteranges; boundary={boundary}",
         )
     except Exception as e:
         logger.exception("datasets:download")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
+@router.get("/{dataset_id}/archive")
+def download_archive(
+    dataset_id: str,
+    version: int = None,
+    prefix: str = None,
+    format: str = "tar",
+    compression: str = None,
+    user: User = Depends(get_current_user),
+):
+    try:
+        filename, stream = download_dataset_archive(
+            dataset_id, user, version, prefix, format, compression
+        )
+        media_type = "application/x-tar" if format == "tar" else "application/zip"
+        if compression == "zstd":
+            media_type = "application/zstd"
+        return StreamingResponse(
+            stream,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+            media_type=media_type,
+        )
+    except Exception as e:
+        logger.exception("datasets:download_archive")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
 # @router.get("/{dataset_id}/download")
 # async def download_stac_Catalog(
 #     dataset_id: str,
@@ -2,21 +2,26 @@ from fastapi.exceptions import HTTPException
 from fastapi import APIRouter, status, Depends, File, Form, UploadFile
 import logging
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 from ..auth import get_current_user
 from ...src.models import User
+from ...src.metrics import UPLOADS_IN_PROGRESS
 from ...src.usecases.datasets import (
     ingest_file,
     ingest_existing_file,
+    ingest_existing_files,
+    ingest_files_batch,
 )  # , ingest_stac, ingest_file_url
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+# ingestion blocks on storage and the database, handlers are sync so fastapi runs
+# them in its thread pool instead of blocking the event loop
 @router.post("/{dataset_id}")
-async def ingest(
+def ingest(
     dataset_id: str,
     file: Optional[UploadFile] = File(None),
     version: int = Form(),  # debería quitarlo (un file solo se puede subir a la última versión si no está ya)
@@ -31,7 +36,7 @@ async def ingest(
             assert not file, "File provided as both file and filename"
             assert not parent, "Parent provided as both parent and filename"
             assert fileversion, "Fileversion not provided"
-            dataset_id, dataset_name, file_name = await ingest_existing_file(
+            dataset_id, dataset_name, file_name = ingest_existing_file(
                 filename, dataset_id, fileversion, version, checksum, user
             )
         else:
@@ -39,9 +44,10 @@ async def ingest(
                 raise Exception(
                     "File too large, please use the CLI to upload large files."
                 )
-            dataset_id, dataset_name, file_name = await ingest_file(
-                file, dataset_id, version, parent, checksum, user
-            )
+            with UPLOADS_IN_PROGRESS.track_inprogress():
+                dataset_id, dataset_name, file_name = ingest_file(
+                    file, dataset_id, version, parent, checksum, user
+                )
         return {
             "dataset_id": dataset_id,
             "dataset_name": dataset_name,
@@ -52,6 +58,64 @@ async def ingest(
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
+@router.post("/{dataset_id}/batch", include_in_schema=False)
+def ingest_batch(
+    dataset_id: str,
+    files: List[UploadFile] = File(...),
+    version: int = Form(),
+    parents: List[str] = Form(),
+    checksums: List[str] = Form(),
+    user: User = Depends(get_current_user),
+):
+    try:
+        with UPLOADS_IN_PROGRESS.track_inprogress():
+            dataset_id, dataset_name, file_names = ingest_files_batch(
+                files, dataset_id, version, parents, checksums, user
+            )
+        return {
+            "dataset_id": dataset_id,
+            "dataset_name": dataset_name,
+            "file_names": file_names,
+        }
+    except Exception as e:
+        logger.exception("datasets:ingest_batch")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
+class ExistingFile(BaseModel):
+    filename: str
+    file_version: int
+    checksum: str
+
+
+class IngestExistingFilesBody(BaseModel):
+    version: int
+    files: List[ExistingFile]
+
+
+@router.post("/{dataset_id}/existing", include_in_schema=False)
+def ingest_existing(
+    dataset_id: str,
+    body: IngestExistingFilesBody,
+    user: User = Depends(get_current_user),
+):
+    try:
+        dataset_id, dataset_name, file_names = ingest_existing_files(
+            [(f.filename, f.file_version, f.checksum) for f in body.files],
+            dataset_id,
+            body.version,
+            user,
+        )
+        return {
+            "dataset_id": dataset_id,
+            "dataset_name": dataset_name,
+            "file_names": file_names,
+        }
+    except Exception as e:
+        logger.exception("datasets:ingest_existing")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
 # class IngestSTACBody(BaseModel):
 #     stac: dict  # json as string
 
@@ -79,7 +143,7 @@ async def ingest(
 #     user: User = Depends(get_current_user),
 # ):
 #     # try:
-#     dataset_id, dataset_name, file_name = await ingest_file_url(
+#     dataset_id, dataset_name, file_name = ingest_file_url(
 #         body.url, dataset_id, user
 #     )
 #     return {
@@ -1,9 +1,10 @@
 from fastapi.exceptions import HTTPException
-from fastapi import APIRouter, status, Depends
+from fastapi import APIRouter, status, Depends, Query, Request
 import logging
 from typing import Union
 
 from ..auth import get_current_user
+from ..cache import cached_response
 from ...src.models import User
 from ...src.usecases.datasets import (
     retrieve_datasets,
@@ -19,11 +20,22 @@ logger = logging.getLogger(__name__)
 
 
 @router.get("")
-def retrieve(name: str = None, match: str = None, limit: Union[int, None] = None):
+def retrieve(
+    request: Request,
+    name: str = None,
+    match: str = None,
+    limit: Union[int, None] = None,
+):
     try:
         if name is None:
-            return retrieve_datasets(match, limit)
-        return retrieve_dataset_by_name(name)
+            return cached_response(
+                request,
+                ("datasets", match, limit),
+                lambda: retrieve_datasets(match, limit),
+            )
+        return cached_response(
+            request, ("dataset", name), lambda: retrieve_dataset_by_name(name)
+        )
     except Exception as e:
         logger.exception("datasets:retrieve")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -33,27 +45,34 @@ def retrieve(name: str = None, match: str = None, limit: Union[int, None] = None
 def retrieve_files(
     dataset_id: str,
     version: int = None,
+    prefix: str = None,
+    cursor: str = None,
+    limit: Union[int, None] = Query(None, gt=0, le=10000),
 ):
     try:
-        return retrieve_dataset_files(dataset_id, version)
+        return retrieve_dataset_files(dataset_id, version, prefix, cursor, limit)
     except Exception as e:
         logger.exception("datasets:retrieve")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.get("/leaderboard", include_in_schema=False)
-def leaderboard():
+def leaderboard(request: Request):
     try:
-        return retrieve_datasets_leaderboard()
+        return cached_response(
+            request, ("leaderboard",), retrieve_datasets_leaderboard
+        )
     except Exception as e:
         logger.exception("datasets:leaderboard")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
 @router.get("/popular", include_in_schema=False)
-def retrieve_popular(limit: Union[int, None] = None):
+def retrieve_popular(request: Request, limit: Union[int, None] = None):
     try:
-        return retrieve_popular_datasets(limit)
+        return cached_response(
+            request, ("popular", limit), lambda: retrieve_popular_datasets(limit)
+        )
     except Exception as e:
         logger.exception("datasets:retrieve_popular")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
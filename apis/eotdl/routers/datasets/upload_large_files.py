@@ -2,11 +2,17 @@ from fastapi.exceptions import HTTPException
 from fastapi import APIRouter, status, Depends, File, Form, UploadFile
 import logging
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 from ..auth import get_current_user
 from ...src.models import User
-from ...src.usecases.datasets import generate_upload_id, ingest_dataset_chunk, complete_multipart_upload
+from ...src.metrics import UPLOADS_IN_PROGRESS
+from ...src.usecases.datasets import (
+    generate_upload_id,
+    ingest_dataset_chunk,
+    generate_presigned_part_url,
+    complete_multipart_upload,
+)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -41,29 +47,51 @@ def ingest_large_dataset_chunk(
     user: User = Depends(get_current_user),
 ):
     try:
-        message = ingest_dataset_chunk(
-            file.file, part_number, upload_id, checksum, user
-        )
+        with UPLOADS_IN_PROGRESS.track_inprogress():
+            message = ingest_dataset_chunk(
+                file.file, part_number, upload_id, checksum, user
+            )
         return {"message": message}
     except Exception as e:
         logger.exception("datasets:ingest_large_dataset_chunk")
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
 
 
+@router.get("/chunk/{upload_id}/url", include_in_schema=False)
+def large_dataset_chunk_url(
+    upload_id: str,
+    part_number: int,
+    user: User = Depends(get_current_user),
+):
+    try:
+        url = generate_presigned_part_url(part_number, upload_id, user)
+        return {"url": url}
+    except Exception as e:
+        logger.exception("datasets:large_dataset_chunk_url")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
 class CompleteBody(BaseModel):
-    name: Optional[str]
-    description: Optional[str]
-    checksum: str
+    version: int
+    checksums: Optional[List[str]] = None
+    size: Optional[int] = None
 
 
 @router.post("/complete/{upload_id}", include_in_schema=False)
-async def complete_large_dataset_upload(
+def complete_large_dataset_upload(
     upload_id: str,
+    body: CompleteBody,
     user: User = Depends(get_current_user),
 ):
     try:
-        dataset = await complete_multipart_upload(user, upload_id)
-        return {"dataset": dataset}
+        dataset_id, dataset_name, file_name = complete_multipart_upload(
+            user, upload_id, body.version, body.checksums, body.size
+        )
+        return {
+            "dataset_id": dataset_id,
+            "dataset_name": dataset_name,
+            "file_name": file_name,
+        }
     except Exception as e:
         logger.exception("datasets:complete_large_dataset_upload")
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Response
+from starlette.datastructures import MutableHeaders
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+import time
+
+from ..src.metrics import (
+    REQUEST_LATENCY,
+    REQUEST_BYTES,
+    RESPONSE_BYTES,
+    REQUESTS_IN_PROGRESS,
+    request_stats,
+)
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+class MetricsMiddleware:
+    # records latency and body sizes per route, and optionally reports the time spent
+    # in mongo and storage for each request in a Server-Timing header
+    def __init__(self, app, timing_headers=False):
+        self.app = app
+        self.timing_headers = timing_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method, stats = scope["method"], {}
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        received, sent, status_code = 0, 0, 500
+
+        async def receive_wrapper():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal sent, status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.timing_headers:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        server_timing(stats, time.perf_counter() - start),
+                    )
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method).inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.labels(method).dec()
+            route = scope.get("route")
+            path = route.path if route is not None else "unmatched"
+            REQUEST_LATENCY.labels(method, path, status_code).observe(
+                time.perf_counter() - start
+            )
+            # bodies not read by the handler are counted by their declared length
+            REQUEST_BYTES.labels(path).inc(received or content_length(scope))
+            RESPONSE_BYTES.labels(path).inc(sent)
+            request_stats.reset(token)
+
+
+def content_length(scope):
+    for name, value in scope["headers"]:
+        if name == b"content-length" and value.isdigit():
+            return int(value)
+    return 0
+
+
+def server_timing(stats, duration):
+    metrics = [
+        f'{backend};dur={seconds * 1000:.1f};desc="{calls} calls"'
+        for backend, (calls, seconds) in stats.items()
+    ]
+    return ", ".join(metrics + [f"app;dur={duration * 1000:.1f}"])
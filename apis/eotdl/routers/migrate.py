@@ -8,9 +8,12 @@ from .auth import key_auth
 from ..src.repos.mongo.client import get_db
 from ..src.repos.minio.client import get_client
 from ..src.repos.boto3.client import get_client as get_boto3_client
+from ..src.repos.mongo import MongoFilesRepo, MongoDatasetsRepo
+from ..src.repos.mongo.MongoFilesRepo import FILES
 from ..src.models import File, Files, Dataset, Version, STACDataset
 
 from bson.objectid import ObjectId
+from pymongo import UpdateOne
 
 router = APIRouter(prefix="/migrate", tags=["migrate"])
 logger = logging.getLogger(__name__)
@@ -35,6 +38,9 @@ def migrate_db(isAdmin: bool = Depends(key_auth)):
             db["users"].update_one(
                 {"_id": user["_id"]}, {"$set": {"id": str(user["_id"])}}
             )
+    migrate_file_entries(db)
+    backfill_file_versions(db)
+    backfill_search_names(db)
     # update datasets
     #   - create files
     #   - create version
@@ -85,3 +91,51 @@ def migrate_db(isAdmin: bool = Depends(key_auth)):
     #     db["datasets"].delete_one({"_id": dataset["_id"]})
     #     db["datasets"].insert_one(updated_dataset)
     return "Done"
+
+
+def backfill_file_versions(db):
+    # initialise the file version counters from the registered files and the objects
+    # in storage ($max makes it safe to run multiple times)
+    s3 = get_client()
+    files_repo = MongoFilesRepo()
+    for dataset in db["datasets"].find({"quality": 0, "files": {"$exists": True}}):
+        last_versions = {}
+        files = db[FILES].find({"files": dataset["files"]}, {"name": 1, "version": 1})
+        for f in files:
+            last_versions[f["name"]] = max(last_versions.get(f["name"], 0), f["version"])
+        prefix = dataset["id"] + "/"
+        for obj in s3.list_objects(bucket, prefix=prefix, recursive=True):
+            name, _, file_version = obj.object_name[len(prefix) :].rpartition("_")
+            if name and file_version.isdigit():
+                last_versions[name] = max(last_versions.get(name, 0), int(file_version))
+        for name, file_version in last_versions.items():
+            files_repo.init_file_version(dataset["files"], name, file_version)
+    # the counters used to be kept in the files documents
+    db["files"].update_many({"counters": {"$exists": True}}, {"$unset": {"counters": ""}})
+
+
+def migrate_file_entries(db):
+    # move the files embedded in the files documents to their own collection
+    MongoFilesRepo()  # create indexes
+    for files in db["files"].find({"files.0": {"$exists": True}}):
+        operations = [
+            UpdateOne(
+                {"files": files["id"], "name": f["name"], "version": f["version"]},
+                {"$setOnInsert": {**f, "files": files["id"]}},
+                upsert=True,
+            )
+            for f in files["files"]
+        ]
+        db[FILES].bulk_write(operations, ordered=False)
+        db["files"].update_one({"_id": files["_id"]}, {"$set": {"files": []}})
+
+
+def backfill_search_names(db):
+    # lowercase names used by the indexed prefix search of datasets
+    MongoDatasetsRepo()  # create indexes
+    operations = [
+        UpdateOne({"_id": d["_id"]}, {"$set": {"search_name": d["name"].lower()}})
+        for d in db["datasets"].find({"search_name": {"$exists": False}}, {"name": 1})
+    ]
+    if operations:
+        db["datasets"].bulk_write(operations, ordered=False)
@@ -1,16 +1,17 @@
 from fastapi.exceptions import HTTPException
-from fastapi import APIRouter, status
+from fastapi import APIRouter, status, Request
 import logging
 
 from ...src.usecases.tags import retrieve_tags
+from ..cache import cached_response
 
 logger=logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("")
-def retrieve():
+def retrieve(request: Request):
     try:
-        return retrieve_tags()
+        return cached_response(request, ("tags",), retrieve_tags)
     except Exception as e:
         logger.exception('tags.retrieve')
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
\ No newline at end of file
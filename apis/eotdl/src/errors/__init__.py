@@ -10,6 +10,7 @@ from .datasets import (
     UploadIdDoesNotExist,
     ChecksumMismatch,
     DatasetVersionDoesNotExistError,
+    RangeNotSatisfiableError,
 )
 from .user import (
     UserUnauthorizedError,
@@ -73,3 +73,10 @@ class DatasetVersionDoesNotExistError(Exception):
 
     def __init__(self):
         super().__init__(self.message)
+
+
+class RangeNotSatisfiableError(Exception):
+    message = "Range not satisfiable"
+
+    def __init__(self):
+        super().__init__(self.message)
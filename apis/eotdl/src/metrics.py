@@ -0,0 +1,96 @@
+import time
+import inspect
+import functools
+import contextvars
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+REQUEST_LATENCY = Histogram(
+    "eotdl_request_duration_seconds",
+    "Request latency",
+    ["method", "route", "status"],
+)
+REQUEST_BYTES = Counter(
+    "eotdl_request_bytes_total", "Bytes received in request bodies", ["route"]
+)
+RESPONSE_BYTES = Counter(
+    "eotdl_response_bytes_total", "Bytes sent in response bodies", ["route"]
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "eotdl_requests_in_progress", "Requests being processed", ["method"]
+)
+UPLOADS_IN_PROGRESS = Gauge(
+    "eotdl_uploads_in_progress", "File ingestions and chunk uploads in progress"
+)
+BACKEND_CALLS = Counter(
+    "eotdl_backend_calls_total", "Calls to mongo and storage", ["backend", "operation"]
+)
+BACKEND_LATENCY = Histogram(
+    "eotdl_backend_call_duration_seconds",
+    "Latency of the calls to mongo and storage",
+    ["backend", "operation"],
+)
+
+# per request totals of the backend calls, {backend: [calls, seconds]}
+request_stats = contextvars.ContextVar("request_stats", default=None)
+
+
+def record_backend_call(backend, operation, duration):
+    BACKEND_CALLS.labels(backend, operation).inc()
+    BACKEND_LATENCY.labels(backend, operation).observe(duration)
+    stats = request_stats.get()
+    if stats is not None:
+        calls = stats.setdefault(backend, [0, 0.0])
+        calls[0] += 1
+        calls[1] += duration
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    # pymongo runs the listener in the thread issuing the command, so the
+    # request context is available to attribute the call
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_backend_call("mongo", event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record_backend_call("mongo", event.command_name, event.duration_micros / 1e6)
+
+
+def instrument(backend, exclude=[]):
+    # class decorator timing the public methods of a storage repo (except the ones
+    # not calling the backend), generators are timed until exhausted since that is
+    # when the data is actually transferred
+    def decorator(cls):
+        for name, method in list(vars(cls).items()):
+            if name.startswith("_") or name in exclude or not inspect.isfunction(method):
+                continue
+            setattr(cls, name, timed(backend, name, method))
+        return cls
+
+    return decorator
+
+
+def timed(backend, operation, method):
+    if inspect.isgeneratorfunction(method):
+
+        @functools.wraps(method)
+        def generator(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                yield from method(*args, **kwargs)
+            finally:
+                record_backend_call(backend, operation, time.perf_counter() - start)
+
+        return generator
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record_backend_call(backend, operation, time.perf_counter() - start)
+
+    return wrapper
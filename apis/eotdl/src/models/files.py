@@ -29,6 +29,7 @@ class UploadingFile(BaseModel):
     name: str
     dataset: str
     checksum: str
+    file_version: int = 1
     createdAt: datetime = datetime.now()
     updatedAt: datetime = datetime.now()
     parts: List[int] = []
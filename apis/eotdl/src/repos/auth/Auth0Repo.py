@@ -6,6 +6,9 @@ from auth0.authentication.token_verifier import (
     AsymmetricSignatureVerifier,
 )
 
+# verifiers are shared so the JWKS is fetched once and cached between requests
+signature_verifiers = {}
+
 
 class Auth0Repo:
     def __init__(self):
@@ -52,7 +55,9 @@ class Auth0Repo:
     def validate_token(self, id_token):
         jwks_url = "https://{}/.well-known/jwks.json".format(self.domain)
         issuer = "https://{}/".format(self.domain)
-        sv = AsymmetricSignatureVerifier(jwks_url)
+        if jwks_url not in signature_verifiers:
+            signature_verifiers[jwks_url] = AsymmetricSignatureVerifier(jwks_url)
+        sv = signature_verifiers[jwks_url]
         tv = TokenVerifier(
             signature_verifier=sv, issuer=issuer, audience=self.client_id
         )
@@ -67,6 +72,7 @@ class Auth0Repo:
             "name": payload["name"],
             "email": payload["email"],
             "picture": payload["picture"],
+            "exp": payload.get("exp"),
         }
 
     def generate_logout_url(self, redirect_uri):
@@ -1,8 +1,10 @@
 from .client import get_client
+from ...metrics import instrument
 import os
 import hashlib
 
 
+@instrument("s3", exclude=["presigned_part_url"])
 class Boto3Repo:
     def __init__(self):
         self.client = get_client()
@@ -23,7 +25,19 @@ class Boto3Repo:
         )
         return response["ETag"].strip('"')
 
-    def complete_multipart_upload(self, storage, upload_id):
+    def presigned_part_url(self, storage, part, upload_id, expires=3600):
+        return self.client.generate_presigned_url(
+            "upload_part",
+            Params={
+                "Bucket": self.bucket,
+                "Key": storage,
+                "PartNumber": part,
+                "UploadId": upload_id,
+            },
+            ExpiresIn=expires,
+        )
+
+    def list_parts(self, storage, upload_id):
         parts = []
         next_part_number_marker = 0
         is_truncated = True
@@ -34,10 +48,20 @@ class Boto3Repo:
                 UploadId=upload_id,
                 PartNumberMarker=next_part_number_marker,
             )
-            parts.extend(response["Parts"])
+            parts.extend(response.get("Parts", []))
             is_truncated = response["IsTruncated"]
             if is_truncated:
                 next_part_number_marker = response["NextPartNumberMarker"]
+        return parts
+
+    def abort_multipart_upload(self, storage, upload_id):
+        return self.client.abort_multipart_upload(
+            Bucket=self.bucket, Key=storage, UploadId=upload_id
+        )
+
+    def complete_multipart_upload(self, storage, upload_id, parts=None):
+        if parts is None:
+            parts = self.list_parts(storage, upload_id)
         sorted_parts = sorted(parts, key=lambda part: part["PartNumber"])
         parts = [
             {"PartNumber": part["PartNumber"], "ETag": part["ETag"]}
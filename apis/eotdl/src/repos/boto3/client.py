@@ -2,8 +2,17 @@ import boto3
 
 import os
 
+client = {}
+
 
 def get_client():
+    # clients are thread safe and expensive to create, one is shared by the process
+    if not "boto3" in client:
+        client["boto3"] = create_client()
+    return client["boto3"]
+
+
+def create_client():
     if not "S3_SSL" in os.environ:  # use SSL if not specified
         HTTPS = True
     else:
@@ -1,4 +1,7 @@
+from minio.error import S3Error
+
 from .client import get_client
+from ...metrics import instrument
 import os
 import hashlib
 import requests
@@ -6,33 +9,65 @@ from io import BytesIO
 import copy
 
 
+class HashingReader:
+    # tee the upload stream through sha1 so the checksum is known once stored
+    def __init__(self, file):
+        self.file = file
+        self.sha1_hash = hashlib.sha1()
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.sha1_hash.update(data)
+        self.size += len(data)
+        return data
+
+    def hexdigest(self):
+        return self.sha1_hash.hexdigest()
+
+
+# buckets already checked by this process, saves a request per repo instance
+checked_buckets = set()
+
+
+@instrument("minio", exclude=["get_object", "get_file_url"])
 class MinioRepo:
     def __init__(self):
         self.client = get_client()
         self.bucket = os.environ["S3_BUCKET"]
-        if not self.client.bucket_exists(self.bucket):
-            self.client.make_bucket(self.bucket)
+        if self.bucket not in checked_buckets:
+            if not self.client.bucket_exists(self.bucket):
+                self.client.make_bucket(self.bucket)
+            checked_buckets.add(self.bucket)
 
     def get_object(self, dataset_id, file_name):
         return f"{dataset_id}/{file_name}"
 
-    def persist_file(self, file, dataset_id, filename):
+    def next_file_version(self, dataset_id, filename):
+        # probes the stored versions, only used for files without a version counter
         file_version = 1
         while True:
             try:
                 object = self.get_object(dataset_id, f"{filename}_{file_version}")
                 self.client.stat_object(self.bucket, object)
                 file_version += 1
-            except:
+            except S3Error as e:
+                if e.code not in ("NoSuchKey", "NoSuchObject"):
+                    raise
                 break
+        return file_version
+
+    def persist_file(self, file, dataset_id, filename, file_version):
+        object = self.get_object(dataset_id, f"{filename}_{file_version}")
+        reader = HashingReader(file)
         self.client.put_object(
             self.bucket,
             object,
-            file,
+            reader,
             length=-1,
             part_size=10 * 1024 * 1024,
         )
-        return file_version
+        return reader.hexdigest(), reader.size
 
     def persist_file_url(self, url, dataset_id, filename):
         # This won't work for large files :(
@@ -60,9 +95,15 @@ class MinioRepo:
         object = self.get_object(dataset_id, file_name)
         return self.client.remove_object(self.bucket, object)
 
-    async def data_stream(self, dataset_id, file_name, chunk_size=1024 * 1024 * 10):
+    def data_stream(
+        self, dataset_id, file_name, offset=0, length=0, chunk_size=1024 * 1024
+    ):
+        # blocking generator, starlette iterates it in a threadpool off the event loop
         with self.client.get_object(
-            self.bucket, self.get_object(dataset_id, file_name)
+            self.bucket,
+            self.get_object(dataset_id, file_name),
+            offset=offset,
+            length=length,
         ) as stream:
             for chunk in stream.stream(chunk_size):
                 yield chunk
@@ -79,10 +120,9 @@ class MinioRepo:
         except:
             return False
 
-    async def calculate_checksum(self, dataset_id, file_name):
-        data_stream = self.data_stream(dataset_id, file_name)
+    def calculate_checksum(self, dataset_id, file_name):
         sha1_hash = hashlib.sha1()
-        async for chunk in data_stream:
+        for chunk in self.data_stream(dataset_id, file_name):
             sha1_hash.update(chunk)
         return sha1_hash.hexdigest()
 
@@ -1,15 +1,33 @@
 from .MongoRepo import MongoRepo
 from datetime import datetime
+from pymongo import ASCENDING, DESCENDING
+import re
 
 
 class MongoDatasetsRepo(MongoRepo):
+    indexes = False
+
     def __init__(self):
         super().__init__()
+        if not MongoDatasetsRepo.indexes:
+            self.create_indexes()
+            MongoDatasetsRepo.indexes = True
+
+    def create_indexes(self):
+        self.db["datasets"].create_index([("name", ASCENDING)])
+        self.db["datasets"].create_index([("search_name", ASCENDING)])
+        self.db["datasets"].create_index([("likes", DESCENDING)])
+
+    def search_name(self, dataset):
+        # lowercase copy of the name, so case insensitive prefix searches use the index
+        if dataset.get("name") is not None:
+            dataset["search_name"] = dataset["name"].lower()
+        return dataset
 
     def retrieve_datasets(self, name, limit):
         match = {}
         if name is not None:
-            match = {"name": {"$regex": name, "$options": "i"}}
+            match = {"search_name": {"$regex": "^" + re.escape(name.lower())}}
         return self.retrieve("datasets", limit=limit, match=match)
 
     def find_one_dataset_by_name(self, name):
@@ -31,7 +49,7 @@ class MongoDatasetsRepo(MongoRepo):
         return self.delete("files", id)
 
     def persist_dataset(self, dataset, id):
-        return self.persist("datasets", dataset, id)
+        return self.persist("datasets", self.search_name(dataset), id)
 
     def increase_user_dataset_count(self, uid):
         return self.increase_counter("users", "uid", uid, "dataset_count")
@@ -50,7 +68,17 @@ class MongoDatasetsRepo(MongoRepo):
         )
 
     def update_dataset(self, dataset_id, dataset):
-        return self.update("datasets", dataset_id, dataset)
+        return self.update("datasets", dataset_id, self.search_name(dataset))
+
+    def increase_version_size(self, dataset_id, version, size):
+        return self._update(
+            "datasets",
+            {"id": dataset_id, "versions.version_id": version},
+            {
+                "$inc": {"versions.$.size": size},
+                "$set": {"updatedAt": datetime.now()},
+            },
+        )
 
     def retrieve_datasets_leaderboard(self):
         return self.find_top("users", "dataset_count", 5)
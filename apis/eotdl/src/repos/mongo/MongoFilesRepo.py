@@ -1,36 +1,145 @@
+from pymongo import ReturnDocument, UpdateOne, InsertOne, ASCENDING
+from datetime import datetime
+import re
+
 from .MongoRepo import MongoRepo
 
+FILES = "file_entries"
+FILE_VERSIONS = "file_versions"
+
+
+class MongoFilesBatch:
+    # accumulates the changes to the files of a dataset and applies them with bulk writes
+    def __init__(self, db, files_id):
+        self.db = db
+        self.files_id = files_id
+        self.operations = []
+        self.folder_operations = []
+        self.folders = set()
+
+    def add_file(self, file):
+        self.operations.append(InsertOne({**file, "files": self.files_id}))
+
+    def add_file_version(self, filename, file_version, version):
+        self.operations.append(
+            UpdateOne(
+                {"files": self.files_id, "name": filename, "version": file_version},
+                {"$addToSet": {"versions": version}},
+            )
+        )
+
+    def add_folder_version(self, folder, version):
+        if folder["name"] in self.folders:
+            return
+        self.folders.add(folder["name"])
+        # create the folder if missing, then add the version (ordered)
+        self.folder_operations.append(
+            UpdateOne(
+                {"id": self.files_id, "folders.name": {"$ne": folder["name"]}},
+                {"$push": {"folders": folder}},
+            )
+        )
+        self.folder_operations.append(
+            UpdateOne(
+                {"id": self.files_id, "folders.name": folder["name"]},
+                {"$addToSet": {"folders.$.versions": version}},
+            )
+        )
+
+    def commit(self):
+        if self.operations:
+            self.db[FILES].bulk_write(self.operations, ordered=True)
+        if self.folder_operations:
+            self.db["files"].bulk_write(self.folder_operations, ordered=True)
+        self.operations, self.folder_operations, self.folders = [], [], set()
+
 
 class MongoFilesRepo(MongoRepo):
+    indexes = False
+
     def __init__(self):
         super().__init__()
+        if not MongoFilesRepo.indexes:
+            self.create_indexes()
+            MongoFilesRepo.indexes = True
+
+    def create_indexes(self):
+        self.db[FILES].create_index(
+            [("files", ASCENDING), ("name", ASCENDING), ("version", ASCENDING)],
+            unique=True,
+        )
+        self.db[FILES].create_index(
+            [("files", ASCENDING), ("versions", ASCENDING), ("name", ASCENDING)]
+        )
+        self.db[FILE_VERSIONS].create_index(
+            [("files", ASCENDING), ("name", ASCENDING)], unique=True
+        )
+
+    def batch(self, files_id):
+        return MongoFilesBatch(self.db, files_id)
 
     def retrieve_file(self, files_id, filename, version):
-        return self._retrieve(
-            "files",
-            {
-                "id": files_id,
-                "files": {"$elemMatch": {"name": filename, "version": version}},
-            },
-            {"files.$": 1},
+        return self.find_one(
+            FILES, {"files": files_id, "name": filename, "version": version}
         )
 
-    def add_file(self, files_id, file):
-        return self.push("files", files_id, {"files": file})
+    def retrieve_latest_files(self, files_id, filenames):
+        data = self.db[FILES].aggregate(
+            [
+                {"$match": {"files": files_id, "name": {"$in": filenames}}},
+                {"$sort": {"name": 1, "version": -1}},
+                {"$group": {"_id": "$name", "file": {"$first": "$$ROOT"}}},
+            ]
+        )
+        return {f["_id"]: f["file"] for f in data}
 
-    def update_file(self, files_id, filename, version, file):
-        return self._update(
-            "files",
+    def retrieve_files_versions(self, files_id, filenames):
+        return list(
+            self.db[FILES].find(
+                {"files": files_id, "name": {"$in": filenames}}, {"versions": 0}
+            )
+        )
+
+    def add_files_version(self, files_id, files, folders, version):
+        # link all the files (name, file_version) and their folders to the version,
+        # files are grouped by file version to keep the filter small
+        names_by_version = {}
+        for name, file_version in files:
+            names_by_version.setdefault(file_version, []).append(name)
+        self.db[FILES].update_many(
             {
-                "id": files_id,
-                "files": {
-                    "$elemMatch": {
-                        "name": filename,
-                        "version": version,
-                    }
-                },
+                "files": files_id,
+                "$or": [
+                    {"version": file_version, "name": {"$in": names}}
+                    for file_version, names in names_by_version.items()
+                ],
             },
-            {"$set": {"files.$": file}},
+            {"$addToSet": {"versions": version}},
+        )
+        if folders:
+            self.db["files"].update_one(
+                {"id": files_id},
+                {"$addToSet": {"folders.$[d].versions": version}},
+                array_filters=[{"d.name": {"$in": folders}}],
+            )
+
+    def increase_file_version(self, files_id, filename):
+        # the last version allocated to every file has its own document, created by
+        # the first increase, so the counters do not grow the files document
+        data = self.db[FILE_VERSIONS].find_one_and_update(
+            {"files": files_id, "name": filename},
+            {"$inc": {"version": 1}},
+            projection={"_id": 0, "version": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return data["version"]
+
+    def init_file_version(self, files_id, filename, version):
+        return self.db[FILE_VERSIONS].update_one(
+            {"files": files_id, "name": filename},
+            {"$max": {"version": version}},
+            upsert=True,
         )
 
     def add_folder_version(self, files_id, folder_name, version):
@@ -43,14 +152,40 @@ class MongoFilesRepo(MongoRepo):
     def add_folder(self, files_id, folder):
         return self.push("files", files_id, {"folders": folder})
 
-    def retrieve_dataset_files(self, files_id, version):
-        return list(
-            self.db["files"].aggregate(
-                [
-                    {"$match": {"id": files_id}},
-                    {"$unwind": "$files"},
-                    {"$match": {"files.versions": version}},
-                    {"$group": {"_id": "$_id", "files": {"$push": "$files"}}},
-                ]
-            )
+    def retrieve_dataset_files(
+        self, files_id, version, prefix=None, cursor=None, limit=None
+    ):
+        # files are listed by name, the cursor is the name of the last file returned
+        query = {"files": files_id, "versions": version}
+        if prefix:
+            query["name"] = {"$regex": "^" + re.escape(prefix)}
+        if cursor:
+            query.setdefault("name", {})["$gt"] = cursor
+        files = self.db[FILES].find(query, {"_id": 0, "versions": 0}).sort("name", 1)
+        if limit is not None:
+            files = files.limit(limit)
+        return files
+
+    def delete_dataset_files(self, files_id):
+        return self.db[FILES].delete_many({"files": files_id})
+
+    def find_uploading(self, uid, name, dataset_id):
+        return self.find_one(
+            "uploading", {"uid": uid, "name": name, "dataset": dataset_id}
         )
+
+    def retrieve_uploading(self, upload_id):
+        return self.retrieve("uploading", upload_id, "upload_id")
+
+    def persist_uploading(self, uploading, id):
+        return self.persist("uploading", uploading, id)
+
+    def add_uploading_part(self, upload_id, part):
+        return self._update(
+            "uploading",
+            {"upload_id": upload_id},
+            {"$addToSet": {"parts": part}, "$set": {"updatedAt": datetime.now()}},
+        )
+
+    def delete_uploading(self, upload_id):
+        return self.delete("uploading", upload_id, "upload_id")
@@ -1,7 +1,9 @@
 from pymongo import MongoClient
 import os
 
-client = MongoClient(os.environ['MONGO_URL'])
+from ...metrics import MongoCommandListener
+
+client = MongoClient(os.environ['MONGO_URL'], event_listeners=[MongoCommandListener()])
 
 def get_db(name=os.environ['MONGO_DB_NAME']):
 	return client[name]
\ No newline at end of file
@@ -1,5 +1,20 @@
+import time
+import os
+
 from ...repos import AuthRepo
+from ...cache import TTLCache
+
+# decoded tokens are kept until they expire (at most TOKEN_CACHE_TTL seconds)
+tokens_cache = TTLCache(
+    maxsize=int(os.environ.get("TOKEN_CACHE_SIZE", 10000)),
+    ttl=int(os.environ.get("TOKEN_CACHE_TTL", 300)),
+)
 
 def parse_token(token):
-    repo = AuthRepo()
-    return repo.parse_token(token)
\ No newline at end of file
+    data = tokens_cache.get(token)
+    if data is None:
+        repo = AuthRepo()
+        data = repo.parse_token(token)
+        exp = data.pop("exp", None)
+        tokens_cache.set(token, data, exp - time.time() if exp else None)
+    return dict(data)
@@ -0,0 +1,27 @@
+import os
+import json
+import hashlib
+from pydantic_core import to_jsonable_python
+
+from ..cache import TTLCache
+
+# serialized catalog reads (dataset listings, leaderboard, tags), invalidated on
+# writes to the datasets and bounded by CATALOG_CACHE_TTL for the rest (e.g. sizes)
+catalog_cache = TTLCache(
+    maxsize=int(os.environ.get("CATALOG_CACHE_SIZE", 1024)),
+    ttl=int(os.environ.get("CATALOG_CACHE_TTL", 30)),
+)
+
+
+def retrieve_cached(key, retrieve):
+    # returns the json body and its etag, computed once per cached response
+    cached = catalog_cache.get(key)
+    if cached is None:
+        body = json.dumps(to_jsonable_python(retrieve())).encode()
+        cached = body, '"' + hashlib.sha1(body).hexdigest() + '"'
+        catalog_cache.set(key, cached)
+    return cached
+
+
+def invalidate_catalog():
+    catalog_cache.clear()
@@ -10,10 +10,23 @@ from .create_dataset_version import create_dataset_version
 from .ingest_file import (
     ingest_file,
     ingest_existing_file,
+    ingest_existing_files,
+    ingest_files_batch,
 )  # , ingest_stac, ingest_file_url
-from .download_dataset import download_dataset_file  # , download_stac_catalog
+from .download_dataset import (
+    download_dataset_file,
+    retrieve_dataset_file_url,
+    parse_range,
+    multipart_byteranges,
+    download_dataset_archive,
+)  # , download_stac_catalog
 from .update_dataset import toggle_like_dataset, update_dataset
+from .upload_large_file import (
+    generate_upload_id,
+    ingest_dataset_chunk,
+    generate_presigned_part_url,
+    complete_multipart_upload,
+)
 
 # from .delete_dataset import delete_dataset
 # from .like_dataset import like_dataset
-# # from .upload_large_file import create_upload_id, upload_chunk, complete_upload
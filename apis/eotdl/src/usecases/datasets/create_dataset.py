@@ -6,7 +6,11 @@ from ...errors import (
 from ...repos import DatasetsDBRepo, GeoDBRepo
 
 from .retrieve_dataset import retrieve_dataset_by_name
-from ..user import check_user_can_create_dataset  # , retrieve_user_credentials
+from ..user import (
+    check_user_can_create_dataset,
+    invalidate_user,
+)  # , retrieve_user_credentials
+from ..catalog import invalidate_catalog
 
 
 def create_dataset(user, name, authors, source, license):
@@ -30,6 +34,8 @@ def create_dataset(user, name, authors, source, license):
         repo.persist_files(files.model_dump(), files.id)
         repo.persist_dataset(dataset.model_dump(), dataset.id)
         repo.increase_user_dataset_count(user.uid)
+        invalidate_user(user.uid)
+        invalidate_catalog()
         return dataset.id
 
 
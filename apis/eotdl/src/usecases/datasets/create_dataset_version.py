@@ -1,6 +1,7 @@
 from .retrieve_dataset import retrieve_owned_dataset
 from ...models import Version
 from ...repos import DatasetsDBRepo
+from ..catalog import invalidate_catalog
 
 
 def create_dataset_version(user, dataset_id):
@@ -10,4 +11,5 @@ def create_dataset_version(user, dataset_id):
     last_version = current_versions[-1].version_id if len(current_versions) > 0 else 0
     version = Version(version_id=last_version + 1)
     repo.create_dataset_version(dataset, version.model_dump())
+    invalidate_catalog()
     return version.version_id
@@ -1,5 +1,7 @@
-from ...repos import DatasetsDBRepo, OSRepo
+from ...repos import DatasetsDBRepo, FilesDBRepo, OSRepo
 from .retrieve_dataset import retrieve_dataset_by_name
+from ..user import invalidate_user
+from ..catalog import invalidate_catalog
 
 
 def delete_dataset(name):
@@ -8,5 +10,8 @@ def delete_dataset(name):
     for file in db_repo.retrieve_files(dataset.files):
         os_repo.delete(dataset.id, file["id"])
     db_repo.delete_files(dataset.files)
+    FilesDBRepo().delete_dataset_files(dataset.files)
     db_repo.decrease_user_dataset_count(dataset.uid)
+    invalidate_user(dataset.uid)
+    invalidate_catalog()
     return "Dataset deleted successfully"
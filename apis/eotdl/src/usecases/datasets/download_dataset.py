@@ -1,6 +1,15 @@
-from ...repos import OSRepo
+import re
+import uuid
+import time
+import tarfile
+import zipfile
+
+from ...repos import OSRepo, FilesDBRepo
+from ...errors import RangeNotSatisfiableError
 from .retrieve_dataset import retrieve_dataset
 
+MANIFEST = "checksums.sha1"
+
 
 def download_dataset_file(dataset_id, filename, user, version=None):
     os_repo = OSRepo()
@@ -13,6 +22,178 @@ def download_dataset_file(dataset_id, filename, user, version=None):
     return data_stream, object_info, filename
 
 
+def retrieve_dataset_file_url(dataset_id, filename, user, version=None):
+    os_repo = OSRepo()
+    retrieve_dataset(dataset_id)
+    return os_repo.get_file_url(dataset_id, f"{filename}_{version}")
+
+
+def parse_range(range_header, size):
+    # returns the (start, end) byte ranges requested, or None to send the whole file
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+    ranges = []
+    for spec in range_header[len("bytes=") :].split(","):
+        match = re.fullmatch(r"\s*(\d*)-(\d*)\s*", spec)
+        if not match or match.groups() == ("", ""):
+            return None  # invalid ranges are ignored
+        start, end = match.groups()
+        if start == "":  # suffix range, last n bytes
+            start, end = max(0, size - int(end)), size - 1
+        else:
+            start, end = int(start), min(int(end), size - 1) if end else size - 1
+            if start > end:
+                if start < size:
+                    return None
+                continue
+        if start < size:
+            ranges.append((start, end))
+    if not ranges:
+        raise RangeNotSatisfiableError()
+    return ranges
+
+
+def multipart_byteranges(
+    data_stream, dataset_id, filename, ranges, size, content_type
+):
+    # multipart/byteranges body for multiple ranges, returns its boundary, length and stream
+    boundary = uuid.uuid4().hex
+    headers = [
+        (
+            f"--{boundary}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+        ).encode()
+        for start, end in ranges
+    ]
+    closing = f"--{boundary}--\r\n".encode()
+    length = len(closing) + sum(
+        len(header) + end - start + 1 + 2
+        for header, (start, end) in zip(headers, ranges)
+    )
+
+    def stream():
+        for header, (start, end) in zip(headers, ranges):
+            yield header
+            yield from data_stream(dataset_id, filename, start, end - start + 1)
+            yield b"\r\n"
+        yield closing
+
+    return boundary, length, stream()
+
+
+def download_dataset_archive(
+    dataset_id, user, version=None, prefix=None, format="tar", compression=None
+):
+    # stream the files of a version (or a folder of it) as a single archive, built on
+    # the fly from storage so memory is bounded regardless of the dataset size
+    if format not in ["tar", "zip"]:
+        raise Exception("Archive format must be tar or zip")
+    if compression not in [None, "zstd"] or (compression and format != "tar"):
+        raise Exception("Only tar archives can be compressed, with zstd")
+    dataset = retrieve_dataset(dataset_id)
+    if dataset.quality != 0:
+        raise Exception("Only Q0 datasets can be downloaded as an archive")
+    versions = sorted(v.version_id for v in dataset.versions)
+    if version is None:
+        version = versions[-1]
+    if version not in versions:
+        raise Exception("Version not found")
+    if compression == "zstd":
+        import zstandard  # optional dependency
+    files = iterate_dataset_files(dataset.files, version, prefix)
+    stream = (
+        tar_stream(OSRepo().data_stream, dataset.id, files)
+        if format == "tar"
+        else zip_stream(OSRepo().data_stream, dataset.id, files)
+    )
+    filename = f"{dataset.name}-v{version}.{format}"
+    if compression == "zstd":
+        stream = zstd_stream(stream, zstandard.ZstdCompressor())
+        filename += ".zst"
+    return filename, stream
+
+
+def iterate_dataset_files(files_id, version, prefix=None, page_size=1000):
+    # page through the files instead of keeping a cursor open for the whole download
+    files_repo, cursor = FilesDBRepo(), None
+    while True:
+        files = list(
+            files_repo.retrieve_dataset_files(
+                files_id, version, prefix, cursor, page_size
+            )
+        )
+        yield from files
+        if len(files) < page_size:
+            return
+        cursor = files[-1]["name"]
+
+
+def tar_stream(data_stream, dataset_id, files):
+    manifest, mtime = [], time.time()
+    for f in files:
+        info = tarfile.TarInfo(f["name"])
+        info.size, info.mtime = f["size"], mtime
+        yield info.tobuf(tarfile.PAX_FORMAT)
+        for chunk in data_stream(dataset_id, f"{f['name']}_{f['version']}"):
+            yield chunk
+        yield tar_padding(f["size"])
+        manifest.append(f"{f['checksum']}  {f['name']}\n")
+    # the manifest goes last, so it can be checked with `sha1sum -c`
+    data = "".join(manifest).encode()
+    info = tarfile.TarInfo(MANIFEST)
+    info.size, info.mtime = len(data), mtime
+    yield info.tobuf(tarfile.PAX_FORMAT) + data + tar_padding(len(data))
+    yield b"\0" * tarfile.BLOCKSIZE * 2
+
+
+def tar_padding(size):
+    return b"\0" * (-size % tarfile.BLOCKSIZE)
+
+
+class ZipSink:
+    # write-only buffer for zipfile, emptied after each write to the archive
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def zip_stream(data_stream, dataset_id, files):
+    sink, manifest = ZipSink(), []
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_STORED) as archive:
+        for f in files:
+            info = zipfile.ZipInfo(f["name"], date_time)
+            with archive.open(info, "w", force_zip64=True) as dst:
+                for chunk in data_stream(dataset_id, f"{f['name']}_{f['version']}"):
+                    dst.write(chunk)
+                    yield sink.drain()
+            yield sink.drain()
+            manifest.append(f"{f['checksum']}  {f['name']}\n")
+        archive.writestr(zipfile.ZipInfo(MANIFEST, date_time), "".join(manifest))
+    yield sink.drain()
+
+
+def zstd_stream(stream, compressor):
+    compressobj = compressor.compressobj()
+    for chunk in stream:
+        data = compressobj.compress(chunk)
+        if data:
+            yield data
+    yield compressobj.flush()
+
+
 def download_stac_catalog():
     # TODO
     return
@@ -1,5 +1,3 @@
-from datetime import datetime
-
 from .retrieve_dataset import retrieve_owned_dataset
 from ...errors import DatasetVersionDoesNotExistError, ChecksumMismatch
 from ...repos import OSRepo, FilesDBRepo, DatasetsDBRepo
@@ -8,8 +6,8 @@ from ...models import File, Folder
 # TODO: al ingestar file, comprobar que es la última versión y que el file no está ya en esa versión
 
 
-async def ingest_file(file, dataset_id, version, parent, checksum, user):
-    db_repo, os_repo = FilesDBRepo(), OSRepo()
+def ingest_file(file, dataset_id, version, parent, checksum, user):
+    os_repo = OSRepo()
     dataset = retrieve_owned_dataset(dataset_id, user.uid)
     versions = [v.version_id for v in dataset.versions]
     if not version in versions:
@@ -18,76 +16,68 @@ async def ingest_file(file, dataset_id, version, parent, checksum, user):
     filename = file.filename
     if parent != ".":
         filename = parent + "/" + filename
-    file_version = os_repo.persist_file(file.file, dataset_id, filename)
+    file_version = allocate_file_version(dataset, filename)
+    _checksum, file_size = os_repo.persist_file(
+        file.file, dataset_id, filename, file_version
+    )
     filename0 = filename
     filename += "_" + str(file_version)
     # delete if checksums don't match
-    _checksum = await os_repo.calculate_checksum(dataset.id, filename)
     if checksum and checksum != _checksum:
-        os_repo.delete_file(dataset.id, file.name)
+        os_repo.delete(dataset.id, filename)
         raise ChecksumMismatch()
-    file_size = os_repo.object_info(dataset.id, filename).size
+    register_files(dataset, [(filename0, file_version, file_size, _checksum)], version)
+    return dataset.id, dataset.name, filename
+
+
+def allocate_file_version(dataset, filename):
+    # the counters of the datasets without files manifest (Q>0) are kept by dataset id
+    db_repo = FilesDBRepo()
+    files_id = dataset.files if dataset.quality == 0 else dataset.id
+    file_version = db_repo.increase_file_version(files_id, filename)
+    if file_version == 1:
+        # first version allocated for this file, start after any object stored
+        # before the counters existed
+        last_version = OSRepo().next_file_version(dataset.id, filename) - 1
+        if last_version > 0:
+            db_repo.init_file_version(files_id, filename, last_version)
+            file_version = db_repo.increase_file_version(files_id, filename)
+    return file_version
+
+
+def register_files(dataset, files, version):
+    # files is a list of (filename, file_version, size, checksum), the changes to the
+    # files manifest are applied in a single bulk write
     if dataset.quality == 0:
-        # TODO: handle existing files
-        # print([(f.name, f.version) for f in dataset.files])
-        # files = db_repo.retrieve("files", dataset.files)['files']
-        # print(files)
-        # file = [f for f in files if f['name'] == filename0 and f['version'] == file_version - 1]
-        files = db_repo.retrieve_file(dataset.files, filename0, file_version - 1)
-        if files and "files" in files and len(files["files"]) == 1:
-            # update file
-            # print(filename0, "already exists")
-            file = files["files"][0]
-            if file["checksum"] != checksum:  # the file has been modified
-                # print("new version of", filename0, filename)
+        db_repo, os_repo = FilesDBRepo(), OSRepo()
+        batch = db_repo.batch(dataset.files)
+        latest_files = db_repo.retrieve_latest_files(
+            dataset.files, [filename for filename, _, _, _ in files]
+        )
+        for filename, file_version, file_size, checksum in files:
+            file = latest_files.get(filename)
+            if file and file["checksum"] == checksum:
+                # same version of the file, keep the stored one
+                os_repo.delete(dataset.id, f"{filename}_{file_version}")
+                batch.add_file_version(filename, file["version"], version)
+            else:  # new file or the file has been modified
                 new_file = File(
-                    name=filename0,
+                    name=filename,
                     size=file_size,
                     checksum=checksum,
                     version=file_version,
                     versions=[version],
-                )
-                db_repo.add_file(dataset.files, new_file.model_dump())
-            else:
-                # print("same version of", filename0, filename)
-                os_repo.delete(dataset.id, filename)
-                new_file = File(
-                    name=filename0,
-                    size=file_size,
-                    checksum=checksum,
-                    version=file["version"],
-                    versions=file["versions"] + [version],
-                )
-                db_repo.update_file(
-                    dataset.files, filename0, file_version - 1, new_file.model_dump()
-                )
-                # for f in dataset.files:
-                #     print(f.name, f.version, f.name != filename0 or f.version != file.version)
-                # files = [f for f in files if (f['name'] != filename0 or f['version'] != file.version)] + [file.dict()]
-                # print([(f.name, f.version) for f in dataset.files])
-        else:
-            # print("new file", filename)
-            new_file = File(
-                name=filename0,
-                size=file_size,
-                checksum=checksum,
-                version=file_version,
-                versions=[version],
-            )
-            db_repo.add_file(dataset.files, new_file.model_dump())
-        folders = filename0.split("/")
-        # TODO: esto no está bien
-        if len(folders) > 1:
-            folder_name = "/".join(folders[:-1])
-            result = db_repo.add_folder_version(dataset.files, folder_name, version)
-            if result.matched_count == 0:
-                new_folder = Folder(name=folder_name, versions=[version])
-                db_repo.add_folder(dataset.files, new_folder.dict())
-    version = [v for v in dataset.versions if v.version_id == version][0]
-    version.size += file_size  # for Q0+ will add, so put to 0 before if necessary
-    dataset.updatedAt = datetime.now()
-    dataset_db_repo = DatasetsDBRepo()
-    dataset_db_repo.update_dataset(dataset.id, dataset.dict())
+                ).model_dump()
+                batch.add_file(new_file)
+                latest_files[filename] = new_file
+            folders = filename.split("/")
+            if len(folders) > 1:
+                folder = Folder(name="/".join(folders[:-1]), versions=[version])
+                batch.add_folder_version(folder.model_dump(), version)
+        batch.commit()
+    # for Q0+ will add, so put to 0 before if necessary
+    size = sum(file_size for _, _, file_size, _ in files)
+    DatasetsDBRepo().increase_version_size(dataset.id, version, size)
     # TODO: report usage
     # usage = Usage.FileIngested(
     #     uid=uid,
@@ -98,57 +88,85 @@ async def ingest_file(file, dataset_id, version, parent, checksum, user):
     #     },
     # )
     # db_repo.persist("usage", usage.dict())
-    return dataset.id, dataset.name, filename
 
 
-async def ingest_existing_file(
+def ingest_files_batch(files, dataset_id, version, parents, checksums, user):
+    os_repo = OSRepo()
+    dataset = retrieve_owned_dataset(dataset_id, user.uid)
+    versions = [v.version_id for v in dataset.versions]
+    if not version in versions:
+        raise DatasetVersionDoesNotExistError()
+    if not len(files) == len(parents) == len(checksums):
+        raise Exception("A parent and a checksum must be provided for each file")
+    ingested = []
+    try:
+        for file, parent, checksum in zip(files, parents, checksums):
+            filename = file.filename
+            if parent != ".":
+                filename = parent + "/" + filename
+            file_version = allocate_file_version(dataset, filename)
+            _checksum, file_size = os_repo.persist_file(
+                file.file, dataset_id, filename, file_version
+            )
+            if checksum != _checksum:
+                os_repo.delete(dataset.id, f"{filename}_{file_version}")
+                raise ChecksumMismatch()
+            ingested.append((filename, file_version, file_size, _checksum))
+    except Exception:
+        # a batch is ingested as a whole, the files stored before a failure are deleted
+        # so every file of the batch can be reported as failed and sent again
+        for filename, file_version, _, _ in ingested:
+            os_repo.delete(dataset.id, f"{filename}_{file_version}")
+        raise
+    register_files(dataset, ingested, version)
+    return dataset.id, dataset.name, [filename for filename, _, _, _ in ingested]
+
+
+def ingest_existing_file(
     filename, dataset_id, file_version, version, checksum, user
 ):
-    db_repo, os_repo = FilesDBRepo(), OSRepo()
+    dataset_id, dataset_name, _ = ingest_existing_files(
+        [(filename, file_version, checksum)], dataset_id, version, user
+    )
+    return dataset_id, dataset_name, filename
+
+
+def ingest_existing_files(files, dataset_id, version, user):
+    # files is a list of (filename, file_version, checksum) already in the dataset, the
+    # stored checksums were computed on ingestion so storage is not read again
+    db_repo = FilesDBRepo()
     dataset = retrieve_owned_dataset(dataset_id, user.uid)
     versions = [v.version_id for v in dataset.versions]
     if not version in versions:
         raise DatasetVersionDoesNotExistError()
-    # retrieve file
-    current_file = db_repo.retrieve_file(dataset.files, filename, file_version)[
-        "files"
-    ][0]
-    # check file is in storage
-    filename0 = f"{filename}_{file_version}"
-    if not os_repo.exists(dataset.id, filename0):
-        raise Exception("File does not exist")
-    # check checksums match
-    _checksum = await os_repo.calculate_checksum(dataset.id, filename0)
-    if _checksum != checksum:
-        raise ChecksumMismatch()
-    file_size = os_repo.object_info(dataset.id, filename0).size
-    if dataset.quality == 0:
-        new_file = File(
-            name=filename,
-            size=file_size,
-            checksum=checksum,
-            version=current_file["version"],
-            versions=current_file["versions"] + [version],
-        )
-        db_repo.update_file(
-            dataset.files, filename, file_version, new_file.model_dump()
-        )
-    version = [v for v in dataset.versions if v.version_id == version][0]
-    version.size += file_size  # for Q0+ will add, so put to 0 before if necessary
-    dataset.updatedAt = datetime.now()
-    dataset_db_repo = DatasetsDBRepo()
-    dataset_db_repo.update_dataset(dataset.id, dataset.dict())
-    # TODO: report usage
-    # usage = Usage.FileIngested(
-    #     uid=uid,
-    #     payload={
-    #         "dataset": dataset.id,
-    #         "file": filename,
-    #         "size": file_size,
-    #     },
-    # )
-    # db_repo.persist("usage", usage.dict())
-    return dataset.id, dataset.name, filename
+    if dataset.quality != 0:
+        raise Exception("Only Q0 datasets can reuse existing files")
+    filenames = list(set(filename for filename, _, _ in files))
+    current_files = {
+        (f["name"], f["version"]): f
+        for f in db_repo.retrieve_files_versions(dataset.files, filenames)
+    }
+    errors, size, folders = [], 0, set()
+    for filename, file_version, checksum in files:
+        current_file = current_files.get((filename, file_version))
+        if current_file is None:
+            errors.append(f"{filename} (version {file_version}) does not exist")
+        elif current_file["checksum"] != checksum:
+            errors.append(f"{filename}: {ChecksumMismatch.message}")
+        else:
+            size += current_file["size"]
+            if "/" in filename:
+                folders.add(filename.rsplit("/", 1)[0])
+    if errors:
+        raise Exception("\n".join(errors))
+    db_repo.add_files_version(
+        dataset.files,
+        [(filename, file_version) for filename, file_version, _ in files],
+        list(folders),
+        version,
+    )
+    DatasetsDBRepo().increase_version_size(dataset.id, version, size)
+    return dataset.id, dataset.name, [filename for filename, _, _ in files]
 
 
 def ingest_file_url():
@@ -34,7 +34,9 @@ def retrieve_owned_dataset(dataset_id, uid):
     return dataset
 
 
-def retrieve_dataset_files(dataset_id, version=None):
+def retrieve_dataset_files(
+    dataset_id, version=None, prefix=None, cursor=None, limit=None
+):
     files_repo = FilesDBRepo()
     dataset = retrieve_dataset(dataset_id)
     versions = sorted(dataset.versions, key=lambda x: x.version_id)
@@ -42,15 +44,22 @@ def retrieve_dataset_files(dataset_id, version=None):
         version = versions[-1].version_id
     if version not in [v.version_id for v in versions]:
         raise Exception("Version not found")
-    data = files_repo.retrieve_dataset_files(dataset.files, version)
-    if len(data) != 1:
-        raise Exception("No files found")
-    files = (
-        [
-            {"filename": f["name"], "version": f["version"], "checksum": f["checksum"]}
-            for f in data[0]["files"]
-        ]
-        if len(data[0]["files"]) > 0
-        else []
+    data = files_repo.retrieve_dataset_files(
+        dataset.files, version, prefix, cursor, limit
     )
-    return files
+    files = [
+        {
+            "filename": f["name"],
+            "version": f["version"],
+            "checksum": f["checksum"],
+            "size": f["size"],
+        }
+        for f in data
+    ]
+    if limit is None:
+        if len(files) == 0:
+            raise Exception("No files found")
+        return files
+    # paginated, the name of the last file is the cursor to the next page
+    next = files[-1]["filename"] if len(files) == limit else None
+    return {"files": files, "next": next}
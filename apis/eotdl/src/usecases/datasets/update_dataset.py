@@ -6,7 +6,8 @@ from .retrieve_dataset import (
     retrieve_owned_dataset,
     retrieve_dataset_by_name,
 )
-from ..user import retrieve_user
+from ..user import retrieve_user, invalidate_user
+from ..catalog import invalidate_catalog
 from ...errors import (
     DatasetAlreadyExistsError,
     DatasetDoesNotExistError,
@@ -23,6 +24,8 @@ def toggle_like_dataset(dataset_id, user):
         repo.unlike_dataset(dataset_id, user.uid)
     else:
         repo.like_dataset(dataset_id, user.uid)
+    invalidate_user(user.uid)
+    invalidate_catalog()
     return "done"
 
 
@@ -60,4 +63,5 @@ def update_dataset(dataset_id, user, name, authors, source, license, tags, descr
     updated_dataset = Dataset(**data) if data["quality"] == 0 else STACDataset(**data)
     # update dataset in db
     repo.update_dataset(dataset_id, updated_dataset.model_dump())
+    invalidate_catalog()
     return updated_dataset
@@ -1,139 +1,115 @@
-def generate_upload_id():
-    # TODO
-    return
-    # # check if upload already exists
-    # data = self.db_repo.find_one(
-    #     "uploading",
-    #     {"uid": inputs.uid, "name": inputs.name, "dataset": inputs.dataset_id},
-    # )
-    # if data:
-    #     uploading = UploadingFile(**data)
-    #     # abort if trying to resume existing upload with a different file
-    #     if uploading.checksum != inputs.checksum:
-    #         self.db_repo.delete("uploading", uploading.id)
-    #     else:  # resume upload
-    #         return self.Outputs(
-    #             upload_id=uploading.upload_id,
-    #             parts=uploading.parts,
-    #         )
-    # # check if dataset already exists
-    # data = self.db_repo.retrieve("datasets", inputs.dataset_id)
-    # if not data:
-    #     raise DatasetDoesNotExistError()
-    # dataset = Dataset(**data)
-    # data = self.db_repo.retrieve("users", inputs.uid, "uid")
-    # user = User(**data)
-    # data = self.db_repo.find_one_by_name("tiers", user.tier)
-    # limits = Limits(**data["limits"])
-    # if dataset.uid != inputs.uid:
-    #     raise DatasetDoesNotExistError()
-    # # check if user can ingest file
-    # if (
-    #     len(dataset.files) + 1 > limits.datasets.files
-    #     and inputs.name not in dataset.files
-    # ):
-    #     raise TierLimitError(
-    #         "You cannot have more than {} files".format(limits.datasets.files)
-    #     )
-    # # create new upload
-    # id = self.db_repo.generate_id()
-    # storage = self.os_repo.get_object(dataset.id, inputs.name)
-    # upload_id = self.s3_repo.multipart_upload_id(
-    #     storage
-    # )  # does this work if the file already exists ?
-    # uploading = UploadingFile(
-    #     uid=inputs.uid,
-    #     id=id,
-    #     upload_id=upload_id,
-    #     dataset=inputs.dataset_id,
-    #     name=inputs.name,
-    #     checksum=inputs.checksum,
-    # )
-    # self.db_repo.persist("uploading", uploading.dict(), uploading.id)
-    # return self.Outputs(upload_id=upload_id)
+from datetime import datetime
 
+from .retrieve_dataset import retrieve_owned_dataset
+from .ingest_file import allocate_file_version, register_files
+from ...errors import (
+    DatasetVersionDoesNotExistError,
+    ChunkUploadChecksumMismatch,
+    ChecksumMismatch,
+    UploadIdDoesNotExist,
+)
+from ...repos import OSRepo, S3Repo, FilesDBRepo
+from ...models import UploadingFile
 
-def ingest_dataset_chunk():
-    # TODO
-    return
-    # data = self.db_repo.retrieve("uploading", inputs.upload_id, "upload_id")
-    # if not data or data["uid"] != inputs.uid:
-    #     raise UploadIdDoesNotExist()
-    # uploading = UploadingFile(**data)
-    # storage = self.os_repo.get_object(uploading.dataset, uploading.name)
-    # checksum = self.s3_repo.store_chunk(
-    #     inputs.chunk, storage, inputs.part_number, inputs.upload_id
-    # )
-    # if inputs.checksum != checksum:
-    #     raise ChunkUploadChecksumMismatch()
-    # uploading.parts.append(inputs.part_number)
-    # uploading.updatedAt = datetime.now()
-    # self.db_repo.update("uploading", uploading.id, uploading.dict())
-    # return self.Outputs(message="Chunk uploaded")
 
-
-def complete_multipart_upload():
-    # todo
-    return
+def generate_upload_id(user, checksum, name, dataset_id):
+    db_repo, os_repo, s3_repo = FilesDBRepo(), OSRepo(), S3Repo()
+    dataset = retrieve_owned_dataset(dataset_id, user.uid)
     # check if upload already exists
-    # data = self.db_repo.find_one(
-    #     "uploading",
-    #     {"uid": inputs.uid, "upload_id": inputs.upload_id},
-    # )
-    # if not data:
-    #     raise UploadIdDoesNotExist()
-    # uploading = UploadingFile(**data)
-    # # check if dataset exists
-    # data = self.db_repo.retrieve("datasets", uploading.dataset)
-    # if not data:
-    #     raise DatasetDoesNotExistError()
-    # dataset = Dataset(**data)
-    # data = self.db_repo.retrieve("users", inputs.uid, "uid")
-    # user = User(**data)
-    # data = self.db_repo.find_one_by_name("tiers", user.tier)
-    # limits = Limits(**data["limits"])
-    # # check if user owns dataset
-    # if inputs.uid != dataset.uid:
-    #     raise DatasetDoesNotExistError()
-    # # check files limit
-    # if (
-    #     len(dataset.files) + 1 > limits.datasets.files
-    #     and uploading.name not in dataset.files
-    # ):
-    #     raise TierLimitError(
-    #         "You cannot have more than {} files".format(limits.datasets.files)
-    #     )
-    # storage = self.os_repo.get_object(dataset.id, uploading.name)
-    # self.s3_repo.complete_multipart_upload(storage, inputs.upload_id)
-    # object_info = self.os_repo.object_info(dataset.id, uploading.name)
-    # # # calculate checksum (too expensive for big files)
-    # # checksum = await self.os_repo.calculate_checksum(
-    # #     dataset.id, uploading.name
-    # # )
-    # # if checksum != uploading.checksum:
-    # #     self.os_repo.delete_file(dataset.id, uploading.name)
-    # #     if len(dataset.files) == 0:
-    # #         self.db_repo.delete("datasets", dataset.id)
-    # #     raise ChecksumMismatch()
-    # if uploading.name in [f.name for f in dataset.files]:
-    #     dataset.files = [f for f in dataset.files if f.name != uploading.name]
-    # dataset.files.append(
-    #     File(
-    #         name=uploading.name, size=object_info.size, checksum=uploading.checksum
-    #     )
-    # )
-    # dataset.updatedAt = datetime.now()
-    # dataset.size = dataset.size + object_info.size
-    # self.db_repo.update("datasets", dataset.id, dataset.dict())
-    # # report usage
-    # usage = Usage.FileIngested(
-    #     uid=inputs.uid,
-    #     payload={
-    #         "dataset": dataset.id,
-    #         "file": uploading.name,
-    #         "size": object_info.size,
-    #     },
-    # )
-    # self.db_repo.persist("usage", usage.dict())
-    # self.db_repo.delete("uploading", uploading.id)
-    # return self.Outputs(dataset=dataset)
+    data = db_repo.find_uploading(user.uid, name, dataset.id)
+    if data:
+        uploading = UploadingFile(**data)
+        storage = os_repo.get_object(
+            dataset.id, f"{uploading.name}_{uploading.file_version}"
+        )
+        if uploading.checksum == checksum:
+            # resume upload, storage is the source of truth for the uploaded parts
+            try:
+                parts = s3_repo.list_parts(storage, uploading.upload_id)
+                return uploading.upload_id, [part["PartNumber"] for part in parts]
+            except Exception:  # upload expired or aborted
+                pass
+        else:  # trying to resume existing upload with a different file
+            try:
+                s3_repo.abort_multipart_upload(storage, uploading.upload_id)
+            except Exception:
+                pass
+        db_repo.delete_uploading(uploading.upload_id)
+    # create new upload
+    file_version = allocate_file_version(dataset, name)
+    storage = os_repo.get_object(dataset.id, f"{name}_{file_version}")
+    upload_id = s3_repo.multipart_upload_id(storage)
+    id = db_repo.generate_id()
+    uploading = UploadingFile(
+        uid=user.uid,
+        id=id,
+        upload_id=upload_id,
+        dataset=dataset.id,
+        name=name,
+        checksum=checksum,
+        file_version=file_version,
+        createdAt=datetime.now(),
+        updatedAt=datetime.now(),
+    )
+    db_repo.persist_uploading(uploading.model_dump(), uploading.id)
+    return upload_id, []
+
+
+def retrieve_uploading(upload_id, user):
+    data = FilesDBRepo().retrieve_uploading(upload_id)
+    if not data or data["uid"] != user.uid:
+        raise UploadIdDoesNotExist()
+    uploading = UploadingFile(**data)
+    storage = OSRepo().get_object(
+        uploading.dataset, f"{uploading.name}_{uploading.file_version}"
+    )
+    return uploading, storage
+
+
+def ingest_dataset_chunk(chunk, part_number, upload_id, checksum, user):
+    uploading, storage = retrieve_uploading(upload_id, user)
+    _checksum = S3Repo().store_chunk(chunk, storage, part_number, upload_id)
+    if checksum != _checksum:
+        raise ChunkUploadChecksumMismatch()
+    FilesDBRepo().add_uploading_part(upload_id, part_number)
+    return "Chunk uploaded"
+
+
+def generate_presigned_part_url(part_number, upload_id, user):
+    uploading, storage = retrieve_uploading(upload_id, user)
+    return S3Repo().presigned_part_url(storage, part_number, upload_id)
+
+
+def complete_multipart_upload(user, upload_id, version, checksums=None, size=None):
+    uploading, storage = retrieve_uploading(upload_id, user)
+    dataset = retrieve_owned_dataset(uploading.dataset, user.uid)
+    versions = [v.version_id for v in dataset.versions]
+    if not version in versions:
+        raise DatasetVersionDoesNotExistError()
+    s3_repo = S3Repo()
+    # parts uploaded with presigned urls never go through the api, so the parts in
+    # storage are checked against the md5 of every part and the size of the file sent
+    # by the client, using their etags instead of reading the object back
+    parts = sorted(
+        s3_repo.list_parts(storage, upload_id), key=lambda part: part["PartNumber"]
+    )
+    file_size = sum(part["Size"] for part in parts)
+    if (
+        [part["PartNumber"] for part in parts] != list(range(1, len(parts) + 1))
+        or (
+            checksums is not None
+            and [part["ETag"].strip('"') for part in parts] != checksums
+        )
+        or (size is not None and file_size != size)
+    ):
+        s3_repo.abort_multipart_upload(storage, upload_id)
+        FilesDBRepo().delete_uploading(upload_id)
+        raise ChecksumMismatch()
+    s3_repo.complete_multipart_upload(storage, upload_id, parts)
+    register_files(
+        dataset,
+        [(uploading.name, uploading.file_version, file_size, uploading.checksum)],
+        version,
+    )
+    FilesDBRepo().delete_uploading(upload_id)
+    return dataset.id, dataset.name, uploading.name
@@ -1,4 +1,4 @@
-from .persist_user import persist_user
+from .persist_user import persist_user, invalidate_user
 from .update_user import update_user
 from .retrieve_user import retrieve_user
 from .accept_user_terms_and_conditions import accept_user_terms_and_conditions
@@ -4,6 +4,7 @@ from ...models.user import TermsAndConditions
 from ...errors import UserDoesNotExistError
 from ...repos import UserDBRepo, EOXRepo
 from .retrieve_user import retrieve_user
+from .persist_user import invalidate_user
 
 def accept_user_terms_and_conditions(user):
     repo, eox_repo = UserDBRepo(), EOXRepo()
@@ -23,4 +24,5 @@ def accept_user_terms_and_conditions(user):
     )
     user = User(**data)
     repo.update_user(data["_id"], user.dict())
+    invalidate_user(user.uid)
     return user
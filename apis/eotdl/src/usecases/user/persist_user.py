@@ -1,11 +1,22 @@
 from datetime import datetime
+import os
 
 from ...models.user import User
 from ...repos import UserDBRepo
+from ...cache import TTLCache
 from .retrieve_user import retrieve_user
 from ...errors import UserDoesNotExistError
 
+# users resolved from a token, saves a read and a write on every authenticated request
+users_cache = TTLCache(
+    maxsize=int(os.environ.get("USER_CACHE_SIZE", 10000)),
+    ttl=int(os.environ.get("USER_CACHE_TTL", 60)),
+)
+
 def persist_user(data: dict) -> User:
+    cached_user = users_cache.get(data["uid"])
+    if cached_user is not None and cached_user.email == data["email"]:
+        return cached_user.model_copy(deep=True)
     repo = UserDBRepo()
     try:
         user = retrieve_user(data["uid"]).model_dump()
@@ -17,9 +28,15 @@ def persist_user(data: dict) -> User:
         )
         updated_user = User(**user)
         repo.update_user(user["id"], updated_user.model_dump())
+        users_cache.set(updated_user.uid, updated_user.model_copy(deep=True))
         return updated_user
     except UserDoesNotExistError:
         data["id"] = repo.generate_id()
         new_user = User(**data)
         repo.persist_user(new_user.model_dump(), new_user.id)
+        users_cache.set(new_user.uid, new_user.model_copy(deep=True))
         return new_user
+
+
+def invalidate_user(uid: str):
+    users_cache.delete(uid)
@@ -5,6 +5,7 @@ from ...repos import UserDBRepo
 from ...errors import UserAlreadyExistsError, NameCharsValidationError, NameLengthValidationError
 from ...models import User 
 from .retrieve_user import retrieve_user
+from .persist_user import invalidate_user
 
 # we do it here instead of in model because first time a user is created, the name comes from auth0 and is usually an email
 def validate_name(name: str, regex: str = "^[^a-zA-Z]{1}|[^a-zA-Z0-9-]", max_length: int = 15, min_length: int = 3) -> str:
@@ -31,5 +32,6 @@ def update_user(user: User, data: dict) -> User:
     )
     user = User(**user_data)
     repo.update_user(user_data['id'], user.model_dump())
+    invalidate_user(user.uid)
     return user
 
@@ -1,5 +1,6 @@
 import pytest
 import os
+import hashlib
 
 from ...src.repos.minio.client import get_client
 from ...src.repos.minio import MinioRepo
@@ -25,9 +26,12 @@ def test_get_object():
 def test_persist_file(s3):
     repo = MinioRepo()
     test_path = os.path.join(os.path.dirname(__file__), "../test.zip")
-    file = open(test_path, "rb")
-    repo.persist_file(file, "dataset", "file")
-    assert s3.stat_object(bucket, "dataset/file").size == os.path.getsize(test_path)
+    with open(test_path, "rb") as file:
+        checksum, size = repo.persist_file(file, "dataset", "file", 2)
+    with open(test_path, "rb") as file:
+        assert checksum == hashlib.sha1(file.read()).hexdigest()
+    assert size == os.path.getsize(test_path)
+    assert s3.stat_object(bucket, "dataset/file_2").size == size
 
 
 def test_delete(s3):
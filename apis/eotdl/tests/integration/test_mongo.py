@@ -2,7 +2,8 @@ import pytest
 from bson.objectid import ObjectId
 
 from ...src.repos.mongo.client import get_db
-from ...src.repos.mongo import MongoRepo
+from ...src.repos.mongo import MongoRepo, MongoFilesRepo
+from ...src.repos.mongo.MongoFilesRepo import FILE_VERSIONS
 
 
 @pytest.fixture
@@ -49,3 +50,16 @@ def test_retrieve(db):
     assert _data == data[1]
     _data = repo.retrieve("col", data[0]["name"], "name")
     assert _data == data[0]
+
+
+def test_file_versions():
+    repo = MongoFilesRepo()
+    files_id = str(ObjectId())
+    assert repo.increase_file_version(files_id, "a/file.tif") == 1
+    assert repo.increase_file_version(files_id, "a/file.tif") == 2
+    assert repo.increase_file_version(files_id, "b/file.tif") == 1
+    repo.init_file_version(files_id, "a/file.tif", 1)  # never decreases
+    repo.init_file_version(files_id, "c/file.tif", 5)
+    assert repo.increase_file_version(files_id, "a/file.tif") == 3
+    assert repo.increase_file_version(files_id, "c/file.tif") == 6
+    repo.db[FILE_VERSIONS].delete_many({"files": files_id})
@@ -1,13 +1,35 @@
+import time
 import pytest
 from unittest.mock import patch
 
 from ....src.usecases.auth import parse_token
+from ....src.usecases.auth.parse_token import tokens_cache
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    tokens_cache.clear()
 
 @patch('api.src.usecases.auth.parse_token.AuthRepo')
 def test_parse_token(mocked_repo):
-    mock_return_value = "parsed_token"
+    mock_return_value = {"uid": "123", "exp": time.time() + 3600}
     mocked_repo_instance = mocked_repo.return_value
     mocked_repo_instance.parse_token.return_value = mock_return_value
     result = parse_token('token')
-    assert result == mock_return_value
+    assert result == {"uid": "123"}
+    mocked_repo_instance.parse_token.assert_called_once()
+
+@patch('api.src.usecases.auth.parse_token.AuthRepo')
+def test_parse_token_is_cached(mocked_repo):
+    mocked_repo_instance = mocked_repo.return_value
+    mocked_repo_instance.parse_token.side_effect = lambda token: {"uid": token, "exp": time.time() + 3600}
+    assert parse_token('token') == parse_token('token') == {"uid": "token"}
     mocked_repo_instance.parse_token.assert_called_once()
+    assert tokens_cache.stats()["hits"] == 1
+
+@patch('api.src.usecases.auth.parse_token.AuthRepo')
+def test_expired_token_is_not_cached(mocked_repo):
+    mocked_repo_instance = mocked_repo.return_value
+    mocked_repo_instance.parse_token.side_effect = lambda token: {"uid": token, "exp": time.time() - 1}
+    parse_token('token')
+    parse_token('token')
+    assert mocked_repo_instance.parse_token.call_count == 2
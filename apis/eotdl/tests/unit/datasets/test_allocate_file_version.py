@@ -0,0 +1,51 @@
+import pytest
+from unittest import mock
+
+from ....src.usecases.datasets.ingest_file import allocate_file_version
+
+
+@pytest.fixture
+def dataset():
+    return mock.Mock(id="dataset-id", files="files-id", quality=0)
+
+
+@mock.patch("api.src.usecases.datasets.ingest_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.ingest_file.FilesDBRepo")
+def test_allocate_file_version(mock_db, mock_os, dataset):
+    mock_db.return_value.increase_file_version.return_value = 3
+    assert allocate_file_version(dataset, "file.tif") == 3
+    mock_db.return_value.increase_file_version.assert_called_once_with(
+        "files-id", "file.tif"
+    )
+    mock_os.return_value.next_file_version.assert_not_called()
+
+
+@mock.patch("api.src.usecases.datasets.ingest_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.ingest_file.FilesDBRepo")
+def test_allocate_first_file_version(mock_db, mock_os, dataset):
+    mock_db.return_value.increase_file_version.return_value = 1
+    mock_os.return_value.next_file_version.return_value = 1
+    assert allocate_file_version(dataset, "file.tif") == 1
+    mock_db.return_value.init_file_version.assert_not_called()
+
+
+@mock.patch("api.src.usecases.datasets.ingest_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.ingest_file.FilesDBRepo")
+def test_allocate_file_version_after_stored_objects(mock_db, mock_os, dataset):
+    mock_db.return_value.increase_file_version.side_effect = [1, 4]
+    mock_os.return_value.next_file_version.return_value = 4
+    assert allocate_file_version(dataset, "file.tif") == 4
+    mock_db.return_value.init_file_version.assert_called_once_with(
+        "files-id", "file.tif", 3
+    )
+
+
+@mock.patch("api.src.usecases.datasets.ingest_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.ingest_file.FilesDBRepo")
+def test_allocate_file_version_of_stac_dataset(mock_db, mock_os, dataset):
+    dataset.quality = 1
+    mock_db.return_value.increase_file_version.return_value = 2
+    assert allocate_file_version(dataset, "file.tif") == 2
+    mock_db.return_value.increase_file_version.assert_called_once_with(
+        "dataset-id", "file.tif"
+    )
@@ -1,46 +1,26 @@
 import pytest
 from unittest import mock
-from unittest.mock import AsyncMock
-from pydantic import BaseModel
 
-from ....src.usecases.datasets.CompleteMultipartUpload import CompleteMultipartUpload
+from ....src.usecases.datasets.upload_large_file import complete_multipart_upload
 from ....src.errors import (
-    DatasetAlreadyExistsError,
-    TierLimitError,
     UploadIdDoesNotExist,
+    DatasetVersionDoesNotExistError,
     ChecksumMismatch,
 )
+from ....src.models import User
 
 
 @pytest.fixture
 def user():
-    return {
-        "uid": "123",
-        "email": "test",
-        "name": "test",
-        "picture": "test",
-        "tier": "free",
-    }
-
-
-@pytest.fixture
-def tier():
-    return {
-        "name": "dev",
-        "limits": {
-            "datasets": {"upload": 10, "download": 100, "count": 10, "files": 10}
-        },
-    }
+    return User(id="123", uid="123", email="test", name="test", picture="test")
 
 
 @pytest.fixture
 def dataset():
-    return {
-        "name": "test-dataset-name",
-        "description": "test",
-        "uid": "123",
-        "id": "123",
-    }
+    dataset = mock.Mock(id="dataset-id", uid="123")
+    dataset.name = "test-dataset-name"
+    dataset.versions = [mock.Mock(version_id=1)]
+    return dataset
 
 
 @pytest.fixture
@@ -49,146 +29,103 @@ def upload():
         "id": "123",
         "uid": "123",
         "name": "test-file-name",
-        "dataset": "test-dataset-name",
+        "dataset": "dataset-id",
         "upload_id": "456",
         "checksum": "123",
+        "file_version": 2,
     }
 
 
-@pytest.mark.asyncio
-async def test_complete_upload_fails_if_upload_not_found():
-    db_repo, s3_repo, os_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.find_one.return_value = None
-    complete = CompleteMultipartUpload(db_repo, os_repo, s3_repo)
-    inputs = CompleteMultipartUpload.Inputs(uid="123", upload_id="789")
+@mock.patch("api.src.usecases.datasets.upload_large_file.FilesDBRepo")
+def test_complete_upload_fails_if_upload_not_found(mock_db, user):
+    mock_db.return_value.retrieve_uploading.return_value = None
     with pytest.raises(UploadIdDoesNotExist):
-        await complete(inputs)
-    db_repo.find_one.assert_called_once_with(
-        "uploading", {"uid": "123", "upload_id": "789"}
-    )
-    db_repo.db_repo.find_one_by_name.assert_not_called()
-
-
-@pytest.mark.asyncio
-async def test_complete_upload_fails_if_tier_limits_surpassed(upload, user, tier):
-    db_repo, s3_repo, os_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.find_one.return_value = upload
-    db_repo.retrieve.return_value = user
-    db_repo.find_one_by_name.side_effect = [tier, None]
-    db_repo.find_in_time_range.return_value = [1] * 100
-    complete = CompleteMultipartUpload(db_repo, os_repo, s3_repo)
-    inputs = CompleteMultipartUpload.Inputs(uid="123", upload_id="789")
-    with pytest.raises(TierLimitError):
-        await complete(inputs)
-    assert db_repo.find_one_by_name.call_count == 2
-    os_repo.get_object.assert_not_called()
-
-
-@pytest.mark.asyncio
-async def test_complete_upload_fails_if_dataset_exists(user, tier, dataset, upload):
-    db_repo, s3_repo, os_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.find_one.return_value = upload
-    db_repo.retrieve.return_value = user
-    dataset["uid"] = "other uid"
-    db_repo.find_one_by_name.side_effect = [tier, dataset]
-    db_repo.find_in_time_range.return_value = []
-    complete = CompleteMultipartUpload(db_repo, os_repo, s3_repo)
-    inputs = CompleteMultipartUpload.Inputs(uid="123", upload_id="789")
-    with pytest.raises(DatasetAlreadyExistsError):
-        await complete(inputs)
-    os_repo.get_object.assert_not_called()
-
-
-@pytest.mark.asyncio
-async def test_complete_upload_fails_if_file_limit_exceeded(
-    user, tier, dataset, upload
+        complete_multipart_upload(user, "456", 1)
+
+
+@mock.patch("api.src.usecases.datasets.upload_large_file.S3Repo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.FilesDBRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.retrieve_owned_dataset")
+def test_complete_upload_fails_if_version_does_not_exist(
+    mock_dataset, mock_db, mock_os, mock_s3, user, dataset, upload
+):
+    mock_db.return_value.retrieve_uploading.return_value = upload
+    mock_dataset.return_value = dataset
+    with pytest.raises(DatasetVersionDoesNotExistError):
+        complete_multipart_upload(user, "456", 2)
+    mock_s3.return_value.complete_multipart_upload.assert_not_called()
+
+
+@pytest.fixture
+def parts():
+    return [
+        {"PartNumber": 2, "ETag": '"md5-2"', "Size": 40},
+        {"PartNumber": 1, "ETag": '"md5-1"', "Size": 60},
+    ]
+
+
+@mock.patch("api.src.usecases.datasets.upload_large_file.register_files")
+@mock.patch("api.src.usecases.datasets.upload_large_file.S3Repo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.FilesDBRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.retrieve_owned_dataset")
+def test_complete_upload(
+    mock_dataset, mock_db, mock_os, mock_s3, mock_register, user, dataset, upload, parts
 ):
-    db_repo, s3_repo, os_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.find_one.return_value = upload
-    db_repo.retrieve.return_value = user
-    tier["limits"]["datasets"]["files"] = 0
-    db_repo.find_one_by_name.side_effect = [tier, dataset]
-    db_repo.find_in_time_range.return_value = []
-    complete = CompleteMultipartUpload(db_repo, os_repo, s3_repo)
-    inputs = CompleteMultipartUpload.Inputs(
-        name="test", description="test", uid="123", id="456", upload_id="789"
+    mock_db.return_value.retrieve_uploading.return_value = upload
+    mock_dataset.return_value = dataset
+    mock_os.return_value.get_object.return_value = "storage"
+    mock_s3.return_value.list_parts.return_value = parts
+    outputs = complete_multipart_upload(user, "456", 1, ["md5-1", "md5-2"], 100)
+    assert outputs == ("dataset-id", "test-dataset-name", "test-file-name")
+    mock_s3.return_value.complete_multipart_upload.assert_called_once_with(
+        "storage", "456", [parts[1], parts[0]]
     )
-    with pytest.raises(TierLimitError):
-        await complete(inputs)
-    os_repo.get_object.assert_not_called()
-
-
-@pytest.mark.asyncio
-async def test_complete_upload_fails_if_checksum_mismatch(user, tier, dataset, upload):
-    db_repo, s3_repo, os_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.find_one.return_value = upload
-    db_repo.retrieve.return_value = user
-    db_repo.find_one_by_name.side_effect = [tier, dataset]
-    db_repo.find_in_time_range.return_value = []
-    os_repo.get_object.return_value = "storage"
-    os_repo.calculate_checksum = AsyncMock(return_value="invalid checksum")
-    complete = CompleteMultipartUpload(db_repo, os_repo, s3_repo)
-    inputs = CompleteMultipartUpload.Inputs(uid="123", upload_id=upload["id"])
-    with pytest.raises(ChecksumMismatch):
-        await complete(inputs)
-    os_repo.get_object.assert_called_once_with(dataset["id"], upload["name"])
-    s3_repo.complete_multipart_upload.assert_called_once_with("storage", upload["id"])
-    os_repo.object_info.assert_called_once_with(dataset["id"], upload["name"])
-    os_repo.delete_file.assert_called_once_with(dataset["id"], upload["name"])
-    db_repo.delete.assert_called_once_with("datasets", dataset["id"])
-    db_repo.presist.assert_not_called()
-
-
-class ObjectInfo(BaseModel):
-    size: int = 100
-
-
-@pytest.mark.asyncio
-async def test_complete_upload_new_dataset(user, tier, dataset, upload):
-    db_repo, s3_repo, os_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.find_one.return_value = upload
-    db_repo.retrieve.return_value = user
-    db_repo.find_one_by_name.side_effect = [tier, None]
-    db_repo.find_in_time_range.return_value = []
-    os_repo.get_object.return_value = "storage"
-    os_repo.object_info.return_value = ObjectInfo()
-    os_repo.calculate_checksum = AsyncMock(return_value="123")
-    complete = CompleteMultipartUpload(db_repo, os_repo, s3_repo)
-    inputs = CompleteMultipartUpload.Inputs(uid="123", upload_id=upload["id"])
-    outputs = await complete(inputs)
-    assert outputs.dataset.id == upload["id"]
-    assert outputs.dataset.name == upload["dataset"]
-    assert db_repo.persist.call_count == 2
-    # assert db_repo.persist.call_args_list[0] == (
-    #     "datasets",
-    #     outputs.dataset.dict(),
-    #     upload["id"],
-    # )
-    db_repo.increase_counter.assert_called_once_with(
-        "users", "uid", user["uid"], "dataset_count"
+    mock_os.return_value.calculate_checksum.assert_not_called()
+    mock_register.assert_called_once_with(
+        dataset, [("test-file-name", 2, 100, "123")], 1
     )
-    db_repo.delete.assert_called_once_with("uploading", upload["id"])
-    db_repo.update.assert_not_called()
-
-
-@pytest.mark.asyncio
-async def test_complete_upload_existing_dataset(user, tier, dataset, upload):
-    db_repo, s3_repo, os_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.find_one.return_value = upload
-    db_repo.retrieve.return_value = user
-    db_repo.find_one_by_name.side_effect = [tier, dataset]
-    db_repo.find_in_time_range.return_value = []
-    os_repo.get_object.return_value = "storage"
-    os_repo.object_info.return_value = ObjectInfo()
-    os_repo.calculate_checksum = AsyncMock(return_value="123")
-    complete = CompleteMultipartUpload(db_repo, os_repo, s3_repo)
-    inputs = CompleteMultipartUpload.Inputs(uid="123", upload_id=upload["id"])
-    outputs = await complete(inputs)
-    assert outputs.dataset.id == upload["id"]
-    assert outputs.dataset.name == upload["dataset"]
-    db_repo.persist.assert_called_once()
-    db_repo.increase_counter.assert_not_called()
-    db_repo.delete.assert_called_once_with("uploading", upload["id"])
-    db_repo.update.assert_called_once_with(
-        "datasets", upload["id"], outputs.dataset.dict()
+    mock_db.return_value.delete_uploading.assert_called_once_with("456")
+
+
+@pytest.mark.parametrize(
+    "checksums, size, missing",
+    [
+        (["md5-1", "invalid checksum"], 100, False),
+        (["md5-1", "md5-2"], 101, False),
+        (["md5-1", "md5-2", "md5-3"], 100, False),
+        (None, None, True),
+    ],
+)
+@mock.patch("api.src.usecases.datasets.upload_large_file.register_files")
+@mock.patch("api.src.usecases.datasets.upload_large_file.S3Repo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.FilesDBRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.retrieve_owned_dataset")
+def test_complete_upload_fails_if_parts_do_not_match(
+    mock_dataset,
+    mock_db,
+    mock_os,
+    mock_s3,
+    mock_register,
+    user,
+    dataset,
+    upload,
+    parts,
+    checksums,
+    size,
+    missing,
+):
+    mock_db.return_value.retrieve_uploading.return_value = upload
+    mock_dataset.return_value = dataset
+    mock_os.return_value.get_object.return_value = "storage"
+    mock_s3.return_value.list_parts.return_value = parts[:1] if missing else parts
+    with pytest.raises(ChecksumMismatch):
+        complete_multipart_upload(user, "456", 1, checksums, size)
+    mock_s3.return_value.complete_multipart_upload.assert_not_called()
+    mock_s3.return_value.abort_multipart_upload.assert_called_once_with(
+        "storage", "456"
     )
+    mock_register.assert_not_called()
+    mock_db.return_value.delete_uploading.assert_called_once_with("456")
@@ -0,0 +1,45 @@
+import io
+import hashlib
+import tarfile
+import zipfile
+
+from ....src.usecases.datasets.download_dataset import (
+    tar_stream,
+    zip_stream,
+    MANIFEST,
+)
+
+DATA = {"a/1.tif_1": b"1" * 1000, "b_2": b"2" * 513, "empty_1": b""}
+FILES = [
+    {"name": "a/1.tif", "version": 1, "size": 1000},
+    {"name": "b", "version": 2, "size": 513},
+    {"name": "empty", "version": 1, "size": 0},
+]
+for f in FILES:
+    f["checksum"] = hashlib.sha1(DATA[f"{f['name']}_{f['version']}"]).hexdigest()
+
+
+def data_stream(dataset_id, filename):
+    data = DATA[filename]
+    for i in range(0, len(data), 100):
+        yield data[i : i + 100]
+
+
+def test_tar_stream():
+    data = b"".join(tar_stream(data_stream, "123", FILES))
+    with tarfile.open(fileobj=io.BytesIO(data)) as archive:
+        assert archive.getnames() == ["a/1.tif", "b", "empty", MANIFEST]
+        for f in FILES:
+            content = archive.extractfile(f["name"]).read()
+            assert content == DATA[f"{f['name']}_{f['version']}"]
+        manifest = archive.extractfile(MANIFEST).read().decode()
+    assert manifest.splitlines()[0] == f"{FILES[0]['checksum']}  a/1.tif"
+
+
+def test_zip_stream():
+    data = b"".join(zip_stream(data_stream, "123", FILES))
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["a/1.tif", "b", "empty", MANIFEST]
+        assert archive.read("b") == DATA["b_2"]
+        assert len(archive.read(MANIFEST).decode().splitlines()) == 3
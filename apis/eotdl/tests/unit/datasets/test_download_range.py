@@ -0,0 +1,43 @@
+import pytest
+
+from ....src.usecases.datasets.download_dataset import (
+    parse_range,
+    multipart_byteranges,
+)
+from ....src.errors import RangeNotSatisfiableError
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9", 100) == [(0, 9)]
+    assert parse_range("bytes=90-", 100) == [(90, 99)]
+    assert parse_range("bytes=-10", 100) == [(90, 99)]
+    assert parse_range("bytes=0-200", 100) == [(0, 99)]
+    assert parse_range("bytes=0-4,10-20", 100) == [(0, 4), (10, 20)]
+
+
+def test_parse_invalid_range_is_ignored():
+    assert parse_range("items=0-9", 100) is None
+    assert parse_range("bytes=5-1", 100) is None
+    assert parse_range("bytes=a-b", 100) is None
+
+
+def test_parse_range_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiableError):
+        parse_range("bytes=100-", 100)
+
+
+def test_multipart_byteranges():
+    data = bytes(range(100))
+
+    def data_stream(dataset_id, filename, offset, length):
+        yield data[offset : offset + length]
+
+    boundary, length, stream = multipart_byteranges(
+        data_stream, "dataset", "file_1", [(0, 4), (10, 20)], 100, "image/tiff"
+    )
+    body = b"".join(stream)
+    assert len(body) == length
+    parts = body.split(f"--{boundary}".encode())
+    assert parts[-1] == b"--\r\n"
+    assert b"Content-Range: bytes 10-20/100\r\n\r\n" + data[10:21] in parts[2]
@@ -1,8 +1,14 @@
 import pytest
 from unittest import mock
 
-from ....src.usecases.datasets.IngestDatasetChunk import IngestDatasetChunk
+from ....src.usecases.datasets.upload_large_file import ingest_dataset_chunk
 from ....src.errors import UploadIdDoesNotExist, ChunkUploadChecksumMismatch
+from ....src.models import User
+
+
+@pytest.fixture
+def user():
+    return User(id="123", uid="123", email="test", name="test", picture="test")
 
 
 @pytest.fixture
@@ -11,52 +17,47 @@ def upload():
         "id": "123",
         "uid": "123",
         "name": "test",
-        "dataset": "test",
+        "dataset": "dataset-id",
         "upload_id": "456",
         "checksum": "123",
+        "file_version": 1,
     }
 
 
-def test_ingest_chunk_should_fail_if_upload_id_does_not_exists():
-    os_repo, s3_repo, db_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.retrieve.return_value = None
-    ingest = IngestDatasetChunk(os_repo, s3_repo, db_repo)
-    inputs = IngestDatasetChunk.Inputs(
-        chunk="test chunk", uid="123", upload_id="456", part_number=1, checksum="123"
-    )
+@mock.patch("api.src.usecases.datasets.upload_large_file.S3Repo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.FilesDBRepo")
+def test_ingest_chunk_should_fail_if_upload_id_does_not_exists(mock_db, mock_s3, user):
+    mock_db.return_value.retrieve_uploading.return_value = None
     with pytest.raises(UploadIdDoesNotExist):
-        ingest(inputs)
-    db_repo.retrieve.assert_called_once_with("uploading", "456", "upload_id")
-    os_repo.get_object.assert_not_called()
-
-
-def test_ingest_chunk_should_fail_if_upload_checksum_does_not_match(upload):
-    os_repo, s3_repo, db_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.retrieve.return_value = upload
-    os_repo.get_object.return_value = "storage"
-    s3_repo.store_chunk.return_value = "invalid checksum"
-    ingest = IngestDatasetChunk(os_repo, s3_repo, db_repo)
-    inputs = IngestDatasetChunk.Inputs(
-        chunk="test chunk", uid="123", upload_id="456", part_number=1, checksum="123"
-    )
+        ingest_dataset_chunk("test chunk", 1, "456", "123", user)
+    mock_s3.return_value.store_chunk.assert_not_called()
+
+
+@mock.patch("api.src.usecases.datasets.upload_large_file.S3Repo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.FilesDBRepo")
+def test_ingest_chunk_should_fail_if_upload_checksum_does_not_match(
+    mock_db, mock_os, mock_s3, user, upload
+):
+    mock_db.return_value.retrieve_uploading.return_value = upload
+    mock_os.return_value.get_object.return_value = "storage"
+    mock_s3.return_value.store_chunk.return_value = "invalid checksum"
     with pytest.raises(ChunkUploadChecksumMismatch):
-        ingest(inputs)
-    os_repo.get_object.assert_called_once_with(upload["id"], upload["name"])
-    s3_repo.store_chunk.assert_called_once_with("test chunk", "storage", 1, "456")
-    db_repo.update.assert_not_called()
-
-
-def test_ingest_chunk(upload):
-    os_repo, s3_repo, db_repo = mock.Mock(), mock.Mock(), mock.Mock()
-    db_repo.retrieve.return_value = upload
-    os_repo.get_object.return_value = "storage"
-    s3_repo.store_chunk.return_value = "123"
-    ingest = IngestDatasetChunk(os_repo, s3_repo, db_repo)
-    inputs = IngestDatasetChunk.Inputs(
-        chunk="test chunk", uid="123", upload_id="456", part_number=1, checksum="123"
+        ingest_dataset_chunk("test chunk", 1, "456", "123", user)
+    mock_os.return_value.get_object.assert_called_once_with("dataset-id", "test_1")
+    mock_db.return_value.add_uploading_part.assert_not_called()
+
+
+@mock.patch("api.src.usecases.datasets.upload_large_file.S3Repo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.upload_large_file.FilesDBRepo")
+def test_ingest_chunk(mock_db, mock_os, mock_s3, user, upload):
+    mock_db.return_value.retrieve_uploading.return_value = upload
+    mock_os.return_value.get_object.return_value = "storage"
+    mock_s3.return_value.store_chunk.return_value = "123"
+    message = ingest_dataset_chunk("test chunk", 1, "456", "123", user)
+    assert message == "Chunk uploaded"
+    mock_s3.return_value.store_chunk.assert_called_once_with(
+        "test chunk", "storage", 1, "456"
     )
-    outputs = ingest(inputs)
-    assert outputs.message == "Chunk uploaded"
-    os_repo.get_object.assert_called_once_with(upload["id"], upload["name"])
-    s3_repo.store_chunk.assert_called_once_with("test chunk", "storage", 1, "456")
-    db_repo.update.assert_called_once()
+    mock_db.return_value.add_uploading_part.assert_called_once_with("456", 1)
@@ -0,0 +1,63 @@
+import pytest
+from unittest import mock
+from io import BytesIO
+
+from ....src.usecases.datasets.ingest_file import ingest_files_batch
+from ....src.errors import ChecksumMismatch
+from ....src.models import User
+
+
+@pytest.fixture
+def user():
+    return User(id="123", uid="123", email="test", name="test", picture="test")
+
+
+@pytest.fixture
+def dataset():
+    dataset = mock.Mock(id="dataset-id", uid="123")
+    dataset.name = "test-dataset-name"
+    dataset.versions = [mock.Mock(version_id=1)]
+    return dataset
+
+
+@pytest.fixture
+def files():
+    return [mock.Mock(filename=f"{i}.tif", file=BytesIO(b"data")) for i in range(3)]
+
+
+@mock.patch("api.src.usecases.datasets.ingest_file.register_files")
+@mock.patch("api.src.usecases.datasets.ingest_file.allocate_file_version")
+@mock.patch("api.src.usecases.datasets.ingest_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.ingest_file.retrieve_owned_dataset")
+def test_ingest_files_batch(
+    mock_dataset, mock_os, mock_allocate, mock_register, user, dataset, files
+):
+    mock_dataset.return_value = dataset
+    mock_allocate.return_value = 1
+    mock_os.return_value.persist_file.return_value = "checksum", 4
+    outputs = ingest_files_batch(files, "dataset-id", 1, ["a"] * 3, ["checksum"] * 3, user)
+    assert outputs == ("dataset-id", "test-dataset-name", ["a/0.tif", "a/1.tif", "a/2.tif"])
+    mock_register.assert_called_once_with(
+        dataset, [(f"a/{i}.tif", 1, 4, "checksum") for i in range(3)], 1
+    )
+
+
+@mock.patch("api.src.usecases.datasets.ingest_file.register_files")
+@mock.patch("api.src.usecases.datasets.ingest_file.allocate_file_version")
+@mock.patch("api.src.usecases.datasets.ingest_file.OSRepo")
+@mock.patch("api.src.usecases.datasets.ingest_file.retrieve_owned_dataset")
+def test_ingest_files_batch_deletes_stored_files_on_failure(
+    mock_dataset, mock_os, mock_allocate, mock_register, user, dataset, files
+):
+    mock_dataset.return_value = dataset
+    mock_allocate.return_value = 1
+    mock_os.return_value.persist_file.side_effect = [
+        ("checksum", 4),
+        ("checksum", 4),
+        ("invalid checksum", 4),
+    ]
+    with pytest.raises(ChecksumMismatch):
+        ingest_files_batch(files, "dataset-id", 1, ["a"] * 3, ["checksum"] * 3, user)
+    mock_register.assert_not_called()
+    deleted = [call.args for call in mock_os.return_value.delete.call_args_list]
+    assert sorted(deleted) == [("dataset-id", f"a/{i}.tif_1") for i in range(3)]
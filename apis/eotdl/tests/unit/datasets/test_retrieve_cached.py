@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock
+
+from ....src.models import Dataset
+from ....src.usecases.catalog import retrieve_cached, invalidate_catalog
+from ....routers.cache import etag_matches
+
+
+def test_retrieve_cached():
+    invalidate_catalog()
+    dataset = Dataset(
+        uid="123",
+        id="456",
+        name="test",
+        authors=["me"],
+        source="http://test",
+        license="free",
+        files="789",
+    )
+    retrieve = MagicMock(return_value=[dataset])
+    body, etag = retrieve_cached(("datasets", None, None), retrieve)
+    assert retrieve_cached(("datasets", None, None), retrieve) == (body, etag)
+    retrieve.assert_called_once()
+    assert b'"name": "test"' in body
+    invalidate_catalog()
+    retrieve_cached(("datasets", None, None), retrieve)
+    assert retrieve.call_count == 2
+
+
+def test_etag_matches():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches(None, '"abc"')
+    assert not etag_matches('"def"', '"abc"')
@@ -0,0 +1,34 @@
+from ...src.metrics import instrument, request_stats, BACKEND_CALLS
+from ...routers.metrics import server_timing
+
+
+@instrument("minio", exclude=["get_object"])
+class Repo:
+    def get_object(self, name):
+        return name
+
+    def delete(self, name):
+        return name
+
+    def data_stream(self, name):
+        yield from [b"a", b"b"]
+
+
+def test_instrument_records_backend_calls():
+    stats = {}
+    token = request_stats.set(stats)
+    try:
+        repo = Repo()
+        before = BACKEND_CALLS.labels("minio", "delete")._value.get()
+        assert repo.delete("a") == "a"
+        assert repo.get_object("a") == "a"
+        assert list(repo.data_stream("a")) == [b"a", b"b"]
+    finally:
+        request_stats.reset(token)
+    assert BACKEND_CALLS.labels("minio", "delete")._value.get() == before + 1
+    assert stats["minio"][0] == 2
+
+
+def test_server_timing():
+    header = server_timing({"mongo": [3, 0.012]}, 0.05)
+    assert header == 'mongo;dur=12.0;desc="3 calls", app;dur=50.0'
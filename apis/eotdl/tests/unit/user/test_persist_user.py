@@ -2,9 +2,14 @@ import pytest
 from unittest.mock import patch
 
 from ....src.models import User
-from ....src.usecases.user import persist_user
+from ....src.usecases.user import persist_user, invalidate_user
+from ....src.usecases.user.persist_user import users_cache
 from ....src.errors import UserDoesNotExistError
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    users_cache.clear()
+
 @pytest.fixture
 def user():
     return User(**{
@@ -49,4 +54,19 @@ def test_create_new_user(mocked_retrieve, mocked_repo, user):
     mocked_retrieve.assert_called_once_with(user.uid)
     mocked_repo_instance.update_user.assert_not_called()
     mocked_repo_instance.persist_user.assert_called_once()    
-    mocked_repo_instance.persist_user.generate_id()
\ No newline at end of file
+    mocked_repo_instance.persist_user.generate_id()
+
+@patch('api.src.usecases.user.persist_user.UserDBRepo')
+@patch('api.src.usecases.user.persist_user.retrieve_user')
+def test_persist_user_is_cached(mocked_retrieve, mocked_repo, user):
+    mocked_retrieve.return_value = user
+    persist_user(user.model_dump())
+    result = persist_user(user.model_dump())
+    assert result.uid == user.uid
+    mocked_retrieve.assert_called_once_with(user.uid)
+    mocked_repo.return_value.update_user.assert_called_once()
+    # a different email or an invalidation goes back to the database
+    persist_user({**user.model_dump(), 'email': 'new email'})
+    invalidate_user(user.uid)
+    persist_user({**user.model_dump(), 'email': 'new email'})
+    assert mocked_retrieve.call_count == 3
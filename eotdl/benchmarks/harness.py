@@ -0,0 +1,250 @@
+# End-to-end ingest and download benchmark for the eotdl client.
+#
+# Runs against an api started with `python -m api.benchmarks.server` (token auth is
+# replaced by a benchmark user), e.g. with the services in docker-compose.test.yml:
+#
+#   docker compose -f docker-compose.test.yml up -d eotdl-api-benchmark
+#   docker compose -f docker-compose.test.yml run eotdl-test \
+#       poetry run python benchmarks/harness.py --files 500 --output results.json
+#
+# Pass --baseline with the results of a previous commit to exit with an error when
+# the throughput of a phase drops more than --tolerance.
+#
+# Synthetic datasets are generated with the given number of files and size
+# distribution, and the results (throughput, p50/p99 request latency and server cpu
+# time read from the api /metrics) are written as json to compare across commits.
+
+import os
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import subprocess
+import functools
+from unittest.mock import patch
+
+import requests
+
+from eotdl.repos import FilesAPIRepo
+from eotdl.datasets import ingest_dataset, download_dataset
+
+USER = {"uid": "benchmark", "sub": "benchmark", "id_token": "benchmark"}
+UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+
+def parse_size(size):
+    size = size.upper()
+    for unit in ["GB", "MB", "KB", "B"]:
+        if size.endswith(unit):
+            return int(float(size[: -len(unit)]) * UNITS[unit])
+    return int(size)
+
+
+def file_sizes(files, size, distribution, rng):
+    if distribution == "fixed":
+        return [size] * files
+    if distribution == "uniform":  # between 0 and twice the mean size
+        return [rng.randint(0, 2 * size) for _ in range(files)]
+    if distribution == "lognormal":  # many small files and a few large ones
+        sizes = [rng.lognormvariate(0, 1) for _ in range(files)]
+        mean = sum(sizes) / files
+        return [int(s / mean * size) for s in sizes]
+    raise ValueError(f"Unknown distribution {distribution}")
+
+
+def generate_dataset(path, name, sizes, files_per_folder=100):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "metadata.yml"), "w") as f:
+        f.write(f"name: {name}\nauthors:\n  - benchmark\nlicense: free\n")
+        f.write("source: http://localhost\n")
+    for i, size in enumerate(sizes):
+        folder = os.path.join(path, f"folder{i // files_per_folder}")
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"file{i}.bin"), "wb") as f:
+            f.write(os.urandom(size))
+    return path
+
+
+class Latencies:
+    # records the duration of the calls to the wrapped api methods
+    def __init__(self):
+        self.values = []
+
+    def wrap(self, method):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.values.append(time.perf_counter() - start)
+
+        return wrapper
+
+    def percentile(self, p):
+        if not self.values:
+            return None
+        values = sorted(self.values)
+        return round(values[min(len(values) - 1, int(len(values) * p))], 4)
+
+
+def server_cpu_seconds(api_url):
+    # process cpu time of the api, exported by prometheus_client on linux
+    response = requests.get(api_url + "metrics")
+    for line in response.text.splitlines():
+        if line.startswith("process_cpu_seconds_total"):
+            return float(line.split()[-1])
+    return None
+
+
+def measure(api_url, methods, run, files, size):
+    latencies = Latencies()
+    patches = [
+        patch.object(
+            FilesAPIRepo, method, latencies.wrap(getattr(FilesAPIRepo, method))
+        )
+        for method in methods
+    ]
+    for p in patches:
+        p.start()
+    cpu = server_cpu_seconds(api_url)
+    start = time.perf_counter()
+    try:
+        run()
+    finally:
+        elapsed = time.perf_counter() - start
+        for p in patches:
+            p.stop()
+    server_cpu = server_cpu_seconds(api_url)
+    return {
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(files / elapsed, 2),
+        "mb_per_second": round(size / elapsed / UNITS["MB"], 2),
+        "requests": len(latencies.values),
+        "p50": latencies.percentile(0.5),
+        "p99": latencies.percentile(0.99),
+        "server_cpu_seconds": round(server_cpu - cpu, 3)
+        if cpu is not None and server_cpu is not None
+        else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--api-url",
+        default=os.getenv("EOTDL_BENCHMARK_API_URL", os.getenv("EOTDL_API_URL")),
+    )
+    parser.add_argument("--files", type=int, default=100)
+    parser.add_argument("--size", default="256KB", help="mean file size")
+    parser.add_argument(
+        "--distribution", choices=["fixed", "uniform", "lognormal"], default="fixed"
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="json file for the results")
+    parser.add_argument("--baseline", default=None, help="results to compare with")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.1, help="allowed throughput drop"
+    )
+    args = parser.parse_args()
+    api_url = args.api_url.rstrip("/") + "/"
+    os.environ["EOTDL_API_URL"] = api_url
+    sizes = file_sizes(
+        args.files, parse_size(args.size), args.distribution, random.Random(args.seed)
+    )
+    name = f"benchmark-{int(time.time())}"
+    tmp = tempfile.mkdtemp()
+    results = {}
+    try:
+        path = generate_dataset(os.path.join(tmp, name), name, sizes)
+        # the api authenticates the benchmark user, skip the login flow
+        with patch("eotdl.auth.auth.is_logged", return_value=USER):
+            results["ingest"] = measure(
+                api_url,
+                ["ingest_file", "ingest_files_batch"],
+                lambda: ingest_dataset(
+                    path, logger=lambda _: None, workers=args.workers
+                ),
+                args.files,
+                sum(sizes),
+            )
+            results["download"] = measure(
+                api_url,
+                ["download_file"],
+                lambda: download_dataset(
+                    name,
+                    path=os.path.join(tmp, "download"),
+                    force=True,
+                    workers=args.workers,
+                ),
+                args.files,
+                sum(sizes),
+            )
+            results["download_archive"] = measure(
+                api_url,
+                ["download_archive"],
+                lambda: download_dataset(
+                    name, path=os.path.join(tmp, "archive"), force=True, archive=True
+                ),
+                args.files,
+                sum(sizes),
+            )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    report = {
+        "benchmark": "ingest_download",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "files": args.files,
+            "size": args.size,
+            "total_bytes": sum(sizes),
+            "distribution": args.distribution,
+            "workers": args.workers,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report["baseline"] = baseline["commit"]
+        regressions = compare(report["results"], baseline["results"], args.tolerance)
+        report["regressions"] = regressions
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if regressions:
+        raise SystemExit(1)
+
+
+def compare(results, baseline, tolerance):
+    # phases whose throughput dropped more than the tolerance
+    regressions = []
+    for phase, result in results.items():
+        if phase not in baseline:
+            continue
+        before, after = baseline[phase]["files_per_second"], result["files_per_second"]
+        if after < before * (1 - tolerance):
+            regressions.append({"phase": phase, "before": before, "after": after})
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
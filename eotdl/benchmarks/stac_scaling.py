@@ -0,0 +1,99 @@
+# Scaling benchmark for the STAC generation of the curation module.
+#
+# Generates structured datasets of increasing size (one folder per item, copies of a
+# small geotiff) and times STACGenerator.generate_stac_collection on each, reporting
+# the time per item as json. Linear generation keeps the time per item flat.
+#
+#   poetry run python benchmarks/stac_scaling.py --sizes 1000,10000,100000 --workers 8
+
+import os
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+import rasterio
+from affine import Affine
+
+from eotdl.curation.stac.stac import STACGenerator
+
+
+def write_template(path, size):
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=size,
+        height=size,
+        count=1,
+        dtype="uint16",
+        crs="EPSG:32631",
+        transform=Affine(10, 0, 500000, 0, -10, 4600000),
+    ) as ds:
+        ds.write(np.zeros((1, size, size), dtype="uint16"))
+    return path
+
+
+def generate_dataset(path, template, images):
+    for i in range(images):
+        folder = os.path.join(path, "source", f"item{i}")
+        os.makedirs(folder)
+        shutil.copyfile(template, os.path.join(folder, "image.tif"))
+    return path
+
+
+def run(path, workers):
+    generator = STACGenerator(image_format="tif", workers=workers)
+    start = time.perf_counter()
+    df = generator.get_stac_dataframe(path)
+    dataframe = time.perf_counter() - start
+    start = time.perf_counter()
+    generator.generate_stac_collection(df.collection.unique()[0])
+    collection = time.perf_counter() - start
+    return {
+        "images": len(df),
+        "dataframe_seconds": round(dataframe, 3),
+        "collection_seconds": round(collection, 3),
+        "ms_per_item": round(collection / len(df) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--sizes",
+        type=lambda s: [int(n) for n in s.split(",")],
+        default=[1000, 10000, 100000],
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--raster-size", type=int, default=16, help="pixels per side")
+    parser.add_argument("--output", default=None, help="json file for the results")
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp()
+    results = []
+    try:
+        template = write_template(os.path.join(tmp, "template.tif"), args.raster_size)
+        for size in args.sizes:
+            path = generate_dataset(os.path.join(tmp, str(size)), template, size)
+            results.append(run(path, args.workers))
+            shutil.rmtree(path)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    # time per item of the largest dataset relative to the smallest, ~1 when linear
+    growth = round(results[-1]["ms_per_item"] / results[0]["ms_per_item"], 2)
+    report = {
+        "benchmark": "stac_scaling",
+        "workers": args.workers,
+        "results": results,
+        "growth": growth,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from ..datasets import (
     retrieve_datasets,
     ingest_dataset,
     download_dataset,
+    sync_dataset,
 )
 
 app = typer.Typer()
@@ -26,9 +27,17 @@ def list(
 def ingest(
     path: Path = typer.Option(..., "--path", "-p", help="Path to dataset"),
     verbose: bool = typer.Option(False, "--verbose", help="Verbose output"),
+    workers: int = typer.Option(
+        4, "--workers", "-w", help="Number of files to hash and upload in parallel"
+    ),
+    presigned: bool = typer.Option(
+        False,
+        "--presigned",
+        help="Upload the parts of large files straight to storage with presigned urls",
+    ),
 ):
     try:
-        ingest_dataset(path, verbose, typer.echo)
+        ingest_dataset(path, verbose, typer.echo, workers, presigned)
     except Exception as e:
         typer.echo(e)
 
@@ -44,15 +53,53 @@ def get(
         False, "--force", "-f", help="Force download even if file exists"
     ),
     verbose: bool = typer.Option(False, "--verbose", help="Verbose output"),
+    workers: int = typer.Option(
+        4, "--workers", "-w", help="Number of files to download in parallel"
+    ),
+    archive: bool = typer.Option(
+        False, "--archive", help="Download the dataset as a single archive"
+    ),
+    compression: str = typer.Option(
+        None,
+        "--compression",
+        help="Compress the archive while downloading it (zstd, requires zstandard)",
+    ),
 ):
     try:
         dst_path = download_dataset(
-            dataset, version, path, file, typer.echo, assets, force, verbose
+            dataset,
+            version,
+            path,
+            file,
+            typer.echo,
+            assets,
+            force,
+            verbose,
+            workers,
+            archive,
+            compression,
         )
         typer.echo(f"Data available at {dst_path}")
     except Exception as e:
         typer.echo(e)
 
 
+@app.command()
+def sync(
+    dataset: str,
+    path: str = typer.Option(None, "--path", "-p", help="Sync to a specific path"),
+    version: int = typer.Option(None, "--version", "-v", help="Dataset version"),
+    verbose: bool = typer.Option(False, "--verbose", help="Verbose output"),
+    workers: int = typer.Option(
+        4, "--workers", "-w", help="Number of files to download in parallel"
+    ),
+):
+    try:
+        dst_path = sync_dataset(dataset, version, path, typer.echo, verbose, workers)
+        typer.echo(f"Data available at {dst_path}")
+    except Exception as e:
+        typer.echo(e)
+
+
 if __name__ == "__main__":
     app()
@@ -4,15 +4,17 @@ Module for the STAC dataframe
 
 import pandas as pd
 import geopandas as gpd
+import numpy as np
+import shapely
 import pystac
 import json
-from geomet import wkt
 from os.path import join
 from os import makedirs
-from typing import Union, Optional
+from typing import Union, Optional, Iterator, Callable
+from concurrent.futures import ThreadPoolExecutor
 
 from math import isnan
-from .utils import convert_df_geom_to_shape, get_all_children
+from .utils import get_all_children, geojson_to_geometries, iter_stac_objects
 from pathlib import Path
 
 
@@ -21,137 +23,241 @@ class STACDataFrame(gpd.GeoDataFrame):
         super().__init__(*args, **kwargs)
 
     @classmethod
-    def from_stac_file(self, stac_file: pystac.STACObject):
+    def from_stac_file(self, stac_file: pystac.STACObject, **kwargs):
         """
         Create a STACDataFrame from a STAC file
 
         :param stac_file: STAC file
+        :param kwargs: optional arguments of read_stac
         """
-        return read_stac(stac_file)
+        return read_stac(stac_file, **kwargs)
 
-    def to_stac(self, path):
+    @classmethod
+    def iter_stac_file(self, stac_file: Union[str, Path], **kwargs):
         """
-        Create a STAC catalog and children from a STACDataFrame
+        Read a STAC file in STACDataFrame batches
+
+        :param stac_file: path to the STAC file
+        :param kwargs: optional arguments of iter_stac
         """
-        df = self.copy()
+        return iter_stac(stac_file, **kwargs)
 
-        if "id" in df.columns and "stac_id" in df.columns:
-            id_column = "stac_id"
-            stac_id_exists = True
-        else:
-            id_column = "id"
-            stac_id_exists = False
+    def to_stac(self, 
+                path: str, 
+                workers: Optional[int] = 8, 
+                progress: Optional[Callable[[int, int], None]] = None
+                ) -> None:
+        """
+        Create a STAC catalog and children from a STACDataFrame
+
+        :param path: path to the output folder
+        :param workers: number of threads writing the items files
+        :param progress: function called with the number of items written and the total number of items
+        """
+        records = self.to_json_records()
+        types = self["type"].values
 
         # First, create the catalog and its folder, if exists
-        catalog_df = df[df["type"] == "Catalog"]
+        catalogs = [record for record, type in zip(records, types) if type == "Catalog"]
 
-        if catalog_df.empty:
+        if not catalogs:
             makedirs(path, exist_ok=True)
         else:
-            for _, row in catalog_df.iterrows():
-                root_output_folder = path + "/" + row[id_column]
+            for row_json in catalogs:
+                root_output_folder = path + "/" + row_json["id"]
                 makedirs(root_output_folder, exist_ok=True)
-                row_json = row.to_dict()
-
-                # Curate the json row
-                row_json = self.curate_json_row(row_json, stac_id_exists)
-
                 with open(join(root_output_folder, f"catalog.json"), "w") as f:
                     json.dump(row_json, f)
 
         # Second, create the collections and their folders, if exist
         collections = dict()
-        collections_df = df[df["type"] == "Collection"]
-        for _, row in collections_df.iterrows():
-            stac_output_folder = join(root_output_folder, row[id_column])
-            collections[row[id_column]] = stac_output_folder
+        for row_json, type in zip(records, types):
+            if type != "Collection":
+                continue
+            stac_output_folder = join(root_output_folder, row_json["id"])
+            collections[row_json["id"]] = stac_output_folder
             makedirs(stac_output_folder, exist_ok=True)
-            row_json = row.to_dict()
-
-            # Curate the json row
-            row_json = self.curate_json_row(row_json, stac_id_exists)
-
             with open(join(stac_output_folder, f"collection.json"), "w") as f:
                 json.dump(row_json, f)
 
         # Then, create the items and their folders, if exist
-        features_df = df[df["type"] == "Feature"]
-        for _, row in features_df.iterrows():
-            collection = row["collection"]
-            stac_output_folder = join(collections[collection], row[id_column])
-
-            # Convert the geometry from WKT back to geojson
-            row["geometry"] = row["geometry"].wkt
-            row["geometry"] = wkt.loads(row["geometry"])
-            makedirs(stac_output_folder, exist_ok=True)
-            row_json = row.to_dict()
-
-            # Curate the json row
-            row_json = self.curate_json_row(row_json, stac_id_exists)
+        features = [record for record, type in zip(records, types) if type == "Feature"]
 
+        def write_item(row_json):
+            stac_output_folder = join(collections[row_json["collection"]], row_json["id"])
+            makedirs(stac_output_folder, exist_ok=True)
+            # json.dumps encodes in C, unlike json.dump
             with open(join(stac_output_folder, f'{row_json["id"]}.json'), "w") as f:
-                json.dump(row_json, f)
+                f.write(json.dumps(row_json))
+
+        with ThreadPoolExecutor(workers) as executor:
+            for written, _ in enumerate(executor.map(write_item, features), 1):
+                if progress:
+                    progress(written, len(features))
 
-    def curate_json_row(self, row: dict, stac_id_exists: bool) -> dict:
+    def to_json_records(self) -> list:
         """
-        Curate the json row of a STACDataFrame, in order to generate a valid STAC file
+        Convert the rows of a STACDataFrame to valid STAC dictionaries. The geometries 
+        are converted to GeoJSON in bulk and the JSON strings are found per column
 
-        :param row: row of a STACDataFrame
-        :param stac_id_exists: if the stac_id column exists
+        :return: list of STAC dictionaries, one per row
         """
-        keys_to_remove = list()
+        df = pd.DataFrame(self, copy=False)
 
         # Remove the created_at and modified_at columns, if the STACDataFrame comes from GeoDB
-        for i in "created_at", "modified_at":
-            if i in row.keys():
-                keys_to_remove.append(i)
+        df = df.drop(columns=[c for c in ("created_at", "modified_at") if c in df.columns])
 
         # Rename the stac_id column to id, to avoid conflicts with the id column
-        if stac_id_exists:
-            row["id"] = row["stac_id"]
-            del row["stac_id"]
+        if "id" in df.columns and "stac_id" in df.columns:
+            df["id"] = df["stac_id"]
+            df = df.drop(columns="stac_id")
+
+        # Convert the geometry of the items back to GeoJSON
+        if "geometry" in df.columns:
+            features = (df["type"] == "Feature").values
+            geometries = np.full(len(df), None, dtype=object)
+            if features.any():
+                geometries[features] = [
+                    json.loads(geometry)
+                    for geometry in shapely.to_geojson(df["geometry"].values[features])
+                ]
+            df["geometry"] = geometries
+
+        # Remove the NaN values and empty strings, before decoding the JSON strings so the
+        # empty objects and arrays they contain (e.g. properties or links) are kept
+        records = [
+            {k: v for k, v in row.items() if not is_empty_value(v)}
+            for row in df.to_dict("records")
+        ]
+
+        # Convert the JSON strings to dicts, only the values that are JSON objects or arrays
+        for column in df.columns:
+            for i in np.flatnonzero(json_values(df[column])):
+                records[i][column] = decode_json(records[i][column])
+        return records
+
+    def to_geoparquet(self, path: str, **kwargs) -> None:
+        """
+        Write the STACDataFrame to a GeoParquet file, in the stac-geoparquet layout
+
+        :param path: path to the GeoParquet file
+        :param kwargs: optional arguments of geoparquet.to_geoparquet
+        """
+        from .geoparquet import to_geoparquet
+
+        to_geoparquet(self, path, **kwargs)
 
-        # Remove the NaN values and empty strings
-        for k, v in row.items():
-            if (isinstance(v, float) and isnan(v)) or v == "" or not v:
-                keys_to_remove.append(k)
 
-        for key in keys_to_remove:
-            if key in row.keys():
-                del row[key]
+def is_empty_value(value) -> bool:
+    """
+    Check if a value of a STACDataFrame row is NaN, an empty string or empty
+
+    :param value: value to check
+    """
+    return (isinstance(value, float) and isnan(value)) or value == "" or not value
+
+
+def json_values(column: pd.Series) -> np.ndarray:
+    """
+    Find the values of a column of a STACDataFrame that are JSON objects or arrays as
+    strings, as in the STACDataFrames from GeoDB
+
+    :param column: column to check
+    :return: boolean mask of the JSON values
+    """
+    try:
+        first = column.str.lstrip().str[0]
+    except AttributeError:
+        # The column has no strings
+        return np.zeros(len(column), dtype=bool)
+    return first.isin(("{", "[")).values
+
 
-        # Convert the value to dict if it is a string and is possible
-        for k, v in row.items():
-            if isinstance(v, str):
-                try:
-                    row[k] = json.loads(v)
-                except json.decoder.JSONDecodeError:
-                    pass
+def decode_json(value):
+    """
+    Convert a value to dict if it is a string and is possible
+
+    :param value: value to convert
+    """
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.decoder.JSONDecodeError:
+            pass
+    return value
 
-        return row
 
 def read_stac(
     stac_file: Union[pystac.Catalog, pystac.Collection, str],
     geometry_column: Optional[str] = "geometry",
+    workers: Optional[int] = 8,
 ) -> STACDataFrame:
     """
-    Read a STAC file and return a STACDataFrame
+    Read a STAC file and return a STACDataFrame. If a path is given, the STAC files
+    are read directly as JSON, without creating the pystac objects
 
     :param stac_file: STAC file to read
     :param geometry_column: name of the geometry column
+    :param workers: number of threads reading the items files
     """
     if isinstance(stac_file, str) or isinstance(stac_file, Path):
-        stac_file = pystac.read_file(stac_file) # we assume this is always a catalog
-    stac_file.make_all_asset_hrefs_absolute()
-    children = get_all_children(stac_file)
+        # we assume this is always a catalog
+        children = [
+            obj
+            for chunk in iter_stac_objects(stac_file, chunk_size=10000, workers=workers)
+            for obj in chunk
+        ]
+    else:
+        stac_file.make_all_asset_hrefs_absolute()
+        children = get_all_children(stac_file)
+
+    return objects_to_stac_dataframe(children, geometry_column)
+
 
-    # Convert Dataframe to STACDataFrame
-    dataframe = pd.DataFrame(children)
-    dataframe[geometry_column] = dataframe.apply(convert_df_geom_to_shape, axis=1)
+def iter_stac(
+    stac_file: Union[str, Path],
+    chunk_size: Optional[int] = 10000,
+    geometry_column: Optional[str] = "geometry",
+    workers: Optional[int] = 8,
+) -> Iterator[STACDataFrame]:
+    """
+    Read a STAC file in STACDataFrame batches of at most chunk_size rows, so the
+    whole catalog does not need to fit in memory. The catalogs and collections come
+    in the first batches
+
+    :param stac_file: path to the STAC file to read
+    :param chunk_size: maximum number of rows of every batch
+    :param geometry_column: name of the geometry column
+    :param workers: number of threads reading the items files
+    """
+    for chunk in iter_stac_objects(stac_file, chunk_size=chunk_size, workers=workers):
+        yield objects_to_stac_dataframe(chunk, geometry_column)
+
+
+def objects_to_stac_dataframe(
+    objects: list,
+    geometry_column: Optional[str] = "geometry",
+    geometries: Optional[np.ndarray] = None,
+) -> STACDataFrame:
+    """
+    Create a STACDataFrame from STAC objects dictionaries
+
+    :param objects: STAC objects dictionaries
+    :param geometry_column: name of the geometry column
+    :param geometries: shapely geometries of the objects, converted from their GeoJSON geometry if not given
+    """
+    dataframe = pd.DataFrame(objects)
+    if geometries is None:
+        geometries = geojson_to_geometries(
+            dataframe["geometry"]
+            if "geometry" in dataframe.columns
+            else [None] * len(dataframe)
+        )
+    dataframe[geometry_column] = geometries
     stac_dataframe = STACDataFrame(
         dataframe,
         crs="EPSG:4326",
-        geometry=gpd.GeoSeries.from_wkt(dataframe[geometry_column]),
+        geometry=geometry_column,
     )
 
     return stac_dataframe
@@ -72,14 +72,13 @@ class ImageNameLabeler(LabelExtensionObject):
 
         # Generate the labels items
         print("Generating labels collection...")
+        # There must be an item ID column in the STAC dataframe
+        if not 'id' in stac_dataframe.columns:
+            raise ValueError(
+                "No item ID column found in the STAC dataframe, please provide a STAC dataframe with the item ID column"
+            )
+        label_classes = stac_dataframe.label.unique().tolist()
         for source_item in tqdm(source_items):
-            # There must be an item ID column in the STAC dataframe
-            if not 'id' in stac_dataframe.columns:
-                raise ValueError(
-                    "No item ID column found in the STAC dataframe, please provide a STAC dataframe with the item ID column"
-                )
-            label_classes = stac_dataframe.label.unique().tolist()
-
             # Create the label item
             label_item = self.add_extension_to_item(
                 source_item,
@@ -138,6 +137,8 @@ class ImageNameLabeler(LabelExtensionObject):
         :param df: dataframe with the STAC metadata of a given directory containing the assets to generate metadata
         :param label_type: label type
         """
+        # Label of every item, the first one if the item ID is repeated
+        items_labels = df.drop_duplicates('id').set_index('id')['label'].to_dict()
         for item in collection.get_all_items():
             geojson_path = join(dirname(item.get_self_href()), f'{item.id}.geojson')
 
@@ -159,7 +160,7 @@ class ImageNameLabeler(LabelExtensionObject):
             
             item_id = item.id
             geometry = item.geometry
-            labels = [df[df['id'] == item_id]['label'].values[0]]
+            labels = [items_labels[item_id]]
             # There is data like DEM data that does not have datetime but start and end datetime
             datetime = item.datetime.isoformat() if item.datetime else (item.properties.start_datetime.isoformat(),
                                                                         item.properties.end_datetime.isoformat())
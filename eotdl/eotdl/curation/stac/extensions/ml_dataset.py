@@ -4,7 +4,9 @@ import traceback
 import json
 import random
 
+import numpy as np
 import pystac
+import rasterio
 
 from tqdm import tqdm
 from pystac.extensions.base import ExtensionManagementMixin, PropertiesExtension
@@ -15,7 +17,8 @@ from os.path import dirname, exists
 from pystac.cache import ResolvedObjectCache
 from pystac.extensions.hooks import ExtensionHooks
 from typing import Any, Dict, List, Optional, Generic, TypeVar, Union, Set
-from ..utils import make_links_relative_to_path
+from concurrent.futures import ThreadPoolExecutor
+from ..utils import make_links_relative_to_path, group_overlapping_bboxes, bboxes_iou
 
 T = TypeVar("T", pystac.Item, pystac.Collection, pystac.Catalog)
 
@@ -271,8 +274,18 @@ class MLDatasetQualityMetrics:
     """ """
 
     @classmethod
-    def calculate(self, catalog: Union[pystac.Catalog, str]) -> None:
-        """ """
+    def calculate(self, 
+                  catalog: Union[pystac.Catalog, str], 
+                  iou_threshold: Optional[float] = 0.9,
+                  workers: Optional[int] = 8
+                  ) -> None:
+        """
+        Calculate the quality metrics of the catalog and save them in it
+
+        :param catalog: catalog with the ML-Dataset extension
+        :param iou_threshold: minimum intersection over union of the bounding boxes of two items to consider them spatial duplicates
+        :param workers: number of threads reading the labels to calculate the classes balance
+        """
 
         if isinstance(catalog, str):
             catalog = MLDatasetExtension(pystac.read_file(catalog))
@@ -284,8 +297,8 @@ class MLDatasetQualityMetrics:
 
         catalog.make_all_asset_hrefs_absolute()
         try:
-            catalog.add_metric(self._search_spatial_duplicates(catalog))
-            catalog.add_metric(self._get_classes_balance(catalog))
+            catalog.add_metric(self._search_spatial_duplicates(catalog, iou_threshold))
+            catalog.add_metric(self._get_classes_balance(catalog, workers))
         except AttributeError:
             raise pystac.ExtensionNotImplemented(
                 f"The catalog does not have the required properties or the ML-Dataset extension to calculate the metrics"
@@ -307,40 +320,50 @@ class MLDatasetQualityMetrics:
             traceback.print_exc()
 
     @staticmethod
-    def _search_spatial_duplicates(catalog: pystac.Catalog):
-        """ """
+    def _search_spatial_duplicates(catalog: pystac.Catalog, iou_threshold: Optional[float] = 0.9):
+        """
+        Search the items whose bounding boxes overlap with an intersection over union of 
+        at least iou_threshold. Every duplicate is reported once, against the first item of
+        its cluster of overlapping items
+
+        :param catalog: catalog to search the duplicates in
+        :param iou_threshold: minimum intersection over union of the bounding boxes
+        """
         print("Looking for spatial duplicates...")
-        items = list(
-            set(
-                [item 
+        items = [item 
                  for item in tqdm(catalog.get_items(recursive=True)) 
-                 if not LabelExtension.has_extension(item)
+                 if not LabelExtension.has_extension(item) and item.bbox
                  ]
-                )
-            )
 
         # Initialize the spatial duplicates dict
-        spatial_duplicates = {"name": "spatial-duplicates", "values": [], "total": 0}
-
-        items_bboxes = dict()
-        for item in items:
-            # Get the item bounding box
-            bbox = str(item.bbox)
-            # If the bounding box is not in the items dict, add it
-            if bbox not in items_bboxes.keys():
-                items_bboxes[bbox] = item.id
-            # If the bounding box is already in the items dict, add it to the duplicates dict
-            else:
+        spatial_duplicates = {"name": "spatial-duplicates", "values": [], "total": 0, "clusters": []}
+
+        # Use the 2D bounding box of the 3D ones
+        bboxes = np.asarray(
+            [item.bbox if len(item.bbox) == 4 else item.bbox[:2] + item.bbox[3:5] for item in items],
+            dtype=float
+        ).reshape(-1, 4)
+        clusters = group_overlapping_bboxes(bboxes, iou_threshold)
+        for cluster in clusters:
+            first, duplicates = cluster[0], cluster[1:]
+            iou = bboxes_iou(bboxes[[first] * len(duplicates)], bboxes[duplicates])
+            for j, value in zip(duplicates, iou.tolist()):
                 spatial_duplicates["values"].append(
-                    {"item": item.id, "duplicate": items_bboxes[bbox]}
+                    {"item": items[j].id, "duplicate": items[first].id, "iou": round(value, 4)}
                 )
-                spatial_duplicates["total"] += 1
+        spatial_duplicates["total"] = len(spatial_duplicates["values"])
+        spatial_duplicates["clusters"] = [[items[i].id for i in cluster] for cluster in clusters]
 
         return spatial_duplicates
 
     @staticmethod
-    def _get_classes_balance(catalog: pystac.Catalog) -> dict:
-        """ """
+    def _get_classes_balance(catalog: pystac.Catalog, workers: Optional[int] = 8) -> dict:
+        """
+        Count the classes of every label property, reading every label asset once
+
+        :param catalog: catalog to calculate the classes balance of
+        :param workers: number of threads reading the labels
+        """
 
         def get_label_properties(items: List[pystac.Item]) -> List:
             """
@@ -348,51 +371,35 @@ class MLDatasetQualityMetrics:
             label_properties = list()
             for label in items:
                 label_ext = LabelExtension.ext(label)
-                for prop in label_ext.label_properties:
+                for prop in label_ext.label_properties or []:
                     if prop not in label_properties:
                         label_properties.append(prop)
 
             return label_properties
     
-        labels = list(
-            set(
-                [item 
-                 for item in tqdm(catalog.get_items(recursive=True), desc="Calculating classes balance...") 
-                 if LabelExtension.has_extension(item)
-                 ]
-                )
-            )
+        labels = [item 
+                  for item in tqdm(catalog.get_items(recursive=True), desc="Calculating classes balance...") 
+                  if LabelExtension.has_extension(item)
+                  ]
 
         # Initialize the classes balance dict
         classes_balance = {"name": "classes-balance", "values": []}
         label_properties = get_label_properties(labels)
 
-        for property in label_properties:
+        # Count the classes of all the properties at once, merging the counts in the labels order
+        properties_counts = {property: dict() for property in label_properties}
+        with ThreadPoolExecutor(workers) as executor:
+            labels_counts = executor.map(
+                lambda label: count_label_classes(label, label_properties), labels
+            )
+            for label_counts in labels_counts:
+                for property, counts in label_counts.items():
+                    properties = properties_counts.setdefault(property, dict())
+                    for property_value, count in counts.items():
+                        properties[property_value] = properties.get(property_value, 0) + count
+
+        for property, properties in properties_counts.items():
             property_balance = {"name": property, "values": []}
-            properties = dict()
-            for label in labels:
-                asset_path = label.assets["labels"].href
-                # Open the linked geoJSON to obtain the label properties
-                try:
-                    with open(asset_path) as f:
-                        label_data = json.load(f)
-                except FileNotFoundError:
-                    raise FileNotFoundError(
-                        f"The file {asset_path} does not exist. Make sure the assets hrefs are correct"
-                    )
-                # Get the property
-                for feature in label_data["features"]:
-                    if property in feature["properties"]:
-                        property_value = feature["properties"][property]
-                    else:
-                        if feature["properties"]["labels"]:
-                            property_value = feature["properties"]["labels"][0]
-                        else:
-                            continue
-                    if property_value not in properties:
-                        properties[property_value] = 0
-                    properties[property_value] += 1
-            
             # Create the property balance dict
             total_labels = sum(properties.values())
             for key, value in properties.items():
@@ -409,6 +416,80 @@ class MLDatasetQualityMetrics:
         return classes_balance
 
 
+def count_label_classes(label: pystac.Item, label_properties: List[str]) -> Dict[str, dict]:
+    """
+    Count the classes of every label property in the labels asset of a label item, a GeoJSON 
+    with the labels as features properties or a raster (segmentation) with the classes as values
+
+    :param label: label item
+    :param label_properties: label properties to count in the GeoJSON labels
+    """
+    asset_path = label.assets["labels"].href
+    try:
+        if asset_path.lower().endswith((".geojson", ".json")):
+            return count_vector_label_classes(asset_path, label_properties)
+        return count_raster_label_classes(asset_path, LabelExtension.ext(label).label_properties)
+    except (FileNotFoundError, rasterio.errors.RasterioIOError):
+        raise FileNotFoundError(
+            f"The file {asset_path} does not exist. Make sure the assets hrefs are correct"
+        )
+
+
+def count_vector_label_classes(asset_path: str, label_properties: List[str]) -> Dict[str, dict]:
+    """
+    Count the classes of every label property in the features of a GeoJSON label.
+    If a feature does not have the property, its first label is counted
+
+    :param asset_path: path to the GeoJSON file
+    :param label_properties: label properties to count
+    """
+    with open(asset_path) as f:
+        label_data = json.load(f)
+    counts = {property: dict() for property in label_properties}
+    for feature in label_data["features"]:
+        feature_properties = feature["properties"]
+        first_label = feature_properties["labels"][0] if feature_properties.get("labels") else None
+        for property, properties in counts.items():
+            if property in feature_properties:
+                property_value = feature_properties[property]
+            elif first_label is not None:
+                property_value = first_label
+            else:
+                continue
+            properties[property_value] = properties.get(property_value, 0) + 1
+    return counts
+
+
+def count_raster_label_classes(asset_path: str, label_properties: List[str]) -> Dict[str, dict]:
+    """
+    Count the pixels of every class of a raster label, reading it by blocks. The counts 
+    are reported for every label property, or as labels if there are none
+
+    :param asset_path: path to the raster file
+    :param label_properties: label properties to count
+    """
+    totals = np.zeros(0, dtype=np.int64)
+    others = dict()
+    with rasterio.open(asset_path) as src:
+        for _, window in src.block_windows(1):
+            values = src.read(1, window=window, masked=True).compressed()
+            if values.size == 0:
+                continue
+            if np.issubdtype(values.dtype, np.integer) and values.min() >= 0:
+                bincount = np.bincount(values.astype(np.int64))
+                if len(bincount) > len(totals):
+                    totals = np.pad(totals, (0, len(bincount) - len(totals)))
+                totals[:len(bincount)] += bincount
+            else:
+                # Negative or float classes
+                for value, count in zip(*np.unique(values, return_counts=True)):
+                    others[value.item()] = others.get(value.item(), 0) + int(count)
+    classes = {value: int(count) for value, count in enumerate(totals.tolist()) if count}
+    for value, count in others.items():
+        classes[value] = classes.get(value, 0) + count
+    return {property: dict(classes) for property in label_properties or ["labels"]}
+
+
 class MLDatasetExtensionHooks(ExtensionHooks):
     schema_uri: str = SCHEMA_URI
     prev_extension_ids: Set[str] = set()
@@ -4,10 +4,10 @@ Module for projection STAC extensions object
 
 import pystac
 import pandas as pd
-import rasterio
 
 from typing import Union
 from .base import STACExtensionObject
+from ..utils import get_raster_metadata
 from pystac.extensions.projection import ProjectionExtension
 
 
@@ -31,12 +31,12 @@ class ProjExtensionObject(STACExtensionObject):
             return obj
         elif isinstance(obj, pystac.Item):
             proj_ext = ProjectionExtension.ext(obj, add_if_missing=True)
-            ds = rasterio.open(obj_info['image'].values[0])
+            raster = get_raster_metadata(obj_info['image'].values[0])
             # Assume all the bands have the same projection
             proj_ext.apply(
-                epsg=ds.crs.to_epsg(),
-                transform=ds.transform,
-                shape=ds.shape,
+                epsg=raster['epsg'],
+                transform=raster['transform'],
+                shape=raster['shape'],
                 )
 
         return obj
@@ -3,12 +3,12 @@ Module for raster STAC extensions object
 '''
 
 import pystac
-import rasterio
 import pandas as pd
 
 from pystac.extensions.raster import RasterExtension, RasterBand
 from typing import Union, Optional
 from .base import STACExtensionObject
+from ..utils import get_raster_metadata
 
 
 class RasterExtensionObject(STACExtensionObject):
@@ -29,15 +29,15 @@ class RasterExtensionObject(STACExtensionObject):
             return obj
         else:
             raster_ext = RasterExtension.ext(obj, add_if_missing=True)
-            src = rasterio.open(obj.href)
+            src = get_raster_metadata(obj.href)
             bands = list()
-            for band in src.indexes:
+            for band in src['indexes']:
                 bands.append(RasterBand.create(
-                    nodata=src.nodatavals[band - 1],
-                    data_type=src.dtypes[band - 1],
-                    spatial_resolution=src.res) if src.nodatavals else RasterBand.create(
-                        data_type=src.dtypes[band - 1],
-                        spatial_resolution=src.res))
+                    nodata=src['nodatavals'][band - 1],
+                    data_type=src['dtypes'][band - 1],
+                    spatial_resolution=src['res']) if src['nodatavals'] else RasterBand.create(
+                        data_type=src['dtypes'][band - 1],
+                        spatial_resolution=src['res']))
             raster_ext.apply(bands=bands)
                 
         return obj
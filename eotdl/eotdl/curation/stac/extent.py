@@ -9,9 +9,9 @@ import json
 
 from glob import glob
 from os.path import dirname
-from typing import List
+from typing import List, Optional, Tuple
 
-from .utils import get_item_metadata
+from .utils import get_item_metadata, get_raster_bbox
 
 
 def get_dem_temporal_interval() -> pystac.TemporalExtent:
@@ -41,40 +41,45 @@ def get_unknow_extent() -> pystac.Extent:
                                                           )]))
 
 
-def get_collection_extent(rasters: List[str]) -> pystac.Extent:
+def get_collection_extent(rasters: List[str],
+                          rasters_info: Optional[List[Tuple]] = None
+                          ) -> pystac.Extent:
     """
     Get the extent of a collection
     
     :param rasters: list of rasters
+    :param rasters_info: bounding box and metadata of each raster, as returned by get_raster_info. Read from the rasters if not given
     """
+    bboxes, metadatas = zip(*rasters_info) if rasters_info else (None, None)
     # Get the spatial extent of the collection
-    spatial_extent = get_collection_spatial_extent(rasters)
+    spatial_extent = get_collection_spatial_extent(rasters, bboxes)
     # Get the temporal interval of the collection
-    temporal_interval = get_collection_temporal_interval(rasters)
+    temporal_interval = get_collection_temporal_interval(rasters, metadatas)
     # Create the Extent object
     extent = pystac.Extent(spatial=spatial_extent, temporal=temporal_interval)
 
     return extent
     
-def get_collection_spatial_extent(rasters: List[str]) -> pystac.SpatialExtent:
+def get_collection_spatial_extent(rasters: List[str],
+                                  bboxes: Optional[List[list]] = None
+                                  ) -> pystac.SpatialExtent:
     """
     Get the spatial extent of a collection
 
     :param path: path to the directory
+    :param bboxes: bounding boxes of the rasters, None for the rasters without CRS
     """
     # Get the bounding boxes of all the given rasters
-    bboxes = list()
-    for raster in rasters:
-        with rasterio.open(raster) as ds:
-            bounds = ds.bounds
-            dst_crs = 'EPSG:4326'
-            try:
-                left, bottom, right, top = rasterio.warp.transform_bounds(ds.crs, dst_crs, *bounds)
-                bbox = [left, bottom, right, top]
-            except rasterio.errors.CRSError:
-                spatial_extent = pystac.SpatialExtent([[0, 0, 0, 0]])
-                return spatial_extent
+    if bboxes is None:
+        bboxes = list()
+        for raster in rasters:
+            bbox = get_raster_bbox(raster)
             bboxes.append(bbox)
+            if bbox is None:
+                break
+    if None in bboxes:
+        # Some raster has no CRS
+        return pystac.SpatialExtent([[0, 0, 0, 0]])
     # Get the minimum and maximum values of the bounding boxes
     try:
         left = min([bbox[0] for bbox in bboxes])
@@ -87,16 +92,20 @@ def get_collection_spatial_extent(rasters: List[str]) -> pystac.SpatialExtent:
     finally:
         return spatial_extent
 
-def get_collection_temporal_interval(rasters: List[str]) -> pystac.TemporalExtent:
+def get_collection_temporal_interval(rasters: List[str],
+                                     metadatas: Optional[List[dict]] = None
+                                     ) -> pystac.TemporalExtent:
     """
     Get the temporal interval of a collection
 
     :param path: path to the directory
+    :param metadatas: metadata of the rasters, read from their directories if not given
     """
+    if metadatas is None:
+        metadatas = [get_item_metadata(raster) for raster in rasters]
     # Get all the metadata.json files in the directory of all the given rasters
     metadata_jsons = list()
-    for raster in rasters:
-        metadata_json = get_item_metadata(raster)
+    for metadata_json in metadatas:
         if metadata_json:
             metadata_jsons.append(metadata_json)
 
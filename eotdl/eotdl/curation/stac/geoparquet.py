@@ -0,0 +1,240 @@
+"""
+Module for reading and writing STAC catalogs as GeoParquet, in the stac-geoparquet layout
+"""
+
+import json
+import numpy as np
+import pandas as pd
+import shapely
+
+from typing import Union, Optional, Tuple
+
+from .dataframe import STACDataFrame, objects_to_stac_dataframe
+
+STAC_GEOPARQUET_VERSION = "1.0.0"
+# Top level fields of the items, the rest of the columns are their properties
+ITEM_FIELDS = ("type", "stac_version", "stac_extensions", "id", "geometry", "bbox", "links", "assets", "collection")
+DATETIME_PROPERTIES = ("datetime", "start_datetime", "end_datetime", "created", "updated")
+# Column with the paths of the values set to null in every item, the rest of nulls read are
+# fields missing in the item that were added by parquet to match the columns and structs
+NULLS_COLUMN = "stac_geoparquet:nulls"
+
+
+def to_geoparquet(
+    df: STACDataFrame,
+    path: str,
+    row_group_size: Optional[int] = 10000,
+    sort_by: Optional[Union[str, list]] = None,
+    compression: Optional[str] = "zstd",
+) -> None:
+    """
+    Write a STACDataFrame to a GeoParquet file, in the stac-geoparquet layout. Every item is a
+    row, with its properties as columns and its assets as a struct column, while the catalogs
+    and collections are kept in the file metadata. The bbox is written as a struct column, so
+    the row groups statistics of its fields and of the datetime can be used to skip row groups
+
+    :param df: STACDataFrame to write
+    :param path: path to the GeoParquet file
+    :param row_group_size: maximum number of items of every row group
+    :param sort_by: columns to sort the items by before writing them (e.g. datetime), so
+    the row groups cover smaller ranges
+    :param compression: compression codec
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    records = df.to_json_records()
+    types = df["type"].values
+    features = (types == "Feature")
+    items = [record for record, type in zip(records, types) if type == "Feature"]
+    # The catalogs and collections are kept as JSON in the metadata
+    metadata = {
+        "version": STAC_GEOPARQUET_VERSION,
+        "catalogs": [record for record, type in zip(records, types) if type == "Catalog"],
+        "collections": {
+            record["id"]: record for record, type in zip(records, types) if type == "Collection"
+        },
+        "json_columns": list(),
+    }
+
+    # Flatten the properties of the items as columns, keeping their nested values as structs
+    rows = list()
+    for item in items:
+        row = {field: item.get(field) for field in ITEM_FIELDS if field != "geometry"}
+        row["bbox"] = dict(zip(("xmin", "ymin", "xmax", "ymax"), item["bbox"])) if item.get("bbox") else None
+        row["assets"] = item.get("assets") or None
+        row.update(item.get("properties", dict()))
+        nulls = [json.dumps(path) for path in find_nulls({k: v for k, v in item.items() if k not in ("geometry", "bbox")})]
+        row[NULLS_COLUMN] = nulls or None
+        rows.append(row)
+    items_df = pd.DataFrame(rows, columns=list(dict.fromkeys(
+        [f for f in ITEM_FIELDS if f != "geometry"] + [k for row in rows for k in row]
+    )))
+    for column in DATETIME_PROPERTIES:
+        if column in items_df.columns:
+            items_df[column] = pd.to_datetime(items_df[column], utc=True, format="ISO8601")
+    geometries = np.asarray(df.geometry.values[features], dtype=object)
+    items_df["geometry"] = shapely.to_wkb(geometries)
+    if sort_by:
+        items_df = items_df.sort_values(sort_by, kind="stable")
+
+    # The columns whose values have different types in different items (e.g. an int property
+    # that is a string in some item) cannot be stored as a parquet type, so they are stored as JSON
+    arrays = list()
+    for name in items_df.columns:
+        try:
+            arrays.append(pa.array(items_df[name], from_pandas=True))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            values = [None if is_null(value) else json.dumps(value) for value in items_df[name]]
+            arrays.append(pa.array(values, type=pa.string()))
+            metadata["json_columns"].append(name)
+    table = pa.Table.from_arrays(arrays, names=list(items_df.columns))
+    geo = {
+        "version": "1.1.0",
+        "primary_column": "geometry",
+        "columns": {
+            "geometry": {
+                "encoding": "WKB",
+                "geometry_types": sorted(set(g.geom_type for g in geometries if not g.is_empty)),
+                "bbox": list(shapely.total_bounds(geometries)) if len(geometries) else [],
+                "covering": {
+                    "bbox": {
+                        "xmin": ["bbox", "xmin"],
+                        "ymin": ["bbox", "ymin"],
+                        "xmax": ["bbox", "xmax"],
+                        "ymax": ["bbox", "ymax"],
+                    }
+                },
+            }
+        },
+    }
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or dict()),
+        b"geo": json.dumps(geo).encode(),
+        b"stac-geoparquet": json.dumps(metadata).encode(),
+    })
+    pq.write_table(table, path, row_group_size=row_group_size, compression=compression, write_statistics=True)
+
+
+def read_stac_geoparquet(
+    path: str,
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    datetime: Optional[Tuple[Union[str, pd.Timestamp], Union[str, pd.Timestamp]]] = None,
+    geometry_column: Optional[str] = "geometry",
+) -> STACDataFrame:
+    """
+    Read a GeoParquet file written by to_geoparquet into a STACDataFrame, with the same
+    columns as read_stac. The bbox and datetime filters are pushed down to the parquet
+    reader, that skips the row groups whose statistics do not match
+
+    :param path: path to the GeoParquet file
+    :param bbox: only read the items intersecting this bounding box (xmin, ymin, xmax, ymax)
+    :param datetime: only read the items whose datetime is in this interval (start, end)
+    :param geometry_column: name of the geometry column
+    """
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    filters = None
+    if bbox:
+        xmin, ymin, xmax, ymax = bbox
+        filters = (
+            (pc.field("bbox", "xmin") <= xmax) & (pc.field("bbox", "xmax") >= xmin) &
+            (pc.field("bbox", "ymin") <= ymax) & (pc.field("bbox", "ymax") >= ymin)
+        )
+    if datetime:
+        start, end = [pd.Timestamp(value) for value in datetime]
+        start = start.tz_localize("UTC") if start.tzinfo is None else start
+        end = end.tz_localize("UTC") if end.tzinfo is None else end
+        interval = (pc.field("datetime") >= start) & (pc.field("datetime") <= end)
+        filters = interval if filters is None else filters & interval
+    table = pq.read_table(path, filters=filters)
+    metadata = json.loads(table.schema.metadata[b"stac-geoparquet"])
+
+    objects = metadata["catalogs"] + list(metadata["collections"].values())
+    columns = {name: table.column(name).to_pylist() for name in table.column_names if name != "geometry"}
+    for name in metadata.get("json_columns", list()):
+        columns[name] = [None if value is None else json.loads(value) for value in columns[name]]
+    nulls = columns.pop(NULLS_COLUMN, [None] * table.num_rows)
+    properties = [name for name in columns if name not in ITEM_FIELDS]
+    for i in range(table.num_rows):
+        item = {field: columns[field][i] for field in ITEM_FIELDS if field in columns}
+        box = item.get("bbox")
+        item["bbox"] = [box["xmin"], box["ymin"], box["xmax"], box["ymax"]] if box else None
+        item["properties"] = {
+            name: format_datetime(columns[name][i]) if name in DATETIME_PROPERTIES else columns[name][i]
+            for name in properties
+        }
+        item = strip_nulls(item)
+        for path in nulls[i] or list():
+            set_value(item, json.loads(path), None)
+        objects.append(item)
+
+    # Catalogs and collections have no geometry
+    geometries = np.array([shapely.Polygon()] * len(objects), dtype=object)
+    if table.num_rows:
+        geometries[-table.num_rows:] = shapely.from_wkb(table.column("geometry").to_numpy(zero_copy_only=False))
+    return objects_to_stac_dataframe(objects, geometry_column, geometries)
+
+
+def format_datetime(value) -> Optional[str]:
+    """
+    Format a datetime as in STAC, as pystac does
+
+    :param value: datetime to format
+    """
+    if value is None:
+        return None
+    return value.isoformat().replace("+00:00", "Z")
+
+
+def strip_nulls(value):
+    """
+    Remove the null values of the dicts, added for the fields missing in some rows
+
+    :param value: value to strip
+    """
+    if isinstance(value, dict):
+        return {k: strip_nulls(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list):
+        return [strip_nulls(v) for v in value]
+    return value
+
+
+def find_nulls(value, path=()):
+    """
+    Find the paths of the null values of a JSON value
+
+    :param value: value to search
+    :param path: path of the value
+    """
+    if value is None:
+        yield list(path)
+    elif isinstance(value, dict):
+        for k, v in value.items():
+            yield from find_nulls(v, path + (k,))
+    elif isinstance(value, list):
+        for i, v in enumerate(value):
+            yield from find_nulls(v, path + (i,))
+
+
+def set_value(value, path: list, new_value) -> None:
+    """
+    Set a value of a JSON value given its path
+
+    :param value: value to modify
+    :param path: path of the value to set
+    :param new_value: value to set
+    """
+    for key in path[:-1]:
+        value = value[key]
+    value[path[-1]] = new_value
+
+
+def is_null(value) -> bool:
+    """
+    Check if a value of a column is null, as None or as the NaN of the missing values
+
+    :param value: value to check
+    """
+    return value is None or (isinstance(value, float) and np.isnan(value))
@@ -7,6 +7,7 @@ from typing import Union
 import pandas as pd
 import pystac
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor
 
 from os.path import join, basename, dirname
 from shutil import rmtree
@@ -26,7 +27,10 @@ from .assets import STACAssetGenerator
 from .dataframe_labeling import LabelingStrategy, UnlabeledStrategy
 from .utils import (format_time_acquired, 
                     cut_images, 
-                    get_item_metadata,
+                    get_raster_info,
+                    read_raster_metadata,
+                    metadata_cache,
+                    add_items_to_collection,
                     get_all_images_in_path)
 from .extensions import (type_stac_extensions_dict, 
                          SUPPORTED_EXTENSIONS, 
@@ -43,6 +47,8 @@ class STACGenerator:
         item_parser: STACIdParser = StructuredParser,
         assets_generator: STACAssetGenerator = STACAssetGenerator,
         labeling_strategy: LabelingStrategy = UnlabeledStrategy,
+        workers: int = 1,
+        metadata_cache_path: Optional[str] = None,
     ) -> None:
         """
         Initialize the STAC generator
@@ -52,6 +58,8 @@ class STACGenerator:
         :param item_parser: parser to get the item ID
         :param assets_generator: generator to generate the assets
         :param labeling_strategy: strategy to label the images
+        :param workers: number of processes reading the rasters and their metadata. The items are still assembled in this process, in the same order
+        :param metadata_cache_path: JSON file to persist the metadata read from the rasters, so the unchanged rasters are not read again in the next runs
         """
         self._image_format = image_format
         self._catalog_type = catalog_type
@@ -60,6 +68,10 @@ class STACGenerator:
         self._labeling_strategy = labeling_strategy()
         self._extensions_dict: dict = type_stac_extensions_dict
         self._stac_dataframe = pd.DataFrame()
+        self._workers = workers
+        self._metadata_cache_path = metadata_cache_path
+        if metadata_cache_path:
+            metadata_cache.load(metadata_cache_path)
 
     def generate_stac_metadata(
         self,
@@ -198,11 +210,13 @@ class STACGenerator:
         :param collection_path: path to the collection
         """
         # Get the images of the collection, as they are needed to obtain the collection extent
-        collection_images = self._stac_dataframe[
-            self._stac_dataframe["collection"] == collection_path
-        ]["image"]
+        in_collection = self._stac_dataframe["collection"] == collection_path
+        collection_df = self._stac_dataframe[in_collection]
+        collection_images = collection_df["image"]
+        # Read the bounding box and metadata of every raster, in parallel if required
+        rasters_info = self._get_rasters_info(collection_images)
         # Get the collection extent
-        extent = get_collection_extent(collection_images)
+        extent = get_collection_extent(collection_images, rasters_info)
         # Create the collection
         collection_id = basename(collection_path)
         collection = pystac.Collection(
@@ -210,35 +224,57 @@ class STACGenerator:
         )
 
         print(f"Generating {collection_id} collection...")
-        for image in tqdm(collection_images):
-            # Create the item
-            item = self.create_stac_item(image)
-            # Add the item to the collection
-            collection.add_item(item)
+        items = list()
+        for i, (image, raster_info) in enumerate(tqdm(zip(collection_images, rasters_info),
+                                                      total=len(collection_images))):
+            # Create the item from its row of the dataframe
+            item = self.create_stac_item(image, 
+                                         raster_info=raster_info, 
+                                         item_info=collection_df.iloc[[i]])
+            items.append(item)
+        # Add the items to the collection
+        add_items_to_collection(collection, items)
+        # Add the items IDs to the dataframe, to be able to get them later
+        self._stac_dataframe.loc[in_collection, "id"] = [item.id for item in items]
+        if self._metadata_cache_path:
+            metadata_cache.save(self._metadata_cache_path)
 
         # Return the collection
         return collection
 
-    def create_stac_item(self, raster_path: str, kwargs: dict = {}) -> pystac.Item:
+    def _get_rasters_info(self, rasters: pd.Series) -> list:
+        """
+        Get the bounding box and metadata of the given rasters, reading them in a
+        process pool if there is more than one worker
+
+        :param rasters: rasters paths
+        """
+        pending = [raster for raster in rasters if not metadata_cache.contains(raster)]
+        if self._workers > 1 and len(pending) > 1:
+            # Read the rasters in the workers and add what they read to the cache
+            chunksize = max(1, len(pending) // (self._workers * 4))
+            with ProcessPoolExecutor(self._workers) as executor:
+                for entries in executor.map(read_raster_metadata, pending, chunksize=chunksize):
+                    metadata_cache.update(entries)
+        return [get_raster_info(raster) for raster in rasters]
+
+    def create_stac_item(self, 
+                         raster_path: str, 
+                         kwargs: dict = {}, 
+                         raster_info: Optional[tuple] = None,
+                         item_info: Optional[pd.DataFrame] = None
+                         ) -> pystac.Item:
         """
         Create a STAC item from a directory containing the raster files and the metadata.json file
 
         :param raster_path: path to the raster file
+        :param raster_info: bounding box and metadata of the raster, as returned by get_raster_info. Read from the raster if not given
+        :param item_info: row of the STAC dataframe of the raster. If not given, it is searched in the dataframe and the item ID is added to it
         """
-        # Check if there is any metadata file in the directory associated to the raster file
-        metadata = get_item_metadata(raster_path)
-
-        # Obtain the bounding box from the raster
-        with rasterio.open(raster_path) as ds:
-            bounds = ds.bounds
-            dst_crs = "EPSG:4326"
-            try:
-                left, bottom, right, top = rasterio.warp.transform_bounds(
-                    ds.crs, dst_crs, *bounds
-                )
-            except rasterio.errors.CRSError:
-                # If the raster has no crs, set the bounding box to 0
-                left, bottom, right, top = 0, 0, 0, 0
+        # Obtain the bounding box from the raster and the metadata file in its directory, if any
+        bbox, metadata = raster_info if raster_info else get_raster_info(raster_path)
+        # If the raster has no crs, set the bounding box to 0
+        left, bottom, right, top = bbox if bbox else (0, 0, 0, 0)
 
         # Create bbox
         bbox = [left, bottom, right, top]
@@ -271,18 +307,21 @@ class STACGenerator:
 
         # Obtain the item ID. The approach depends on the item parser
         id = self._item_parser.get_item_id(raster_path)
-        # Add the item ID to the dataframe, to be able to get it later
-        self._stac_dataframe.loc[
-            self._stac_dataframe["image"] == raster_path, "id"
-        ] = id
-        
+        if item_info is None:
+            # Add the item ID to the dataframe, to be able to get it later
+            self._stac_dataframe.loc[
+                self._stac_dataframe["image"] == raster_path, "id"
+            ] = id
+            # Get the item info, from the raster path
+            item_info = self._stac_dataframe[self._stac_dataframe["image"] == raster_path]
+        else:
+            item_info = item_info.assign(id=id)
+
         # Instantiate pystac item
         item = pystac.Item(
             id=id, geometry=geom, bbox=bbox, datetime=time_acquired, **params
         )
 
-        # Get the item info, from the raster path
-        item_info = self._stac_dataframe[self._stac_dataframe["image"] == raster_path]
         # Get the extensions of the item
         extensions = item_info["extensions"].values
         extensions = extensions[0] if extensions else None
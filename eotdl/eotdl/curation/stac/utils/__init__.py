@@ -2,4 +2,6 @@ from .time import *
 from .stac import *
 from .geometry import *
 from .metadata import *
-from .paths import *
\ No newline at end of file
+from .paths import *
+from .raster import *
+from .cache import *
@@ -0,0 +1,132 @@
+'''
+Metadata cache for the files read while generating STAC metadata
+'''
+
+import os
+import json
+
+from os.path import abspath, exists
+from typing import Callable
+
+import rasterio
+from rasterio.warp import transform_bounds
+
+
+class MetadataCache:
+    """
+    Cache of the metadata read from rasters headers and sidecar JSON files, so every
+    file is read once. The entries are keyed by the file path and invalidated when
+    its modification time or size change, and can be persisted to a JSON file to
+    skip the reads on the next runs.
+    """
+    def __init__(self) -> None:
+        self._entries = dict()
+
+    def get(self, path: str, read: Callable[[str], dict]) -> dict:
+        """
+        Get the metadata of a file, reading it if it is not cached or has changed
+
+        :param path: path to the file
+        :param read: function reading the metadata of the file
+        """
+        key = abspath(path)
+        stat = os.stat(key)
+        entry = self._entries.get(key)
+        if not self._is_valid(entry, stat):
+            entry = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'data': read(key)}
+            self._entries[key] = entry
+        return entry['data']
+
+    def contains(self, path: str) -> bool:
+        """
+        Check if the metadata of a file is cached and the file has not changed
+
+        :param path: path to the file
+        """
+        key = abspath(path)
+        return self._is_valid(self._entries.get(key), os.stat(key))
+
+    def _is_valid(self, entry: dict, stat: os.stat_result) -> bool:
+        return entry is not None and entry['mtime'] == stat.st_mtime_ns and entry['size'] == stat.st_size
+
+    def entries(self, paths: list) -> dict:
+        """
+        Get the cached entries of the given files
+
+        :param paths: paths to the files
+        """
+        keys = [abspath(path) for path in paths]
+        return {key: self._entries[key] for key in keys if key in self._entries}
+
+    def update(self, entries: dict) -> None:
+        """
+        Add entries obtained from another cache, e.g. in a worker process
+
+        :param entries: entries to add
+        """
+        self._entries.update(entries)
+
+    def clear(self) -> None:
+        """
+        Remove all the entries
+        """
+        self._entries.clear()
+
+    def load(self, path: str) -> None:
+        """
+        Load the entries persisted in a JSON file, if it exists
+
+        :param path: path to the JSON file
+        """
+        if exists(path):
+            with open(path, 'r') as f:
+                self._entries.update(json.load(f))
+
+    def save(self, path: str) -> None:
+        """
+        Persist the entries to a JSON file
+
+        :param path: path to the JSON file
+        """
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self._entries, f)
+        os.replace(path + '.tmp', path)
+
+
+def read_raster_header(raster_path: str) -> dict:
+    """
+    Read the header of a raster, with the bounding box in EPSG:4326
+
+    :param raster_path: path to the raster file
+    """
+    with rasterio.open(raster_path) as ds:
+        try:
+            bbox = list(transform_bounds(ds.crs, 'EPSG:4326', *ds.bounds))
+        except rasterio.errors.CRSError:
+            # The raster has no CRS
+            bbox = None
+        return {
+            'crs': ds.crs.to_wkt() if ds.crs else None,
+            'epsg': ds.crs.to_epsg() if ds.crs else None,
+            'bounds': list(ds.bounds),
+            'bbox': bbox,
+            'transform': list(ds.transform),
+            'shape': list(ds.shape),
+            'indexes': list(ds.indexes),
+            'dtypes': list(ds.dtypes),
+            'nodatavals': list(ds.nodatavals),
+            'res': list(ds.res),
+        }
+
+
+def read_json(json_path: str) -> dict:
+    """
+    Read a JSON file
+
+    :param json_path: path to the JSON file
+    """
+    with open(json_path, 'r') as f:
+        return json.load(f)
+
+
+metadata_cache = MetadataCache()
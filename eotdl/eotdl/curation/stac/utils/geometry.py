@@ -2,6 +2,9 @@
 Geometry utils
 '''
 
+import json
+import numpy as np
+
 from pandas import isna
 
 
@@ -19,4 +22,130 @@ def convert_df_geom_to_shape(row):
     else:
         wkt = "POLYGON EMPTY"
 
-    return wkt
\ No newline at end of file
+    return wkt
+
+def geojson_to_geometries(geometries: list) -> np.ndarray:
+    """
+    Convert GeoJSON geometries to shapely geometries in a single vectorized call.
+    The missing geometries, e.g. of catalogs and collections, are converted to empty polygons
+
+    :param geometries: GeoJSON geometries
+    """
+    import shapely
+
+    geometries = list(geometries)
+    valid = [i for i, geometry in enumerate(geometries) if isinstance(geometry, dict)]
+    shapes = np.array([shapely.Polygon()] * len(geometries), dtype=object)
+    if valid:
+        shapes[valid] = shapely.from_geojson([json.dumps(geometries[i]) for i in valid])
+    return shapes
+
+
+def bboxes_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Calculate the intersection over union of pairs of bounding boxes
+
+    :param a: first bounding boxes as (xmin, ymin, xmax, ymax) rows
+    :param b: second bounding boxes as (xmin, ymin, xmax, ymax) rows
+
+    :return: intersection over union of every pair
+    """
+    width = np.clip(np.minimum(a[:, 2], b[:, 2]) - np.maximum(a[:, 0], b[:, 0]), 0, None)
+    height = np.clip(np.minimum(a[:, 3], b[:, 3]) - np.maximum(a[:, 1], b[:, 1]), 0, None)
+    intersection = width * height
+    areas_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    areas_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = areas_a + areas_b - intersection
+    with np.errstate(divide="ignore", invalid="ignore"):
+        iou = np.where(union > 0, intersection / union, 0.0)
+    # Boxes without area (e.g. rasters without CRS) only match if they are equal
+    iou[(union == 0) & (a == b).all(axis=1)] = 1.0
+    return iou
+
+
+def find_overlapping_bboxes(bboxes: list, 
+                            iou_threshold: float = 0.9, 
+                            chunk_size: int = 100000
+                            ) -> tuple:
+    """
+    Find the pairs of bounding boxes whose intersection over union is at least the given
+    threshold, querying an STRtree so only the intersecting boxes are compared
+
+    :param bboxes: bounding boxes as (xmin, ymin, xmax, ymax)
+    :param iou_threshold: minimum intersection over union of the pairs
+    :param chunk_size: number of boxes queried at once, to bound the memory used
+
+    :return: indexes of the first and second boxes of every pair (first < second) and their IoU
+    """
+    import shapely
+
+    bounds = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    tree = shapely.STRtree(shapely.box(*bounds.T))
+    pairs = list()
+    for start in range(0, len(bounds), chunk_size):
+        query, candidates = tree.query(shapely.box(*bounds[start:start + chunk_size].T))
+        query += start
+        # Every pair is found twice, keep it once
+        keep = query < candidates
+        first, second = query[keep], candidates[keep]
+        iou = bboxes_iou(bounds[first], bounds[second])
+        keep = iou >= iou_threshold
+        pairs.append((first[keep], second[keep], iou[keep]))
+    if not pairs:
+        return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+    first, second, iou = (np.concatenate(values) for values in zip(*pairs))
+    order = np.lexsort((first, second))
+    return first[order], second[order], iou[order]
+
+
+def group_pairs(first: np.ndarray, second: np.ndarray) -> list:
+    """
+    Group the pairs of indexes in clusters of connected indexes
+
+    :param first: first index of every pair
+    :param second: second index of every pair
+
+    :return: clusters of indexes, with more than one index each, sorted
+    """
+    parents = dict()
+
+    def find(i):
+        parents.setdefault(i, i)
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, j in zip(first.tolist(), second.tolist()):
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parents[max(root_i, root_j)] = min(root_i, root_j)
+    clusters = dict()
+    for i in parents:
+        clusters.setdefault(find(i), list()).append(i)
+    return sorted(sorted(cluster) for cluster in clusters.values())
+
+
+def group_overlapping_bboxes(bboxes: list, iou_threshold: float = 0.9) -> list:
+    """
+    Group the bounding boxes in clusters of boxes connected by an intersection over union
+    of at least the given threshold. Equal boxes are grouped before searching the pairs,
+    so clusters of identical boxes (e.g. without area) do not produce a pair per couple
+
+    :param bboxes: bounding boxes as (xmin, ymin, xmax, ymax)
+    :param iou_threshold: minimum intersection over union of the connected boxes
+
+    :return: clusters of indexes, with more than one index each, sorted
+    """
+    bounds = np.asarray(bboxes, dtype=float).reshape(-1, 4)
+    if not len(bounds):
+        return list()
+    unique, inverse = np.unique(bounds, axis=0, return_inverse=True)
+    first, second, _ = find_overlapping_bboxes(unique, iou_threshold)
+    labels = np.arange(len(unique))
+    for cluster in group_pairs(first, second):
+        labels[cluster] = cluster[0]
+    labels = labels[inverse.reshape(-1)]
+    order = np.argsort(labels, kind="stable")
+    groups = np.split(order, np.flatnonzero(np.diff(labels[order])) + 1)
+    return sorted(sorted(group.tolist()) for group in groups if len(group) > 1)
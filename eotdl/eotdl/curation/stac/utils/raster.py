@@ -0,0 +1,55 @@
+'''
+Raster utils
+'''
+
+from typing import Optional, Tuple
+
+from .cache import metadata_cache, read_raster_header
+from .metadata import get_item_metadata, get_item_metadata_path
+
+
+def get_raster_metadata(raster_path: str) -> dict:
+    """
+    Get the header of a raster (CRS, bounds, transform, shape, dtypes, nodata and 
+    resolution), reading it only the first time
+
+    :param raster_path: path to the raster file
+    """
+    return metadata_cache.get(raster_path, read_raster_header)
+
+
+def get_raster_bbox(raster_path: str) -> Optional[list]:
+    """
+    Get the bounding box of a raster in EPSG:4326
+
+    :param raster_path: path to the raster file
+
+    :return: bounding box, or None if the raster has no CRS
+    """
+    return get_raster_metadata(raster_path)['bbox']
+
+
+def get_raster_info(raster_path: str) -> Tuple[Optional[list], Optional[dict]]:
+    """
+    Get the bounding box and the metadata of a raster
+
+    :param raster_path: path to the raster file
+
+    :return: bounding box and metadata of the raster
+    """
+    return get_raster_bbox(raster_path), get_item_metadata(raster_path)
+
+
+def read_raster_metadata(raster_path: str) -> dict:
+    """
+    Read the header and the metadata of a raster, returning the cache entries of the
+    files read. It only depends on the raster path, so it can be run in a worker process
+
+    :param raster_path: path to the raster file
+    """
+    get_raster_info(raster_path)
+    paths = [raster_path]
+    metadata_path = get_item_metadata_path(raster_path)
+    if metadata_path:
+        paths.append(metadata_path)
+    return metadata_cache.entries(paths)
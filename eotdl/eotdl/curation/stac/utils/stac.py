@@ -2,10 +2,13 @@
 STAC utils
 '''
 
+import json
 import pystac
 
 from os.path import dirname, join, abspath
-from typing import Union, Optional
+from typing import Union, Optional, Iterator, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pystac.utils import is_absolute_href
 from tqdm import tqdm
 from traceback import print_exc
 from shutil import rmtree
@@ -41,6 +44,102 @@ def get_all_children(obj: pystac.STACObject) -> list:
     return children
 
 
+def add_items_to_collection(collection: pystac.Collection, items: list) -> None:
+    """
+    Add items to a collection, as pystac.Collection.add_item does. Adding them one by one
+    searches the self link among all the links of the collection for every item, which is
+    quadratic on the number of items while the collection has no self HREF
+
+    :param collection: collection to add the items to
+    :param items: items to add
+    """
+    if collection.get_self_href() is not None:
+        # The item HREFs are set from the collection HREF
+        for item in items:
+            collection.add_item(item)
+        return
+    root = collection.get_root()
+    for item in items:
+        item.set_root(root)
+        item.set_parent(collection)
+        collection.add_link(pystac.Link.item(item))
+        item.set_collection(collection)
+
+
+def read_stac_json(path: str) -> dict:
+    """
+    Read a STAC file as a dictionary, with the asset HREFs made absolute and the self
+    link added, as pystac does, but without creating the pystac object
+
+    :param path: path to the STAC file
+    """
+    path = abspath(path)
+    with open(path, 'r') as f:
+        obj = json.load(f)
+    for asset in obj.get('assets', {}).values():
+        href = asset.get('href')
+        if href and not is_absolute_href(href):
+            asset['href'] = abspath(join(dirname(path), href))
+    links = obj.setdefault('links', [])
+    if not any(link.get('rel') == 'self' for link in links):
+        links.append({'rel': 'self', 'href': path, 'type': 'application/json'})
+    return obj
+
+
+def get_linked_paths(obj: dict, rel: str) -> list:
+    """
+    Get the absolute paths of the links of a STAC dictionary with the given relation
+
+    :param obj: STAC object dictionary, as returned by read_stac_json
+    :param rel: relation of the links, e.g. child or item
+    """
+    self_href = next(link['href'] for link in obj['links'] if link.get('rel') == 'self')
+    paths = list()
+    for link in obj['links']:
+        if link.get('rel') == rel:
+            href = link['href']
+            paths.append(href if is_absolute_href(href) else abspath(join(dirname(self_href), href)))
+    return paths
+
+
+def walk_stac_catalog(catalog_path: str) -> Tuple[list, list]:
+    """
+    Read the catalogs and collections of a STAC catalog, and get the paths of all its items
+
+    :param catalog_path: path to the root catalog
+
+    :return: catalogs and collections dictionaries, and items paths
+    """
+    catalogs = [read_stac_json(catalog_path)]
+    items = list()
+    # Catalogs first, then the items of each catalog in the same order
+    for catalog in catalogs:
+        catalogs.extend(read_stac_json(path) for path in get_linked_paths(catalog, 'child'))
+        items.extend(get_linked_paths(catalog, 'item'))
+    return catalogs, items
+
+
+def iter_stac_objects(catalog_path: str, 
+                      chunk_size: int = 10000,
+                      workers: int = 8
+                      ) -> Iterator[list]:
+    """
+    Read the objects of a STAC catalog as dictionaries, in lists of chunk_size objects.
+    The catalogs and collections come first, and the items files of every chunk are
+    read in a thread pool
+
+    :param catalog_path: path to the root catalog
+    :param chunk_size: maximum number of objects of every list
+    :param workers: number of threads reading the items
+    """
+    catalogs, items = walk_stac_catalog(catalog_path)
+    for i in range(0, len(catalogs), chunk_size):
+        yield catalogs[i:i + chunk_size]
+    with ThreadPoolExecutor(workers) as executor:
+        for i in range(0, len(items), chunk_size):
+            yield list(executor.map(read_stac_json, items[i:i + chunk_size]))
+
+
 def make_links_relative_to_path(path: str,
                                 catalog: Union[pystac.Catalog, str],
                                 ) -> pystac.Catalog:
@@ -1,12 +1,17 @@
 import os
+import hashlib
+import tarfile
 from pathlib import Path
 from tqdm import tqdm
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from ..auth import with_auth
 from .retrieve import retrieve_dataset, retrieve_dataset_files
 from .utils import calculate_checksum
 from ..repos import FilesAPIRepo
 
+ARCHIVE_MANIFEST = "checksums.sha1"
+
 
 @with_auth
 def download_dataset(
@@ -18,24 +23,16 @@ def download_dataset(
     assets=False,
     force=False,
     verbose=False,
+    workers=4,
+    archive=False,
+    compression=None,
     user=None,
 ):
+    if compression and not archive:
+        raise Exception("Only archives can be downloaded with compression")
     dataset = retrieve_dataset(dataset_name)
-    if version is None:
-        version = sorted(dataset["versions"], key=lambda v: v["version_id"])[-1][
-            "version_id"
-        ]
-    else:
-        assert version in [
-            v["version_id"] for v in dataset["versions"]
-        ], f"Version {version} not found"
-    download_base_path = os.getenv(
-        "EOTDL_DOWNLOAD_PATH", str(Path.home()) + "/.cache/eotdl/datasets"
-    )
-    if path is None:
-        download_path = download_base_path + "/" + dataset_name + "/v" + str(version)
-    else:
-        download_path = path + "/" + dataset_name + "/v" + str(version)
+    version = get_version(dataset, version)
+    download_path = get_download_path(dataset_name, path) + "/v" + str(version)
     # check if dataset already exists
     if os.path.exists(download_path) and not force:
         os.makedirs(download_path, exist_ok=True)
@@ -59,24 +56,32 @@ def download_dataset(
             #     user,
             # )
             # return Outputs(dst_path=dst_path)
-        dataset_files = retrieve_dataset_files(dataset["id"], version)
-        repo = FilesAPIRepo()
-        for file in tqdm(dataset_files, disable=verbose, unit="file"):
-            filename, file_version = file["filename"], file["version"]
-            if verbose:
-                logger(f"Downloading {file['filename']}...")
-            dst_path = repo.download_file(
+        if archive:
+            download_archive(
                 dataset["id"],
-                filename,
-                user["id_token"],
+                version,
                 download_path,
-                file_version,
+                user["id_token"],
+                verbose,
+                compression,
             )
-            # if calculate_checksum(dst_path) != checksum:
-            #     logger(f"Checksum for {file} does not match")
-            if verbose:
-                logger(f"Done")
-        return "/".join(dst_path.split("/")[:-1])
+            return download_path
+        dataset_files = list(retrieve_dataset_files(dataset["id"], version))
+        errors = download_files(
+            dataset["id"],
+            dataset_files,
+            download_path,
+            user["id_token"],
+            workers,
+            verbose,
+            logger,
+        )
+        if errors:
+            raise Exception(
+                f"{len(errors)} of {len(dataset_files)} files could not be downloaded:\n"
+                + "\n".join(f"- {filename}: {error}" for filename, error in errors)
+            )
+        return download_path
     else:
         raise NotImplementedError("Downloading a STAC dataset is not implemented")
     #     logger("Downloading STAC metadata...")
@@ -109,6 +114,167 @@ def download_dataset(
     #     return Outputs(dst_path=path)
 
 
+def get_version(dataset, version=None):
+    if version is None:
+        return sorted(dataset["versions"], key=lambda v: v["version_id"])[-1][
+            "version_id"
+        ]
+    assert version in [
+        v["version_id"] for v in dataset["versions"]
+    ], f"Version {version} not found"
+    return version
+
+
+def get_download_path(dataset_name, path=None):
+    if path is None:
+        path = os.getenv(
+            "EOTDL_DOWNLOAD_PATH", str(Path.home()) + "/.cache/eotdl/datasets"
+        )
+    return path + "/" + dataset_name
+
+
+def download_files(
+    dataset_id,
+    files,
+    download_path,
+    id_token,
+    workers=4,
+    verbose=False,
+    logger=None,
+    resume=False,
+):
+    # download files concurrently through a shared keep-alive session,
+    # returning the (filename, error) pairs of the files that failed.
+    # with resume, partial downloads are continued and verified before being moved in place
+    repo = FilesAPIRepo()
+    workers = max(1, workers)
+    session = repo.create_session(workers)
+    total_size = sum(f.get("size", 0) for f in files)
+    progress_bar = tqdm(
+        total=total_size if total_size > 0 else None,
+        unit="iB",
+        unit_scale=True,
+        unit_divisor=1024,
+        disable=verbose,
+    )
+
+    def download_file(file):
+        if verbose:
+            logger(f"Downloading {file['filename']}...")
+        dst_path = repo.download_file(
+            dataset_id,
+            file["filename"],
+            id_token,
+            download_path,
+            file["version"],
+            session=session,
+            callback=progress_bar.update,
+            resume=resume,
+        )
+        if not resume:
+            return dst_path
+        if file["checksum"] and calculate_checksum(dst_path) != file["checksum"]:
+            # the partial file may belong to a different version, start over once
+            os.remove(dst_path)
+            dst_path = repo.download_file(
+                dataset_id,
+                file["filename"],
+                id_token,
+                download_path,
+                file["version"],
+                session=session,
+                callback=progress_bar.update,
+                resume=resume,
+            )
+            if calculate_checksum(dst_path) != file["checksum"]:
+                os.remove(dst_path)
+                raise Exception("Checksum mismatch")
+        final_path = dst_path[: -len(".part")]
+        os.replace(dst_path, final_path)
+        return final_path
+
+    errors = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(download_file, file): file for file in files}
+        for future in as_completed(futures):
+            file = futures[future]
+            try:
+                future.result()
+                if verbose:
+                    logger(f"Done {file['filename']}")
+            except Exception as e:
+                errors.append((file["filename"], str(e)))
+    progress_bar.close()
+    session.close()
+    return errors
+
+
+def download_archive(
+    dataset_id, version, download_path, id_token, verbose=False, compression=None
+):
+    # download the whole version as a single tar stream, extracted as it arrives.
+    # with zstd compression the stream is decompressed on the fly (requires zstandard)
+    if compression not in [None, "zstd"]:
+        raise Exception("Only zstd compression is supported")
+    if compression == "zstd":
+        import zstandard
+    response, error = FilesAPIRepo().download_archive(
+        dataset_id, version, id_token, compression=compression
+    )
+    if error:
+        raise Exception(error)
+    os.makedirs(download_path, exist_ok=True)
+    response.raw.decode_content = True
+    with response, tqdm.wrapattr(
+        response.raw, "read", unit="iB", unit_scale=True, disable=verbose
+    ) as stream:
+        if compression == "zstd":
+            stream = zstandard.ZstdDecompressor().stream_reader(stream)
+        checksums, manifest = extract_archive(stream, download_path)
+    if manifest is None:
+        raise Exception("Archive is incomplete, the manifest was not found")
+    mismatches = [
+        filename
+        for filename, checksum in manifest.items()
+        if checksums.get(filename) != checksum
+    ]
+    if mismatches:
+        raise Exception(
+            f"{len(mismatches)} files do not match the archive manifest:\n"
+            + "\n".join(f"- {filename}" for filename in mismatches)
+        )
+    return list(checksums)
+
+
+def extract_archive(stream, download_path, chunk_size=1024 * 1024):
+    # extract a tar stream sequentially, hashing each file while it is written,
+    # returning the computed checksums and the ones in the manifest (the last member)
+    root = os.path.realpath(download_path)
+    checksums, manifest = {}, None
+    with tarfile.open(fileobj=stream, mode="r|") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            src = archive.extractfile(member)
+            if member.name == ARCHIVE_MANIFEST:
+                manifest = {}
+                for line in src.read().decode().splitlines():
+                    checksum, filename = line.split("  ", 1)
+                    manifest[filename] = checksum
+                continue
+            dst_path = os.path.realpath(os.path.join(root, member.name))
+            if not dst_path.startswith(root + os.sep):
+                raise Exception(f"Invalid file path in archive: {member.name}")
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            sha1_hash = hashlib.sha1()
+            with open(dst_path, "wb") as dst:
+                for chunk in iter(lambda: src.read(chunk_size), b""):
+                    sha1_hash.update(chunk)
+                    dst.write(chunk)
+            checksums[member.name] = sha1_hash.hexdigest()
+    return checksums, manifest
+
+
 # @with_auth
 # def download_file_url(url, path, progress=True, logger=None, user=None):
 #     api_repo = APIRepo()
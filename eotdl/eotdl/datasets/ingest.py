@@ -3,25 +3,35 @@ from glob import glob
 import yaml
 from tqdm import tqdm
 import os
+import time
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 from ..auth import with_auth
 from .metadata import Metadata
 from ..repos import DatasetsAPIRepo, FilesAPIRepo
 from .utils import calculate_checksum
+from .retrieve import retrieve_dataset_files
 
+BATCH_BYTES = 1024 * 1024 * 16  # 16 MB
+EXISTING_BATCH_SIZE = 10000
 
-def ingest_dataset(path, verbose=False, logger=print):
+
+def ingest_dataset(path, verbose=False, logger=print, workers=4, presigned=False):
     path = Path(path)
     if not path.is_dir():
         raise Exception("Path must be a folder")
     # if "catalog.json" in [f.name for f in path.iterdir()]:
     #     return ingest_stac(path / "catalog.json", logger)
-    return ingest_folder(path, verbose, logger)
+    return ingest_folder(path, verbose, logger, workers, presigned)
 
 
 @with_auth
-def ingest_folder(folder, verbose=False, logger=print, user=None):
-    repo, files_repo = DatasetsAPIRepo(), FilesAPIRepo()
+def ingest_folder(
+    folder, verbose=False, logger=print, workers=4, presigned=False, user=None
+):
+    repo = DatasetsAPIRepo()
     logger(f"Uploading directory {folder}...")
     # get all files in directory recursively
     items = [Path(item) for item in glob(str(folder) + "/**/*", recursive=True)]
@@ -61,24 +71,228 @@ def ingest_folder(folder, verbose=False, logger=print, user=None):
     # upload files
     current_files = []
     if version > 1:
-        current_files, error = files_repo.retrieve_dataset_files(
-            dataset_id, version - 1
+        # the listing is paginated lazily, consume it here so a failure falls back
+        # to uploading every file instead of aborting after the version is created
+        try:
+            current_files = list(retrieve_dataset_files(dataset_id, version - 1))
+        except Exception:
+            current_files = []
+    return ingest_files(
+        items,
+        folder,
+        dataset_id,
+        version,
+        user,
+        current_files,
+        workers,
+        verbose,
+        logger,
+        presigned=presigned,
+    )
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.files = 0
+        self.bytes = 0
+        self.t0 = None
+        self.t1 = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.t0 is None:
+                self.t0 = time.perf_counter()
+
+    def add(self, size):
+        with self.lock:
+            self.files += 1
+            self.bytes += size
+            self.t1 = time.perf_counter()
+
+    def __str__(self):
+        elapsed = (self.t1 - self.t0) if self.t0 and self.t1 else 0
+        mb = self.bytes / 1024 / 1024
+        if elapsed == 0:
+            return f"{self.name}: {self.files} files, {mb:.2f} MB"
+        return f"{self.name}: {self.files} files, {mb:.2f} MB in {elapsed:.2f}s ({mb / elapsed:.2f} MB/s, {self.files / elapsed:.2f} files/s)"
+
+
+def ingest_files(
+    items,
+    folder,
+    dataset_id,
+    version,
+    user,
+    current_files=[],
+    workers=4,
+    verbose=False,
+    logger=print,
+    batch_size=32,
+    presigned=False,
+):
+    # files are hashed in a process pool and handed to a pool of uploaders as soon as
+    # their checksum is ready. the number of files in flight is bounded, so hashing
+    # cannot run ahead of the uploads and memory stays constant for huge folders.
+    # small new files are grouped in batches that the api registers in one write.
+    # returns a summary with the number of files uploaded and linked to the version,
+    # since the responses of the uploads arrive in no particular order.
+    # the parts of the large files share one pool, so at most `workers` parts are in
+    # memory whatever the number of large files uploaded at the same time.
+    workers, batch_size = max(1, workers), max(1, batch_size)
+    slots = threading.BoundedSemaphore(2 * workers * batch_size)
+    hashing, uploading = StageStats("Hashing"), StageStats("Uploading")
+    progress_bar = tqdm(
+        total=len(items), desc="Uploading files", unit="files", disable=verbose
+    )
+    errors = []
+    files_repo = FilesAPIRepo()
+    # unchanged files are linked to the new version in bulk instead of uploaded
+    current_files = {(f["filename"], f["checksum"]): f for f in current_files}
+    existing = []
+    batch, batch_bytes, batch_lock = [], [0], threading.Lock()
+
+    def get_parent(item):
+        return str(item.relative_to(folder).parent)
+
+    def get_filename(item):
+        return str(item.relative_to(folder)).replace(os.sep, "/")
+
+    def is_batched(item):
+        return batch_size > 1 and os.path.getsize(item) < BATCH_BYTES
+
+    def upload_batch(items):
+        uploading.start()
+        data, error = files_repo.ingest_files_batch(
+            [str(item) for item, _ in items],
+            dataset_id,
+            version,
+            [get_parent(item) for item, _ in items],
+            [checksum for _, checksum in items],
+            user["id_token"],
         )
         if error:
-            # print("retreive dataset files error: ", error)
-            current_files = []
-    for item in tqdm(items, desc="Uploading files", unit="files", disable=verbose):
+            raise Exception(error)
+        for item, _ in items:
+            uploading.add(os.path.getsize(item))
+        return data
+
+    def on_batch_uploaded(items, future):
+        try:
+            future.result()
+        except Exception as e:
+            errors.extend((str(item.relative_to(folder)), str(e)) for item, _ in items)
+        progress_bar.update(len(items))
+        for _ in items:
+            slots.release()
+
+    def add_to_batch(item, checksum):
+        with batch_lock:
+            batch.append((item, checksum))
+            batch_bytes[0] += os.path.getsize(item)
+            if len(batch) < batch_size and batch_bytes[0] < BATCH_BYTES:
+                return
+        flush_batch()
+
+    def flush_batch():
+        with batch_lock:
+            items = batch[:]
+            batch.clear()
+            batch_bytes[0] = 0
+        if items:
+            future = uploaders.submit(upload_batch, items)
+            future.add_done_callback(lambda f: on_batch_uploaded(items, f))
+
+    def upload(item, checksum):
+        uploading.start()
         data = ingest_file(
             str(item),
             dataset_id,
             version,
-            str(item.relative_to(folder).parent),
+            get_parent(item),
             logger=logger,
             verbose=verbose,
             user=user,
-            current_files=current_files,
+            checksum=checksum,
+            presigned=presigned,
+            parts_executor=parts_uploaders,
         )
-    return data
+        uploading.add(os.path.getsize(item))
+        return data
+
+    def on_uploaded(item, future):
+        try:
+            future.result()
+        except Exception as e:
+            errors.append((str(item.relative_to(folder)), str(e)))
+        progress_bar.update(1)
+        slots.release()
+
+    def on_hashed(item, future):
+        try:
+            checksum = future.result()
+            hashing.add(os.path.getsize(item))
+            current_file = current_files.get((get_filename(item), checksum))
+            if current_file:
+                existing.append((item, current_file["version"], checksum))
+                slots.release()
+                return
+            if is_batched(item):
+                return add_to_batch(item, checksum)
+            upload_future = uploaders.submit(upload, item, checksum)
+            upload_future.add_done_callback(lambda f: on_uploaded(item, f))
+        except Exception as e:
+            errors.append((str(item.relative_to(folder)), str(e)))
+            progress_bar.update(1)
+            slots.release()
+
+    with ThreadPoolExecutor(max_workers=workers) as uploaders, ThreadPoolExecutor(
+        max_workers=workers
+    ) as parts_uploaders:
+        with ProcessPoolExecutor(max_workers=workers) as hashers:
+            for item in items:
+                slots.acquire()  # backpressure: wait for an upload to finish
+                hashing.start()
+                hash_future = hashers.submit(calculate_checksum, str(item))
+                hash_future.add_done_callback(
+                    lambda f, item=item: on_hashed(item, f)
+                )
+        flush_batch()
+    for i in range(0, len(existing), EXISTING_BATCH_SIZE):
+        chunk = existing[i : i + EXISTING_BATCH_SIZE]
+        data, error = files_repo.ingest_existing_files(
+            [
+                {
+                    "filename": get_filename(item),
+                    "file_version": file_version,
+                    "checksum": checksum,
+                }
+                for item, file_version, checksum in chunk
+            ],
+            dataset_id,
+            version,
+            user["id_token"],
+        )
+        if error:
+            errors.extend((get_filename(item), error) for item, _, _ in chunk)
+        progress_bar.update(len(chunk))
+    if existing:
+        logger(f"{len(existing)} unchanged files linked to version {version}")
+    progress_bar.close()
+    logger(str(hashing))
+    logger(str(uploading))
+    if errors:
+        raise Exception(
+            f"{len(errors)} of {len(items)} files could not be ingested:\n"
+            + "\n".join(f"- {filename}: {error}" for filename, error in errors)
+        )
+    return {
+        "dataset_id": dataset_id,
+        "version": version,
+        "uploaded": len(items) - len(existing),
+        "linked": len(existing),
+    }
 
 
 def ingest_file(
@@ -90,7 +304,10 @@ def ingest_file(
     verbose=True,
     root=None,
     user=None,
-    current_files=[],
+    current_files={},
+    checksum=None,
+    presigned=False,
+    parts_executor=None,
 ):
     id_token = user["id_token"]
     if verbose:
@@ -112,35 +329,32 @@ def ingest_file(
             #     raise Exception(f"Multiple files found for {file}")
             # file_path = file_path[0]
             file_path = str(file_path.absolute())
-        if verbose:
-            logger("Computing checksum...")
-        checksum = calculate_checksum(file_path)
+        if checksum is None:
+            if verbose:
+                logger("Computing checksum...")
+            checksum = calculate_checksum(file_path)
         # check if file already exists in dataset
         filename = os.path.basename(file_path)
         if parent != ".":
             filename = parent + "/" + filename
-        if len(current_files) > 0:
-            matches = [
-                f
-                for f in current_files
-                if f["filename"] == filename and f["checksum"] == checksum
-            ]  # this could slow down ingestion in large datasets... should think of faster search algos, puede que sea mejor hacer el re-upload simplemente...
-            if len(matches) == 1:
-                if verbose:
-                    print(f"File {file_path} already exists in dataset, skipping...")
-                data, error = repo.ingest_existing_file(
-                    filename,
-                    dataset_id,
-                    version,
-                    matches[0]["version"],
-                    id_token,
-                    checksum,
-                )
-                if error:
-                    raise Exception(error)
-                if verbose:
-                    logger("Done")
-                return data
+        # current_files maps (filename, checksum) to the files of the previous version
+        current_file = current_files.get((filename, checksum))
+        if current_file:
+            if verbose:
+                print(f"File {file_path} already exists in dataset, skipping...")
+            data, error = repo.ingest_existing_file(
+                filename,
+                dataset_id,
+                version,
+                current_file["version"],
+                id_token,
+                checksum,
+            )
+            if error:
+                raise Exception(error)
+            if verbose:
+                logger("Done")
+            return data
         if verbose:
             logger("Ingesting file...")
         filesize = os.path.getsize(file_path)
@@ -159,15 +373,27 @@ def ingest_file(
             if verbose:
                 logger("Done")
             return data
-        raise NotImplementedError("Large file ingestion not implemented yet")
-        # # ingest large file
-        # upload_id, parts = repo.prepare_large_upload(
-        #     file_path, dataset_id, checksum, id_token
-        # )
-        # repo.ingest_large_dataset(file_path, upload_id, id_token, parts)
-        # if verbose:
-        #     logger("\nCompleting upload...")
-        # data, error = repo.complete_upload(id_token, upload_id)
+        # ingest large file
+        data, error = repo.prepare_large_upload(filename, dataset_id, checksum, id_token)
+        if error:
+            raise Exception(error)
+        upload_id, parts = data["upload_id"], data.get("parts", [])
+        checksums = ingest_large_file(
+            file_path,
+            filesize,
+            upload_id,
+            parts,
+            id_token,
+            verbose=verbose,
+            logger=logger,
+            presigned=presigned,
+            executor=parts_executor,
+        )
+        if verbose:
+            logger("Completing upload...")
+        data, error = repo.complete_upload(
+            id_token, upload_id, version, checksums, filesize
+        )
     if error:
         raise Exception(error)
     if verbose:
@@ -175,6 +401,100 @@ def ingest_file(
     return data
 
 
+def ingest_large_file(
+    file_path,
+    filesize,
+    upload_id,
+    parts,
+    id_token,
+    workers=4,
+    retries=3,
+    verbose=False,
+    logger=None,
+    presigned=False,
+    executor=None,
+):
+    # upload the parts missing on the server in parallel. each part carries its own
+    # checksum, so a failed part is retried alone and an interrupted upload resumes
+    # from the parts the server already has. returns the md5 of every part, for the
+    # server to check the parts in storage when completing the upload. the parts run
+    # in the given executor if any, shared with the other files being uploaded.
+    repo = FilesAPIRepo()
+    # presigned parts go straight to storage instead of through the api
+    ingest_file_part = repo.ingest_file_part_url if presigned else repo.ingest_file_part
+    chunk_size = repo.get_chunk_size(filesize)
+    total_parts = max(1, -(-filesize // chunk_size))
+    uploaded = set(parts)
+    pending = [part for part in range(1, total_parts + 1) if part not in uploaded]
+    if verbose:
+        logger(
+            f"Uploading {len(pending)} of {total_parts} parts of {chunk_size // 1024 // 1024} MB..."
+        )
+    session = repo.create_session(workers)
+    progress_bar = tqdm(
+        total=filesize,
+        initial=min(filesize, (total_parts - len(pending)) * chunk_size),
+        unit="iB",
+        unit_scale=True,
+        unit_divisor=1024,
+        leave=False,
+        disable=verbose,
+    )
+
+    checksums = [None] * total_parts
+
+    def read_part(part):
+        with open(file_path, "rb") as f:
+            f.seek((part - 1) * chunk_size)
+            chunk = f.read(chunk_size)
+        checksums[part - 1] = hashlib.md5(chunk).hexdigest()
+        return chunk
+
+    def upload_part(part):
+        if part in uploaded:  # already on the server, only its checksum is needed
+            read_part(part)
+            return
+        chunk = read_part(part)
+        checksum = checksums[part - 1]
+        for _ in range(retries):
+            try:
+                data, error = ingest_file_part(
+                    chunk, part, upload_id, checksum, id_token, session
+                )
+            except Exception as e:  # connection errors are retried as well
+                data, error = None, str(e)
+            if not error:
+                progress_bar.update(len(chunk))
+                return data
+        raise Exception(error)
+
+    errors = []
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            executor.submit(upload_part, part): part
+            for part in range(1, total_parts + 1)
+        }
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                errors.append((futures[future], str(e)))
+    finally:
+        if own_executor:
+            executor.shutdown()
+    progress_bar.close()
+    session.close()
+    if errors:
+        raise Exception(
+            f"{len(errors)} parts of {file_path} could not be uploaded, ingest again to resume: "
+            + ", ".join(f"part {part} ({error})" for part, error in sorted(errors))
+        )
+    return checksums
+
+
 # @with_auth
 # def ingest_stac(stac_catalog, logger=None, user=None):
 #     api_repo = APIRepo()
@@ -18,12 +18,20 @@ def retrieve_dataset(name):
     return data
 
 
-def retrieve_dataset_files(dataset_id, version):
+def retrieve_dataset_files(dataset_id, version, prefix=None, page_size=1000):
+    # lazily iterate over the files of the dataset, one page at a time
     repo = FilesAPIRepo()
-    data, error = repo.retrieve_dataset_files(dataset_id, version)
-    if error:
-        raise Exception(error)
-    return data
+    cursor = None
+    while True:
+        data, error = repo.retrieve_dataset_files(
+            dataset_id, version, prefix, cursor, page_size
+        )
+        if error:
+            raise Exception(error)
+        yield from data["files"]
+        cursor = data["next"]
+        if cursor is None:
+            return
 
 
 # def list_datasets(pattern=None):
@@ -0,0 +1,142 @@
+import os
+import re
+import json
+
+from ..auth import with_auth
+from .retrieve import retrieve_dataset, retrieve_dataset_files
+from .download import get_version, get_download_path, download_files
+from .utils import calculate_checksum
+
+MANIFEST = ".eotdl-manifest.json"
+
+
+@with_auth
+def sync_dataset(
+    dataset_name,
+    version=None,
+    path=None,
+    logger=print,
+    verbose=False,
+    workers=4,
+    user=None,
+):
+    dataset = retrieve_dataset(dataset_name)
+    if dataset["quality"] != 0:
+        raise NotImplementedError("Syncing a STAC dataset is not implemented")
+    version = get_version(dataset, version)
+    # same layout as `get`, a version downloaded or synced before is moved to the
+    # requested version and updated in place, so its files are not downloaded again
+    dataset_path = get_download_path(dataset_name, path)
+    download_path = dataset_path + "/v" + str(version)
+    if not os.path.exists(download_path):
+        local_version = find_local_version(dataset_path)
+        if local_version is not None:
+            logger(f"Updating local copy of v{local_version} to v{version}")
+            os.rename(dataset_path + "/v" + str(local_version), download_path)
+    os.makedirs(download_path, exist_ok=True)
+    dataset_files = list(retrieve_dataset_files(dataset["id"], version))
+    manifest = load_manifest(download_path)
+    synced, missing, removed = compare_with_manifest(
+        dataset_files, manifest, download_path
+    )
+    for filename in removed:
+        if os.path.exists(os.path.join(download_path, filename)):
+            os.remove(os.path.join(download_path, filename))
+    logger(
+        f"{len(synced)} files up to date, {len(missing)} to download, {len(removed)} removed"
+    )
+    errors = download_files(
+        dataset["id"],
+        missing,
+        download_path,
+        user["id_token"],
+        workers,
+        verbose,
+        logger,
+        resume=True,
+    )
+    failed = [filename for filename, _ in errors]
+    synced += [f for f in missing if f["filename"] not in failed]
+    save_manifest(download_path, dataset, version, synced)
+    if errors:
+        raise Exception(
+            f"{len(errors)} of {len(missing)} files could not be downloaded, sync again to resume:\n"
+            + "\n".join(f"- {filename}: {error}" for filename, error in errors)
+        )
+    return download_path
+
+
+def find_local_version(dataset_path):
+    # latest version of the dataset downloaded or synced to the path
+    if not os.path.isdir(dataset_path):
+        return None
+    versions = [
+        int(match.group(1))
+        for match in (re.fullmatch(r"v(\d+)", name) for name in os.listdir(dataset_path))
+        if match and os.path.isdir(os.path.join(dataset_path, match.group(0)))
+    ]
+    return max(versions) if versions else None
+
+
+def compare_with_manifest(files, manifest, download_path):
+    # split the remote files into the ones already present locally and the ones to download,
+    # and list the local files that are no longer part of the dataset
+    local_files = manifest["files"] if manifest else {}
+    synced, missing = [], []
+    for file in files:
+        filename = file["filename"]
+        local_path = os.path.join(download_path, filename)
+        if not os.path.exists(local_path):
+            missing.append(file)
+        elif filename in local_files:
+            if local_files[filename]["checksum"] == file["checksum"]:
+                synced.append(file)
+            else:
+                missing.append(file)
+        # file not tracked yet (e.g. from a previous `get`), adopt it if it matches
+        elif file["checksum"] and calculate_checksum(local_path) == file["checksum"]:
+            synced.append(file)
+        else:
+            missing.append(file)
+    filenames = set(f["filename"] for f in files)
+    # without a manifest (e.g. a copy downloaded with `get`) every local file is tracked
+    tracked = local_files if manifest else list_local_files(download_path)
+    removed = [filename for filename in tracked if filename not in filenames]
+    return synced, missing, removed
+
+
+def list_local_files(download_path):
+    # files of a local copy, skipping the manifest and the partial downloads
+    filenames = []
+    for root, _, files in os.walk(download_path):
+        for file in files:
+            if file == MANIFEST or file.endswith((".part", ".tmp")):
+                continue
+            filename = os.path.relpath(os.path.join(root, file), download_path)
+            filenames.append(filename.replace(os.sep, "/"))
+    return filenames
+
+
+def load_manifest(download_path):
+    manifest_path = os.path.join(download_path, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path, "r") as f:
+        return json.load(f)
+
+
+def save_manifest(download_path, dataset, version, files):
+    manifest = {
+        "dataset": dataset["id"],
+        "name": dataset["name"],
+        "version": version,
+        "files": {
+            f["filename"]: {"version": f["version"], "checksum": f["checksum"]}
+            for f in files
+        },
+    }
+    manifest_path = os.path.join(download_path, MANIFEST)
+    with open(manifest_path + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return manifest_path
@@ -9,9 +9,9 @@ import hashlib
 #     return hasher.hexdigest()
 
 
-def calculate_checksum(file_path):
+def calculate_checksum(file_path, chunk_size=1024 * 1024):
     sha1_hash = hashlib.sha1()
-    with open(file_path, "rb") as file:
-        for chunk in iter(lambda: file.read(4096), b""):
+    with open(file_path, "rb", buffering=0) as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
             sha1_hash.update(chunk)
     return sha1_hash.hexdigest()
@@ -1,4 +1,5 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
 from tqdm import tqdm
 
@@ -20,6 +21,25 @@ class FilesAPIRepo(APIRepo):
         )
         return self.format_response(reponse)
 
+    def ingest_files_batch(
+        self, files, dataset_id, version, parents, checksums, id_token
+    ):
+        handles = [open(file, "rb") for file in files]
+        try:
+            reponse = requests.post(
+                self.url + "datasets/" + dataset_id + "/batch",
+                files=[
+                    ("files", (os.path.basename(file), handle))
+                    for file, handle in zip(files, handles)
+                ],
+                data={"version": version, "parents": parents, "checksums": checksums},
+                headers={"Authorization": "Bearer " + id_token},
+            )
+        finally:
+            for handle in handles:
+                handle.close()
+        return self.format_response(reponse)
+
     def ingest_existing_file(
         self,
         filename,
@@ -43,37 +63,117 @@ class FilesAPIRepo(APIRepo):
         )
         return self.format_response(reponse)
 
-    def retrieve_dataset_files(self, dataset_id, version=None):
+    def ingest_existing_files(self, files, dataset_id, version, id_token):
+        reponse = requests.post(
+            self.url + "datasets/" + dataset_id + "/existing",
+            json={"version": version, "files": files},
+            headers={"Authorization": "Bearer " + id_token},
+        )
+        return self.format_response(reponse)
+
+    def retrieve_dataset_files(
+        self, dataset_id, version=None, prefix=None, cursor=None, limit=None
+    ):
         url = self.url + "datasets/" + dataset_id + "/files"
-        if version is not None:
-            url += "?version=" + str(version)
-        response = requests.get(url)
+        params = {"version": version, "prefix": prefix, "cursor": cursor, "limit": limit}
+        response = requests.get(url, params=params)
         return self.format_response(response)
 
-    def download_file(self, dataset_id, file_name, id_token, path, file_version):
+    def create_session(self, max_connections=10):
+        # keep-alive session shared by download workers, limited to max_connections per host
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=max_connections, pool_block=True
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def download_file(
+        self,
+        dataset_id,
+        file_name,
+        id_token,
+        path,
+        file_version,
+        session=None,
+        callback=None,
+        resume=False,
+    ):
         url = self.url + "datasets/" + dataset_id + "/download/" + file_name
         if file_version is not None:
             url += "?version=" + str(file_version)
-        return self.download_file_url(url, file_name, path, id_token)
+        return self.download_file_url(
+            url,
+            file_name,
+            path,
+            id_token,
+            session=session,
+            callback=callback,
+            resume=resume,
+        )
+
+    def download_archive(
+        self, dataset_id, version, id_token, prefix=None, compression=None
+    ):
+        # the archive is built on the fly, the response is returned unread to stream it
+        response = requests.get(
+            self.url + "datasets/" + dataset_id + "/archive",
+            params={"version": version, "prefix": prefix, "compression": compression},
+            headers={"Authorization": "Bearer " + id_token},
+            stream=True,
+        )
+        if response.status_code != 200:
+            return None, response.json()["detail"]
+        return response, None
 
-    def download_file_url(self, url, filename, path, id_token, progress=False):
+    def download_file_url(
+        self,
+        url,
+        filename,
+        path,
+        id_token,
+        progress=False,
+        session=None,
+        callback=None,
+        resume=False,
+    ):
         headers = {"Authorization": "Bearer " + id_token}
         path = f"{path}/{filename}"
         for i in range(1, len(path.split("/")) - 1):
             # print("/".join(path.split("/")[: i + 1]))
             os.makedirs("/".join(path.split("/")[: i + 1]), exist_ok=True)
-        with requests.get(url, headers=headers, stream=True) as r:
+        # when resuming, bytes go to a .part file that is continued with a range request
+        offset = 0
+        if resume:
+            path += ".part"
+            if os.path.exists(path):
+                offset = os.path.getsize(path)
+                headers["Range"] = f"bytes={offset}-"
+        get = session.get if session is not None else requests.get
+        with get(url, headers=headers, stream=True) as r:
+            if offset > 0 and r.status_code == 416:  # partial file already complete
+                if callback is not None:
+                    callback(offset)
+                return path
             r.raise_for_status()
+            mode = "wb"
+            if offset > 0 and r.status_code == 206:
+                mode = "ab"
+                if callback is not None:
+                    callback(offset)
             total_size = int(r.headers.get("content-length", 0))
             block_size = 1024 * 1024 * 10
             if progress:
                 progress_bar = tqdm(
                     total=total_size, unit="iB", unit_scale=True, unit_divisor=1024
                 )
-            with open(path, "wb") as f:
+            with open(path, mode) as f:
                 for chunk in r.iter_content(block_size):
                     if progress:
                         progress_bar.update(len(chunk))
+                    if callback is not None:
+                        callback(len(chunk))
                     if chunk:
                         f.write(chunk)
             if progress:
@@ -90,79 +190,59 @@ class FilesAPIRepo(APIRepo):
     #         return None, reponse.json()["detail"]
     #     return reponse.json(), None
 
-    # def read_in_chunks(self, file_object, CHUNK_SIZE):
-    #     while True:
-    #         data = file_object.read(CHUNK_SIZE)
-    #         if not data:
-    #             break
-    #         yield data
-
-    # def prepare_large_upload(self, file, dataset_id, checksum, id_token):
-    #     filename = Path(file).name
-    #     response = requests.post(
-    #         self.url + f"datasets/{dataset_id}/uploadId",
-    #         json={"name": filename, "checksum": checksum},
-    #         headers={"Authorization": "Bearer " + id_token},
-    #     )
-    #     if response.status_code != 200:
-    #         raise Exception(response.json()["detail"])
-    #     data = response.json()
-    #     upload_id, parts = (
-    #         data["upload_id"],
-    #         data["parts"] if "parts" in data else [],
-    #     )
-    #     return upload_id, parts
-
-    # def get_chunk_size(self, content_size):
-    #     # adapt chunk size to content size to avoid S3 limits (10000 parts, 500MB per part, 5TB per object)
-    #     chunk_size = 1024 * 1024 * 10  # 10 MB (up to 100 GB, 10000 parts)
-    #     if content_size >= 1024 * 1024 * 1024 * 100:  # 100 GB
-    #         chunk_size = 1024 * 1024 * 100  # 100 MB (up to 1 TB, 10000 parts)
-    #     elif content_size >= 1024 * 1024 * 1024 * 1000:  # 1 TB
-    #         chunk_size = 1024 * 1024 * 500  # 0.5 GB (up to 5 TB, 10000 parts)
-    #     return chunk_size
-
-    # def ingest_large_dataset(self, file, upload_id, id_token, parts):
-    #     content_path = os.path.abspath(file)
-    #     content_size = os.stat(content_path).st_size
-    #     chunk_size = self.get_chunk_size(content_size)
-    #     total_chunks = content_size // chunk_size
-    #     # upload chunks sequentially
-    #     pbar = tqdm(
-    #         self.read_in_chunks(open(content_path, "rb"), chunk_size),
-    #         total=total_chunks,
-    #     )
-    #     index = 0
-    #     for chunk in pbar:
-    #         part = index // chunk_size + 1
-    #         offset = index + len(chunk)
-    #         index = offset
-    #         if part not in parts:
-    #             checksum = hashlib.md5(chunk).hexdigest()
-    #             response = requests.post(
-    #                 self.url + "datasets/chunk/" + upload_id,
-    #                 files={"file": chunk},
-    #                 data={"part_number": part, "checksum": checksum},
-    #                 headers={"Authorization": "Bearer " + id_token},
-    #             )
-    #             if response.status_code != 200:
-    #                 raise Exception(response.json()["detail"])
-    #         pbar.set_description(
-    #             "{:.2f}/{:.2f} MB".format(
-    #                 offset / 1024 / 1024, content_size / 1024 / 1024
-    #             )
-    #         )
-    #     pbar.close()
-    #     return
+    def prepare_large_upload(self, filename, dataset_id, checksum, id_token):
+        response = requests.post(
+            self.url + f"datasets/{dataset_id}/uploadId",
+            json={"name": filename, "checksum": checksum},
+            headers={"Authorization": "Bearer " + id_token},
+        )
+        return self.format_response(response)
 
-    # def complete_upload(self, id_token, upload_id):
-    #     r = requests.post(
-    #         self.url + "datasets/complete/" + upload_id,
-    #         headers={"Authorization": "Bearer " + id_token},
-    #     )
-    #     if r.status_code != 200:
-    #         return None, r.json()["detail"]
-    #     return r.json(), None
+    def get_chunk_size(self, content_size):
+        # adapt chunk size to content size to avoid S3 limits (10000 parts, 5 MB to 5 GB per part, 5TB per object)
+        min_chunk_size = 1024 * 1024 * 10  # 10 MB (up to 100 GB, 10000 parts)
+        max_parts = 10000
+        chunk_size = -(-content_size // max_parts)  # ceil
+        chunk_size = -(-chunk_size // (1024 * 1024)) * 1024 * 1024  # round up to MB
+        return min(max(chunk_size, min_chunk_size), 1024 * 1024 * 1024 * 5)
+
+    def ingest_file_part(self, chunk, part, upload_id, checksum, id_token, session=None):
+        post = session.post if session is not None else requests.post
+        response = post(
+            self.url + "datasets/chunk/" + upload_id,
+            files={"file": chunk},
+            data={"part_number": part, "checksum": checksum},
+            headers={"Authorization": "Bearer " + id_token},
+        )
+        return self.format_response(response)
+
+    def ingest_file_part_url(
+        self, chunk, part, upload_id, checksum, id_token, session=None
+    ):
+        # upload the part straight to storage through a presigned url
+        http = session if session is not None else requests
+        response = http.get(
+            self.url + "datasets/chunk/" + upload_id + "/url",
+            params={"part_number": part},
+            headers={"Authorization": "Bearer " + id_token},
+        )
+        data, error = self.format_response(response)
+        if error:
+            return None, error
+        response = http.put(data["url"], data=chunk)
+        if response.status_code != 200:
+            return None, response.text
+        if response.headers.get("ETag", "").strip('"') != checksum:
+            return None, "Checksum mismatch."
+        return {"message": "Chunk uploaded"}, None
+
+    def complete_upload(self, id_token, upload_id, version, checksums=None, size=None):
+        response = requests.post(
+            self.url + "datasets/complete/" + upload_id,
+            json={"version": version, "checksums": checksums, "size": size},
+            headers={"Authorization": "Bearer " + id_token},
+        )
+        return self.format_response(response)
 
     # def update_dataset(self, name, path, id_token, checksum):
     #     # check that dataset exists
@@ -0,0 +1,65 @@
+import json
+
+import numpy as np
+import pystac
+import pytest
+import rasterio
+from affine import Affine
+
+from eotdl.curation.stac.stac import STACGenerator
+from eotdl.curation.stac.utils import metadata_cache
+
+
+def write_raster(path, crs="EPSG:32631", origin=(500000, 4600000), size=8, bands=1):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = np.arange(size * size * bands, dtype="uint16").reshape(bands, size, size)
+    with rasterio.open(
+        path,
+        "w",
+        driver="GTiff",
+        width=size,
+        height=size,
+        count=bands,
+        dtype="uint16",
+        crs=crs,
+        transform=Affine(10, 0, origin[0], 0, -10, origin[1]),
+        nodata=0,
+    ) as ds:
+        ds.write(data)
+    return str(path)
+
+
+@pytest.fixture
+def rasters(tmp_path):
+    # structured dataset, one folder per item with the raster and its metadata
+    paths = []
+    for i in range(6):
+        folder = tmp_path / "data" / "source" / f"item{i}"
+        paths.append(
+            write_raster(folder / "image.tif", origin=(500000 + i * 1000, 4600000))
+        )
+        if i % 2 == 0:
+            metadata = {"acquisition-date": f"2020-01-0{i + 1}", "type": "sentinel-2"}
+            (folder / "metadata.json").write_text(json.dumps(metadata))
+    return paths
+
+
+@pytest.fixture(autouse=True)
+def clear_metadata_cache():
+    metadata_cache.clear()
+    yield
+    metadata_cache.clear()
+
+
+@pytest.fixture
+def catalog(rasters, tmp_path):
+    # self contained catalog with a collection of the rasters
+    generator = STACGenerator(image_format="tif")
+    df = generator.get_stac_dataframe(
+        str(tmp_path / "data"), extensions={"image": ["raster", "proj"]}
+    )
+    catalog = pystac.Catalog(id="catalog", description="catalog")
+    catalog.add_child(generator.generate_stac_collection(df.collection.unique()[0]))
+    catalog.normalize_hrefs(str(tmp_path / "stac"))
+    catalog.save(catalog_type=pystac.CatalogType.SELF_CONTAINED)
+    return str(tmp_path / "stac" / "catalog.json")
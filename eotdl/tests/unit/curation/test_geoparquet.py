@@ -0,0 +1,57 @@
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from eotdl.curation.stac import read_stac, read_stac_geoparquet
+
+
+def test_geoparquet_round_trip(catalog, tmp_path):
+    df = read_stac(catalog)
+    path = str(tmp_path / "catalog.parquet")
+    df.to_geoparquet(path)
+    schema = pq.read_schema(path)
+    assert schema.field("datetime").type.tz == "UTC"
+    assert [f.name for f in schema.field("bbox").type] == ["xmin", "ymin", "xmax", "ymax"]
+    assert schema.field("assets").type.get_field_index("image") == 0
+    written = read_stac_geoparquet(path)
+    assert written["type"].tolist() == df["type"].tolist()
+    assert written.id.tolist() == df.id.tolist()
+    assert all(a.equals(b) for a, b in zip(written.geometry, df.geometry))
+    for column in ["assets", "properties", "bbox", "links", "extent", "collection"]:
+        assert written[column].astype(str).tolist() == df[column].astype(str).tolist()
+    written.to_stac(str(tmp_path / "out"))
+    assert read_stac(str(tmp_path / "out" / "catalog" / "catalog.json")).id.tolist() == df.id.tolist()
+
+
+def test_geoparquet_filters(catalog, tmp_path):
+    df = read_stac(catalog)
+    path = str(tmp_path / "catalog.parquet")
+    df.to_geoparquet(path, row_group_size=2, sort_by="id")
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_row_groups == 3
+    bbox = df[df.id == "item1"].bbox.values[0]
+    items = read_stac_geoparquet(path, bbox=(bbox[0] + 1e-5, bbox[1], bbox[2] - 1e-5, bbox[3]))
+    assert items.id.tolist() == ["catalog", "source", "item1"]
+    items = read_stac_geoparquet(path, datetime=("2020-01-01", "2020-01-03"))
+    assert items.id.tolist() == ["catalog", "source", "item0", "item2"]
+
+
+def test_geoparquet_mixed_types_and_nulls(catalog, tmp_path):
+    df = read_stac(catalog)
+    items = df[df["type"] == "Feature"].sort_values("id")
+    properties = items.properties.tolist()
+    properties[0]["eo:cloud"] = 1
+    properties[1]["eo:cloud"] = "x"
+    properties[2]["start_datetime"] = properties[2]["datetime"]
+    properties[2]["end_datetime"] = properties[2]["datetime"]
+    properties[2]["datetime"] = None
+    path = str(tmp_path / "catalog.parquet")
+    df.to_geoparquet(path)
+    written = read_stac_geoparquet(path).set_index("id").properties
+    assert written["item0"]["eo:cloud"] == 1
+    assert written["item1"]["eo:cloud"] == "x"
+    assert "eo:cloud" not in written["item2"]
+    # the null datetime set in the item is kept, the ones of the missing fields are not
+    assert written["item2"]["datetime"] is None
+    assert written["item2"]["start_datetime"] == properties[2]["start_datetime"]
+    assert "start_datetime" not in written["item0"]
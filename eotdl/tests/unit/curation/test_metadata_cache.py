@@ -0,0 +1,82 @@
+import os
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pandas as pd
+import pystac
+import rasterio
+from pystac.extensions.projection import ProjectionExtension
+
+from eotdl.curation.stac.utils import (
+    MetadataCache,
+    metadata_cache,
+    get_raster_metadata,
+    get_item_metadata,
+    read_raster_header,
+    read_raster_metadata,
+)
+from eotdl.curation.stac.extensions import ProjExtensionObject, RasterExtensionObject
+
+from .conftest import write_raster
+
+
+def test_raster_header_is_read_once(rasters):
+    with patch(
+        "eotdl.curation.stac.utils.raster.read_raster_header",
+        wraps=read_raster_header,
+    ) as read:
+        metadata = get_raster_metadata(rasters[0])
+        assert get_raster_metadata(rasters[0]) == metadata
+    read.assert_called_once()
+    with rasterio.open(rasters[0]) as ds:
+        assert metadata["epsg"] == ds.crs.to_epsg()
+        assert metadata["transform"] == list(ds.transform)
+        assert metadata["shape"] == list(ds.shape)
+        assert metadata["dtypes"] == list(ds.dtypes)
+        assert metadata["nodatavals"] == list(ds.nodatavals)
+
+
+def test_changed_files_are_read_again(rasters, tmp_path):
+    assert get_raster_metadata(rasters[0])["shape"] == [8, 8]
+    write_raster(tmp_path / "data" / "source" / "item0" / "image.tif", size=16)
+    assert get_raster_metadata(rasters[0])["shape"] == [16, 16]
+    metadata_path = tmp_path / "data" / "source" / "item0" / "metadata.json"
+    assert get_item_metadata(rasters[0])["acquisition-date"] == "2020-01-01"
+    metadata_path.write_text(json.dumps({"acquisition-date": "2021-01-01", "type": ""}))
+    assert get_item_metadata(rasters[0])["acquisition-date"] == "2021-01-01"
+
+
+def test_cache_is_persisted(rasters, tmp_path):
+    get_raster_metadata(rasters[0])
+    get_item_metadata(rasters[0])
+    path = str(tmp_path / "cache.json")
+    metadata_cache.save(path)
+    cache = MetadataCache()
+    cache.load(path)
+    assert cache.contains(rasters[0])
+    assert cache.contains(os.path.join(os.path.dirname(rasters[0]), "metadata.json"))
+    assert not cache.contains(rasters[1])
+
+
+def test_read_raster_metadata_returns_entries(rasters):
+    entries = read_raster_metadata(rasters[0])
+    assert sorted(entries) == sorted(
+        [rasters[0], os.path.join(os.path.dirname(rasters[0]), "metadata.json")]
+    )
+    assert read_raster_metadata(rasters[1]).keys() == {rasters[1]}
+
+
+def test_extensions_use_the_cache(rasters):
+    item = pystac.Item("item0", None, None, datetime(2020, 1, 1), {})
+    asset = pystac.Asset(href=rasters[0])
+    item.add_asset("image", asset)
+    info = pd.DataFrame({"image": [rasters[0]]})
+    with patch("eotdl.curation.stac.utils.cache.rasterio.open", wraps=rasterio.open) as open_:
+        ProjExtensionObject().add_extension_to_object(item, info)
+        RasterExtensionObject().add_extension_to_object(asset, info)
+    open_.assert_called_once()
+    proj = ProjectionExtension.ext(item)
+    assert proj.epsg == 32631
+    assert proj.shape == [8, 8]
+    assert asset.extra_fields["raster:bands"][0]["data_type"] == "uint16"
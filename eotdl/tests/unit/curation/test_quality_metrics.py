@@ -0,0 +1,157 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pystac
+import rasterio
+from pystac.extensions.label import LabelExtension, LabelType
+
+from eotdl.curation.stac.extensions import MLDatasetQualityMetrics
+from eotdl.curation.stac.utils import (
+    find_overlapping_bboxes,
+    group_pairs,
+    group_overlapping_bboxes,
+)
+
+
+def test_find_overlapping_bboxes():
+    bboxes = [
+        [0, 0, 1, 1],
+        [0, 0, 1, 1.0000001],  # near duplicate of 0
+        [1, 0, 2, 1],  # touches 0
+        [0.5, 0, 1.5, 1],  # overlaps 0 and 2 by half
+        [5, 5, 5, 5],  # without area
+        [5, 5, 5, 5],
+        [0, 0, 1, 1],
+    ]
+    first, second, iou = find_overlapping_bboxes(bboxes, iou_threshold=0.9, chunk_size=3)
+    assert list(zip(first.tolist(), second.tolist())) == [(0, 1), (4, 5), (0, 6), (1, 6)]
+    assert iou.tolist()[1:3] == [1.0, 1.0]
+    assert group_pairs(first, second) == [[0, 1, 6], [4, 5]]
+    first, second, iou = find_overlapping_bboxes(bboxes, iou_threshold=0.3)
+    assert (0, 3) in zip(first.tolist(), second.tolist())
+
+
+def test_group_overlapping_bboxes():
+    bboxes = [[5, 5, 5, 5]] * 4 + [[0, 0, 1, 1], [2, 2, 3, 3], [0, 0, 1, 1.0000001]]
+    assert group_overlapping_bboxes(bboxes, 0.9) == [[0, 1, 2, 3], [4, 6]]
+    assert group_overlapping_bboxes([], 0.9) == []
+
+
+def test_search_spatial_duplicates():
+    catalog = pystac.Catalog(id="catalog", description="catalog")
+    for i, bbox in enumerate([[0, 0, 1, 1], [2, 2, 3, 3], [0, 0, 1.0000001, 1]]):
+        catalog.add_item(
+            pystac.Item(f"item{i}", None, bbox, datetime(2020, 1, 1), {})
+        )
+    duplicates = MLDatasetQualityMetrics._search_spatial_duplicates(catalog, 0.9)
+    assert duplicates["total"] == 1
+    assert duplicates["values"][0]["item"] == "item2"
+    assert duplicates["values"][0]["duplicate"] == "item0"
+    assert duplicates["clusters"] == [["item0", "item2"]]
+
+
+
+def test_search_spatial_duplicates_reports_every_duplicate_once():
+    catalog = pystac.Catalog(id="catalog", description="catalog")
+    for i, bbox in enumerate([[5, 5, 5, 5]] * 4 + [[0, 0, 1, 1], [0, 0, 1, 1.0000001]]):
+        catalog.add_item(
+            pystac.Item(f"item{i}", None, bbox, datetime(2020, 1, 1), {})
+        )
+    duplicates = MLDatasetQualityMetrics._search_spatial_duplicates(catalog, 0.9)
+    # one value per duplicate item, not per pair
+    assert duplicates["total"] == 4
+    assert [(v["item"], v["duplicate"]) for v in duplicates["values"]] == [
+        ("item1", "item0"),
+        ("item2", "item0"),
+        ("item3", "item0"),
+        ("item5", "item4"),
+    ]
+    assert [v["iou"] for v in duplicates["values"][:3]] == [1.0, 1.0, 1.0]
+    assert duplicates["clusters"] == [
+        ["item0", "item1", "item2", "item3"],
+        ["item4", "item5"],
+    ]
+
+
+def add_label_item(catalog, id, href, properties):
+    item = pystac.Item(id, None, [0, 0, 1, 1], datetime(2020, 1, 1), {})
+    label = LabelExtension.ext(item, add_if_missing=True)
+    label.apply(
+        label_description="labels",
+        label_type=LabelType.VECTOR if properties else LabelType.RASTER,
+        label_properties=properties,
+    )
+    item.add_asset("labels", pystac.Asset(href=href))
+    catalog.add_item(item)
+
+
+def feature(**properties):
+    return {"type": "Feature", "geometry": None, "properties": properties}
+
+
+def write_geojson(path, features):
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+    return str(path)
+
+
+def test_get_classes_balance(tmp_path):
+    catalog = pystac.Catalog(id="catalog", description="catalog")
+    first = write_geojson(
+        tmp_path / "first.geojson",
+        [feature(kind="water", labels=["water"]), feature(labels=["forest"])],
+    )
+    second = write_geojson(
+        tmp_path / "second.geojson",
+        [feature(kind="urban", size="big"), feature(kind="water", labels=[])],
+    )
+    add_label_item(catalog, "first", first, ["kind"])
+    add_label_item(catalog, "second", second, ["kind", "size"])
+    balance = MLDatasetQualityMetrics._get_classes_balance(catalog, workers=2)
+    assert balance == {
+        "name": "classes-balance",
+        "values": [
+            {
+                "name": "kind",
+                "values": [
+                    {"class": "water", "total": 2, "percentage": 50},
+                    {"class": "forest", "total": 1, "percentage": 25},
+                    {"class": "urban", "total": 1, "percentage": 25},
+                ],
+            },
+            {
+                "name": "size",
+                "values": [
+                    {"class": "water", "total": 1, "percentage": 33},
+                    {"class": "forest", "total": 1, "percentage": 33},
+                    {"class": "big", "total": 1, "percentage": 33},
+                ],
+            },
+        ],
+    }
+
+
+def test_get_classes_balance_of_raster_labels(tmp_path):
+    catalog = pystac.Catalog(id="catalog", description="catalog")
+    path = tmp_path / "mask.tif"
+    data = np.zeros((1, 64, 64), dtype="uint8")
+    data[0, :16] = 1
+    data[0, 16:20] = 3
+    data[0, 20:21] = 255  # nodata
+    with rasterio.open(
+        path, "w", driver="GTiff", width=64, height=64, count=1, dtype="uint8",
+        nodata=255, tiled=True, blockxsize=16, blockysize=16,
+    ) as ds:
+        ds.write(data)
+    add_label_item(catalog, "mask", str(path), None)
+    balance = MLDatasetQualityMetrics._get_classes_balance(catalog)
+    assert balance["values"] == [
+        {
+            "name": "labels",
+            "values": [
+                {"class": 0, "total": 43 * 64, "percentage": 68},
+                {"class": 1, "total": 16 * 64, "percentage": 25},
+                {"class": 3, "total": 4 * 64, "percentage": 6},
+            ],
+        }
+    ]
@@ -0,0 +1,38 @@
+import pystac
+import shapely
+
+from eotdl.curation.stac import STACDataFrame, read_stac, iter_stac
+from eotdl.curation.stac.utils import geojson_to_geometries
+
+
+def test_read_stac_from_json_files(catalog):
+    df = read_stac(catalog)
+    expected = read_stac(pystac.read_file(catalog))
+    assert isinstance(df, STACDataFrame)
+    assert df.id.tolist() == expected.id.tolist()
+    assert df["type"].tolist() == ["Catalog", "Collection"] + ["Feature"] * 6
+    assert df.geometry.equals(expected.geometry)
+    for column in ["assets", "properties", "bbox", "extent"]:
+        assert df[column].astype(str).tolist() == expected[column].astype(str).tolist()
+    self_links = [
+        [link["href"] for link in links if link["rel"] == "self"] for links in df.links
+    ]
+    assert self_links == [
+        [link["href"] for link in links if link["rel"] == "self"]
+        for links in expected.links
+    ]
+
+
+def test_iter_stac(catalog):
+    batches = list(iter_stac(catalog, chunk_size=4, workers=2))
+    assert [len(batch) for batch in batches] == [2, 4, 2]
+    assert all(isinstance(batch, STACDataFrame) for batch in batches)
+    assert batches[0].geometry.is_empty.all()
+    assert [id for batch in batches for id in batch.id] == read_stac(catalog).id.tolist()
+
+
+def test_geojson_to_geometries():
+    polygon = {"type": "Polygon", "coordinates": [[[0, 0], [0, 1], [1, 1], [0, 0]]]}
+    geometries = geojson_to_geometries([None, polygon, float("nan")])
+    assert geometries[0].is_empty and geometries[2].is_empty
+    assert geometries[1].equals(shapely.geometry.shape(polygon))
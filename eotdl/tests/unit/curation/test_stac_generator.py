@@ -0,0 +1,55 @@
+import pystac
+
+from eotdl.curation.stac.stac import STACGenerator
+from eotdl.curation.stac.utils import metadata_cache, add_items_to_collection
+
+
+def test_generate_stac_collection_with_workers(rasters, tmp_path):
+    root = str(tmp_path / "data")
+    extensions = {"image": ["raster", "proj"]}
+    serial = STACGenerator(image_format="tif")
+    serial.get_stac_dataframe(root, extensions=extensions)
+    parallel = STACGenerator(image_format="tif", workers=2)
+    parallel.get_stac_dataframe(root, extensions=extensions)
+    collection_path = serial._stac_dataframe.collection.unique()[0]
+    expected = serial.generate_stac_collection(collection_path)
+    metadata_cache.clear()
+    collection = parallel.generate_stac_collection(collection_path)
+    assert collection.to_dict() == expected.to_dict()
+    items = [item.to_dict() for item in collection.get_items()]
+    assert items == [item.to_dict() for item in expected.get_items()]
+    assert len(items) == len(rasters)
+    assert parallel._stac_dataframe.equals(serial._stac_dataframe)
+
+
+def test_generate_stac_collection_adds_ids(rasters, tmp_path):
+    generator = STACGenerator(image_format="tif")
+    df = generator.get_stac_dataframe(str(tmp_path / "data"))
+    generator.generate_stac_collection(df.collection.unique()[0])
+    ids = generator._stac_dataframe.set_index("image")["id"].to_dict()
+    assert ids == {raster: f"item{i}" for i, raster in enumerate(rasters)}
+
+
+def test_create_stac_item_adds_id(rasters, tmp_path):
+    generator = STACGenerator(image_format="tif")
+    generator.get_stac_dataframe(str(tmp_path / "data"))
+    item = generator.create_stac_item(rasters[0])
+    assert item.id == "item0"
+    df = generator._stac_dataframe
+    assert df[df["image"] == rasters[0]]["id"].values[0] == "item0"
+
+
+def test_add_items_to_collection(rasters, tmp_path):
+    generator = STACGenerator(image_format="tif")
+    generator.get_stac_dataframe(str(tmp_path / "data"))
+    extent = pystac.Extent.from_dict({"spatial": {"bbox": [[0, 0, 1, 1]]}, "temporal": {"interval": [[None, None]]}})
+    collections, items = list(), list()
+    for _ in range(2):
+        collections.append(pystac.Collection(id="source", description="Collection", extent=extent))
+        items.append([generator.create_stac_item(raster) for raster in rasters])
+    for item in items[0]:
+        collections[0].add_item(item)
+    add_items_to_collection(collections[1], items[1])
+    assert collections[1].to_dict() == collections[0].to_dict()
+    assert all(item.get_parent() is collections[1] for item in items[1])
+    assert [item.to_dict() for item in items[1]] == [item.to_dict() for item in items[0]]
@@ -0,0 +1,76 @@
+import json
+
+from shapely.geometry import Polygon
+
+from eotdl.curation.stac import STACDataFrame, read_stac
+
+
+def test_to_stac(catalog, tmp_path):
+    df = read_stac(catalog)
+    calls = []
+    df.to_stac(str(tmp_path / "out"), workers=2, progress=lambda *args: calls.append(args))
+    assert calls == [(i, 6) for i in range(1, 7)]
+    written = read_stac(str(tmp_path / "out" / "catalog" / "catalog.json"))
+    assert written.id.tolist() == df.id.tolist()
+    assert written.geometry.equals(df.geometry)
+    for column in ["assets", "properties", "bbox", "extent"]:
+        assert written[column].astype(str).tolist() == df[column].astype(str).tolist()
+
+
+def test_to_stac_from_geodb(tmp_path):
+    # dict columns stored as json strings, and the stac ids in the stac_id column
+    polygon = Polygon([(0, 0), (0, 1), (1, 1), (0, 0)])
+    df = STACDataFrame(
+        {
+            "type": ["Catalog", "Collection", "Feature"],
+            "id": [1, 2, 3],
+            "stac_id": ["catalog", "source", "001"],
+            "collection": [None, None, "source"],
+            "properties": [None, None, '{"datetime": "2020-01-01T00:00:00Z"}'],
+            "created_at": ["2023-01-01"] * 3,
+            "geometry": [Polygon(), Polygon(), polygon],
+        },
+        crs="EPSG:4326",
+    )
+    df.to_stac(str(tmp_path))
+    with open(tmp_path / "catalog" / "source" / "001" / "001.json") as f:
+        item = json.load(f)
+    assert item == {
+        "type": "Feature",
+        "id": "001",
+        "collection": "source",
+        "properties": {"datetime": "2020-01-01T00:00:00Z"},
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0.0, 0.0], [0.0, 1.0], [1.0, 1.0], [0.0, 0.0]]],
+        },
+    }
+    with open(tmp_path / "catalog" / "catalog.json") as f:
+        assert json.load(f) == {"type": "Catalog", "id": "catalog"}
+
+
+def test_to_stac_from_geodb_keeps_empty_json(tmp_path):
+    # empty objects and arrays are kept, and json strings after empty strings are decoded
+    polygon = Polygon([(0, 0), (0, 1), (1, 1), (0, 0)])
+    df = STACDataFrame(
+        {
+            "type": ["Catalog", "Collection", "Feature", "Feature"],
+            "id": [1, 2, 3, 4],
+            "stac_id": ["catalog", "source", "001", "002"],
+            "collection": [None, None, "source", "source"],
+            "properties": [None, None, "{}", '{"datetime": "2020-01-01T00:00:00Z"}'],
+            "links": ["[]", "[]", "[]", "[]"],
+            "assets": [None, "", "", '{"image": {"href": "image.tif"}}'],
+            "geometry": [Polygon(), Polygon(), polygon, polygon],
+        },
+        crs="EPSG:4326",
+    )
+    df.to_stac(str(tmp_path))
+    items = []
+    for stac_id in "001", "002":
+        with open(tmp_path / "catalog" / "source" / stac_id / f"{stac_id}.json") as f:
+            items.append(json.load(f))
+    assert items[0]["properties"] == {}
+    assert items[0]["links"] == []
+    assert "assets" not in items[0]
+    assert items[1]["assets"] == {"image": {"href": "image.tif"}}
@@ -0,0 +1,69 @@
+import io
+import hashlib
+import tarfile
+import pytest
+from unittest.mock import patch, MagicMock
+
+from eotdl.datasets.download import download_archive, extract_archive
+
+FILES = {"a/1.tif": b"1" * 1000, "b.tif": b"2" * 513}
+
+
+def make_archive(files, manifest):
+    data = io.BytesIO()
+    with tarfile.open(fileobj=data, mode="w") as archive:
+        for name, content in list(files.items()) + [("checksums.sha1", manifest)]:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    data.seek(0)
+    return data
+
+
+def sha1_manifest(files):
+    return "".join(
+        f"{hashlib.sha1(content).hexdigest()}  {name}\n"
+        for name, content in files.items()
+    ).encode()
+
+
+def test_extract_archive(tmp_path):
+    stream = make_archive(FILES, sha1_manifest(FILES))
+    checksums, manifest = extract_archive(stream, str(tmp_path))
+    assert checksums == manifest
+    assert (tmp_path / "a" / "1.tif").read_bytes() == FILES["a/1.tif"]
+    assert not (tmp_path / "checksums.sha1").exists()
+
+
+def test_extract_archive_rejects_paths_outside_destination(tmp_path):
+    stream = make_archive({"../evil.tif": b"evil"}, b"")
+    with pytest.raises(Exception, match="Invalid file path"):
+        extract_archive(stream, str(tmp_path / "dst"))
+    assert not (tmp_path / "evil.tif").exists()
+
+
+@patch("eotdl.datasets.download.FilesAPIRepo")
+def test_download_archive_verifies_manifest(mock_repo, tmp_path):
+    manifest = sha1_manifest({**FILES, "b.tif": b"other"})
+    response = MagicMock()
+    response.raw = make_archive(FILES, manifest)
+    mock_repo.return_value.download_archive.return_value = response, None
+    with pytest.raises(Exception, match="1 files do not match"):
+        download_archive("123", 1, str(tmp_path), "token", verbose=True)
+
+
+@patch("eotdl.datasets.download.FilesAPIRepo")
+def test_download_compressed_archive(mock_repo, tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    data = make_archive(FILES, sha1_manifest(FILES)).read()
+    response = MagicMock()
+    response.raw = io.BytesIO(zstandard.ZstdCompressor().compress(data))
+    mock_repo.return_value.download_archive.return_value = response, None
+    files = download_archive(
+        "123", 1, str(tmp_path), "token", verbose=True, compression="zstd"
+    )
+    assert sorted(files) == sorted(FILES)
+    assert (tmp_path / "b.tif").read_bytes() == FILES["b.tif"]
+    mock_repo.return_value.download_archive.assert_called_once_with(
+        "123", 1, "token", compression="zstd"
+    )
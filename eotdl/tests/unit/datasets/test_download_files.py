@@ -0,0 +1,38 @@
+from unittest import mock
+from unittest.mock import patch
+
+from eotdl.datasets.download import download_files
+
+
+@patch("eotdl.datasets.download.FilesAPIRepo")
+def test_download_files(mock_repo):
+    repo = mock_repo.return_value
+    files = [
+        {"filename": "a.tif", "version": 1, "checksum": "123", "size": 10},
+        {"filename": "b/b.tif", "version": 2, "checksum": "456", "size": 20},
+    ]
+    errors = download_files("dataset-id", files, "path", "token", workers=2)
+    assert errors == []
+    repo.create_session.assert_called_once_with(2)
+    assert repo.download_file.call_count == 2
+    repo.create_session.return_value.close.assert_called_once()
+
+
+@patch("eotdl.datasets.download.FilesAPIRepo")
+def test_download_files_reports_failures_without_aborting(mock_repo):
+    repo = mock_repo.return_value
+
+    def download_file(dataset_id, filename, *args, **kwargs):
+        if filename == "b.tif":
+            raise Exception("error")
+        return filename
+
+    repo.download_file.side_effect = download_file
+    files = [
+        {"filename": "a.tif", "version": 1, "checksum": "123"},
+        {"filename": "b.tif", "version": 1, "checksum": "456"},
+        {"filename": "c.tif", "version": 1, "checksum": "789"},
+    ]
+    errors = download_files("dataset-id", files, "path", "token", workers=2)
+    assert errors == [("b.tif", "error")]
+    assert repo.download_file.call_count == 3
@@ -0,0 +1,139 @@
+import hashlib
+import pytest
+from pathlib import Path
+from unittest.mock import patch
+
+from eotdl.datasets.ingest import ingest_files, ingest_folder
+
+
+def sha1(data):
+    return hashlib.sha1(data).hexdigest()
+
+
+@pytest.fixture
+def folder(tmp_path):
+    (tmp_path / "a").mkdir()
+    for i in range(10):
+        (tmp_path / "a" / f"{i}.tif").write_bytes(bytes([i]) * 1000)
+    return tmp_path
+
+
+@patch("eotdl.datasets.ingest.ingest_file")
+def test_ingest_files(mock_ingest_file, folder):
+    mock_ingest_file.return_value = {"dataset_id": "123"}
+    items = sorted(Path(folder).glob("**/*.tif"))
+    logs = []
+    data = ingest_files(
+        items,
+        folder,
+        "123",
+        1,
+        {"id_token": "token"},
+        workers=2,
+        logger=logs.append,
+        batch_size=1,
+    )
+    assert data == {"dataset_id": "123", "version": 1, "uploaded": 10, "linked": 0}
+    assert mock_ingest_file.call_count == 10
+    for call in mock_ingest_file.call_args_list:
+        file, parent = call.args[0], call.args[3]
+        assert parent == "a"
+        with open(file, "rb") as f:
+            assert call.kwargs["checksum"] == hashlib.sha1(f.read()).hexdigest()
+    assert logs[0].startswith("Hashing: 10 files")
+    assert logs[1].startswith("Uploading: 10 files")
+
+
+@patch("eotdl.datasets.ingest.ingest_file")
+def test_ingest_files_presigned_shares_parts_executor(mock_ingest_file, folder):
+    items = sorted(Path(folder).glob("**/*.tif"))
+    ingest_files(
+        items,
+        folder,
+        "123",
+        1,
+        {"id_token": "token"},
+        workers=2,
+        logger=print,
+        batch_size=1,
+        presigned=True,
+    )
+    executors = set()
+    for call in mock_ingest_file.call_args_list:
+        assert call.kwargs["presigned"] is True
+        executors.add(call.kwargs["parts_executor"])
+    assert len(executors) == 1 and None not in executors
+
+
+@patch("eotdl.datasets.ingest.ingest_file")
+def test_ingest_files_reports_failures(mock_ingest_file, folder):
+    def ingest_file(file, *args, **kwargs):
+        if file.endswith("3.tif"):
+            raise Exception("error")
+
+    mock_ingest_file.side_effect = ingest_file
+    items = sorted(Path(folder).glob("**/*.tif"))
+    with pytest.raises(Exception, match="1 of 10 files could not be ingested"):
+        ingest_files(
+            items, folder, "123", 1, {"id_token": "token"}, logger=print, batch_size=1
+        )
+    assert mock_ingest_file.call_count == 10
+
+
+@patch("eotdl.datasets.ingest.ingest_file")
+@patch("eotdl.datasets.ingest.FilesAPIRepo")
+def test_ingest_files_in_batches(mock_repo, mock_ingest_file, folder):
+    repo = mock_repo.return_value
+    repo.ingest_files_batch.return_value = {"dataset_id": "123"}, None
+    repo.ingest_existing_files.return_value = {"dataset_id": "123"}, None
+    items = sorted(Path(folder).glob("**/*.tif"))
+    current_files = [
+        {"filename": "a/0.tif", "version": 1, "checksum": sha1(bytes([0]) * 1000)},
+        {"filename": "a/1.tif", "version": 1, "checksum": "modified"},
+    ]
+    data = ingest_files(
+        items,
+        folder,
+        "123",
+        2,
+        {"id_token": "token"},
+        current_files,
+        workers=2,
+        logger=print,
+        batch_size=4,
+    )
+    assert data == {"dataset_id": "123", "version": 2, "uploaded": 9, "linked": 1}
+    mock_ingest_file.assert_not_called()
+    # unchanged files are linked to the new version without uploading them
+    repo.ingest_existing_files.assert_called_once()
+    files, dataset_id, version, _ = repo.ingest_existing_files.call_args.args
+    checksum = current_files[0]["checksum"]
+    assert files == [{"filename": "a/0.tif", "file_version": 1, "checksum": checksum}]
+    batches = [call.args for call in repo.ingest_files_batch.call_args_list]
+    assert sorted(len(files) for files, *_ in batches) == [1, 4, 4]
+    for files, dataset_id, version, parents, checksums, id_token in batches:
+        assert parents == ["a"] * len(files)
+        for file, checksum in zip(files, checksums):
+            with open(file, "rb") as f:
+                assert checksum == sha1(f.read())
+
+
+@patch("eotdl.datasets.ingest.ingest_files")
+@patch("eotdl.datasets.retrieve.FilesAPIRepo")
+@patch("eotdl.datasets.ingest.DatasetsAPIRepo")
+@patch("eotdl.auth.auth.auth")
+def test_ingest_folder_ignores_failed_listing(
+    mock_auth, mock_datasets_repo, mock_files_repo, mock_ingest_files, folder
+):
+    (folder / "metadata.yml").write_text(
+        "name: test-dataset\nauthors: [test]\nlicense: free\nsource: http://test.com\n"
+    )
+    mock_auth.return_value = {"id_token": "token", "sub": "123"}
+    repo = mock_datasets_repo.return_value
+    repo.create_dataset.return_value = {"dataset_id": "123"}, None
+    repo.create_version.return_value = {"version": 2}, None
+    mock_files_repo.return_value.retrieve_dataset_files.return_value = None, "error"
+    ingest_folder(folder, logger=print)
+    # the files of the previous version are listed before ingesting the new one
+    current_files = mock_ingest_files.call_args.args[5]
+    assert current_files == []
@@ -0,0 +1,97 @@
+import hashlib
+import pytest
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+
+from eotdl.repos import FilesAPIRepo
+from eotdl.datasets.ingest import ingest_large_file
+
+MB = 1024 * 1024
+
+
+def test_chunk_size_respects_s3_limits():
+    repo = FilesAPIRepo()
+    assert repo.get_chunk_size(100 * MB) == 10 * MB
+    for size in [1024 * 1024 * MB, 3 * 1024 * 1024 * MB]:
+        chunk_size = repo.get_chunk_size(size)
+        assert chunk_size % MB == 0
+        assert -(-size // chunk_size) <= 10000
+
+
+@pytest.fixture
+def large_file(tmp_path):
+    path = tmp_path / "large.tif"
+    path.write_bytes(b"".join(bytes([i]) * 10 * MB for i in range(3)) + b"end")
+    return path
+
+
+@patch("eotdl.datasets.ingest.FilesAPIRepo")
+def test_ingest_large_file_resumes_missing_parts(mock_repo, large_file):
+    repo = mock_repo.return_value
+    repo.get_chunk_size.return_value = 10 * MB
+    repo.ingest_file_part.return_value = {"message": "Chunk uploaded"}, None
+    size = large_file.stat().st_size
+    checksums = ingest_large_file(str(large_file), size, "upload-id", [1, 3], "token")
+    data = large_file.read_bytes()
+    assert checksums == [
+        hashlib.md5(data[i : i + 10 * MB]).hexdigest() for i in range(0, size, 10 * MB)
+    ]
+    parts = sorted(call.args[1] for call in repo.ingest_file_part.call_args_list)
+    assert parts == [2, 4]
+    for call in repo.ingest_file_part.call_args_list:
+        chunk, part, _, checksum = call.args[:4]
+        assert checksum == hashlib.md5(chunk).hexdigest()
+        assert chunk == (b"end" if part == 4 else bytes([part - 1]) * 10 * MB)
+
+
+@patch("eotdl.datasets.ingest.FilesAPIRepo")
+def test_ingest_large_file_retries_failed_part(mock_repo, large_file):
+    repo = mock_repo.return_value
+    repo.get_chunk_size.return_value = 10 * MB
+    repo.ingest_file_part.side_effect = [
+        (None, "Checksum mismatch."),
+        ({"message": "Chunk uploaded"}, None),
+    ]
+    size = large_file.stat().st_size
+    ingest_large_file(str(large_file), size, "upload-id", [1, 2, 3], "token")
+    assert repo.ingest_file_part.call_count == 2
+
+
+@patch("eotdl.datasets.ingest.FilesAPIRepo")
+def test_ingest_large_file_fails_after_retries(mock_repo, large_file):
+    repo = mock_repo.return_value
+    repo.get_chunk_size.return_value = 10 * MB
+    repo.ingest_file_part.return_value = None, "error"
+    size = large_file.stat().st_size
+    with pytest.raises(Exception, match="part 4"):
+        ingest_large_file(str(large_file), size, "upload-id", [1, 2, 3], "token")
+    assert repo.ingest_file_part.call_count == 3
+
+
+@patch("eotdl.datasets.ingest.FilesAPIRepo")
+def test_ingest_large_file_presigned(mock_repo, large_file):
+    repo = mock_repo.return_value
+    repo.get_chunk_size.return_value = 10 * MB
+    repo.ingest_file_part_url.return_value = {"message": "Chunk uploaded"}, None
+    size = large_file.stat().st_size
+    ingest_large_file(
+        str(large_file), size, "upload-id", [1, 2], "token", presigned=True
+    )
+    parts = sorted(call.args[1] for call in repo.ingest_file_part_url.call_args_list)
+    assert parts == [3, 4]
+    repo.ingest_file_part.assert_not_called()
+
+
+@patch("eotdl.datasets.ingest.FilesAPIRepo")
+def test_ingest_large_file_shared_executor(mock_repo, large_file):
+    repo = mock_repo.return_value
+    repo.get_chunk_size.return_value = 10 * MB
+    repo.ingest_file_part.return_value = {"message": "Chunk uploaded"}, None
+    size = large_file.stat().st_size
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        ingest_large_file(
+            str(large_file), size, "upload-id", [], "token", executor=executor
+        )
+        # the executor is not shut down, other files keep using it
+        assert executor.submit(lambda: 1).result() == 1
+    assert repo.ingest_file_part.call_count == 4
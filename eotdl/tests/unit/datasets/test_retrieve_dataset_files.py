@@ -0,0 +1,17 @@
+from unittest.mock import patch
+
+from eotdl.datasets.retrieve import retrieve_dataset_files
+
+
+@patch("eotdl.datasets.retrieve.FilesAPIRepo")
+def test_retrieve_dataset_files_iterates_over_pages(mock_repo):
+    repo = mock_repo.return_value
+    repo.retrieve_dataset_files.side_effect = [
+        ({"files": [{"filename": "a"}, {"filename": "b"}], "next": "b"}, None),
+        ({"files": [{"filename": "c"}], "next": None}, None),
+    ]
+    files = retrieve_dataset_files("123", 1, page_size=2)
+    repo.retrieve_dataset_files.assert_not_called()
+    assert [f["filename"] for f in files] == ["a", "b", "c"]
+    cursors = [call.args[3] for call in repo.retrieve_dataset_files.call_args_list]
+    assert cursors == [None, "b"]
@@ -0,0 +1,101 @@
+import os
+import hashlib
+from unittest.mock import patch
+
+from eotdl.datasets.download import download_dataset
+from eotdl.datasets.sync import (
+    sync_dataset,
+    compare_with_manifest,
+    save_manifest,
+    load_manifest,
+)
+
+
+@patch("eotdl.datasets.sync.calculate_checksum")
+def test_compare_with_manifest(mock_checksum, tmp_path):
+    for filename in ["same.tif", "changed.tif", "untracked.tif", "removed.tif"]:
+        (tmp_path / filename).write_text("data")
+    mock_checksum.return_value = "untracked"
+    files = [
+        {"filename": "same.tif", "version": 1, "checksum": "same"},
+        {"filename": "changed.tif", "version": 2, "checksum": "new"},
+        {"filename": "untracked.tif", "version": 1, "checksum": "untracked"},
+        {"filename": "new.tif", "version": 1, "checksum": "new"},
+    ]
+    manifest = {
+        "files": {
+            "same.tif": {"version": 1, "checksum": "same"},
+            "changed.tif": {"version": 1, "checksum": "old"},
+            "removed.tif": {"version": 1, "checksum": "removed"},
+        }
+    }
+    synced, missing, removed = compare_with_manifest(files, manifest, str(tmp_path))
+    assert [f["filename"] for f in synced] == ["same.tif", "untracked.tif"]
+    assert [f["filename"] for f in missing] == ["changed.tif", "new.tif"]
+    assert removed == ["removed.tif"]
+    mock_checksum.assert_called_once_with(os.path.join(str(tmp_path), "untracked.tif"))
+
+
+def test_compare_without_manifest_downloads_everything(tmp_path):
+    files = [{"filename": "a.tif", "version": 1, "checksum": "a"}]
+    synced, missing, removed = compare_with_manifest(files, None, str(tmp_path))
+    assert synced == [] and missing == files and removed == []
+
+
+def sha1(data):
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+@patch("eotdl.datasets.download.FilesAPIRepo")
+@patch("eotdl.datasets.sync.retrieve_dataset_files")
+@patch("eotdl.datasets.download.retrieve_dataset_files")
+@patch("eotdl.datasets.sync.retrieve_dataset")
+@patch("eotdl.datasets.download.retrieve_dataset")
+@patch("eotdl.auth.auth.auth")
+def test_sync_after_get_only_downloads_changes(
+    mock_auth, mock_dataset, mock_sync_dataset, mock_files, mock_sync_files, mock_repo, tmp_path
+):
+    mock_auth.return_value = {"id_token": "token"}
+    dataset = {"id": "123", "name": "test", "quality": 0, "versions": [{"version_id": 1}]}
+    mock_dataset.return_value = mock_sync_dataset.return_value = dataset
+    contents = {("a.tif", 1): "a", ("b/b.tif", 1): "b", ("b/b.tif", 2): "b2", ("c.tif", 1): "c"}
+
+    def download_file(dataset_id, filename, id_token, path, version, **kwargs):
+        # resumable downloads are written to a .part file, moved in place once verified
+        dst_path = os.path.join(path, filename) + (".part" if kwargs.get("resume") else "")
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        with open(dst_path, "w") as f:
+            f.write(contents[(filename, version)])
+        return dst_path
+
+    mock_repo.return_value.download_file.side_effect = download_file
+    mock_files.return_value = [
+        {"filename": f, "version": v, "checksum": sha1(contents[(f, v)])}
+        for f, v in [("a.tif", 1), ("b/b.tif", 1), ("c.tif", 1)]
+    ]
+    path = download_dataset("test", path=str(tmp_path), logger=print)
+    assert path == str(tmp_path / "test" / "v1")
+    dataset["versions"].append({"version_id": 2})
+    mock_sync_files.return_value = [
+        {"filename": f, "version": v, "checksum": sha1(contents[(f, v)])}
+        for f, v in [("a.tif", 1), ("b/b.tif", 2)]
+    ]
+    mock_repo.return_value.download_file.reset_mock()
+    path = sync_dataset("test", path=str(tmp_path), logger=print)
+    # the copy downloaded by get is moved to the new version and only the changes downloaded
+    assert path == str(tmp_path / "test" / "v2")
+    assert not os.path.exists(tmp_path / "test" / "v1")
+    downloaded = [c.args[1] for c in mock_repo.return_value.download_file.call_args_list]
+    assert downloaded == ["b/b.tif"]
+    assert (tmp_path / "test" / "v2" / "b" / "b.tif").read_text() == "b2"
+    assert not os.path.exists(tmp_path / "test" / "v2" / "c.tif")
+    assert load_manifest(path)["version"] == 2
+
+
+def test_save_and_load_manifest(tmp_path):
+    dataset = {"id": "123", "name": "test"}
+    files = [{"filename": "a/b.tif", "version": 2, "checksum": "abc"}]
+    save_manifest(str(tmp_path), dataset, 3, files)
+    manifest = load_manifest(str(tmp_path))
+    assert manifest["version"] == 3
+    assert manifest["files"] == {"a/b.tif": {"version": 2, "checksum": "abc"}}